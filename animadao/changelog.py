@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import json
+import xmlrpc.client
+from collections.abc import Iterator
+from dataclasses import dataclass
+from pathlib import Path
+
+from animadao.http_session import HttpSession
+from animadao.pypi_cache import PyPICache
+
+# PyPI's XML-RPC endpoint (`changelog_since_serial`, `changelog_last_serial`)
+PYPI_XMLRPC = "https://pypi.org/pypi"
+# safety bound on follow-up calls when a sync is far behind
+MAX_ROUNDS = 20
+
+
+@dataclass(frozen=True)
+class ChangeEvent:
+    """One changelog row: `(name, version, timestamp, action, serial)` as PyPI reports it."""
+
+    name: str
+    version: str | None
+    timestamp: int
+    action: str
+    serial: int
+
+
+@dataclass(frozen=True)
+class SyncResult:
+    serial: int  # last serial now recorded in the cache
+    events: int  # change events read
+    invalidated: list[str]  # cached names dropped because they changed upstream
+    baseline: bool  # first sync: nothing before it was covered by the feed
+    complete: bool = True  # False when the feed was cut off after MAX_ROUNDS: entries keep ageing by TTL
+
+
+def _event(row: object) -> ChangeEvent:
+    if isinstance(row, dict):
+        row = [row.get(k) for k in ("name", "version", "timestamp", "action", "serial")]
+    name, version, ts, action, serial = row  # type: ignore[misc]
+    return ChangeEvent(str(name), None if version is None else str(version), int(ts or 0), str(action), int(serial))
+
+
+def _call(session: HttpSession, url: str, method: str, *params: object) -> object:
+    body = xmlrpc.client.dumps(params, method).encode("utf-8")
+    r = session.request("POST", url, {"Content-Type": "text/xml"}, content=body)
+    r.raise_for_status()
+    return xmlrpc.client.loads(r.content)[0][0]
+
+
+def last_serial(session: HttpSession, url: str = PYPI_XMLRPC) -> int:
+    """Current serial of the index (`changelog_last_serial`)."""
+    return int(_call(session, url, "changelog_last_serial"))
+
+
+def fetch_events(session: HttpSession, since: int, url: str = PYPI_XMLRPC) -> tuple[list[ChangeEvent], bool]:
+    """
+    Change events after `since` via `changelog_since_serial`, following up while batches keep coming.
+    Returns `(events, complete)`: `complete` is False when `MAX_ROUNDS` ran out before the feed did.
+    """
+    events: list[ChangeEvent] = []
+    for _ in range(MAX_ROUNDS):
+        rows = _call(session, url, "changelog_since_serial", since)
+        batch = [_event(r) for r in rows or []]  # type: ignore[union-attr]
+        if not batch or max(e.serial for e in batch) <= since:
+            return events, True
+        events += batch
+        since = max(e.serial for e in batch)
+    return events, False
+
+
+def read_events(path: Path) -> Iterator[ChangeEvent]:
+    """
+    Change events from a local dump: a JSON array, or JSON lines, of `[name, version, timestamp,
+    action, serial]` rows or objects with those keys (e.g. saved `changelog_since_serial` output).
+    """
+    text = path.read_text(encoding="utf-8")
+    try:
+        rows = json.loads(text)
+    except ValueError:
+        rows = [json.loads(line) for line in text.splitlines() if line.strip()]
+    else:
+        if not isinstance(rows, list) or (rows and not isinstance(rows[0], (list, dict))):
+            rows = [rows]  # a single JSON-lines row
+    for row in rows:
+        yield _event(row)
+
+
+def sync_cache(
+    cache: PyPICache,
+    *,
+    session: HttpSession | None = None,
+    url: str = PYPI_XMLRPC,
+    dump: Path | None = None,
+) -> SyncResult:
+    """
+    Bring `cache` up to date with the index's changelog, from `url` or a local `dump` file.
+
+    Only events newer than the recorded serial count; every project they mention is dropped from the
+    cache (refetched on next use), all other entries are confirmed current. Without a recorded serial
+    the feed's current serial (or the dump's newest) becomes the baseline. A feed cut off after
+    `MAX_ROUNDS` confirms nothing: the changed entries are still dropped and the serial reached is
+    recorded, so the next sync resumes there. A dump confirms entries only up to its newest event's
+    timestamp, so re-applying a stale dump doesn't extend anything's life.
+    """
+    complete, as_of = True, None
+    since = cache.changelog_serial
+    if dump is not None:
+        rows = list(read_events(dump))
+        events = [e for e in rows if since is None or e.serial > since]
+        serial = max((e.serial for e in events), default=since or 0)
+        as_of = max((float(e.timestamp) for e in rows), default=0.0)
+        if since is None:
+            events = []  # nothing older than the baseline is trusted, so nothing to apply
+    else:
+        session = session or HttpSession()
+        if since is None:
+            events, serial = [], last_serial(session, url)
+        else:
+            events, complete = fetch_events(session, since, url)
+            serial = max((e.serial for e in events), default=since)
+    invalidated = cache.apply_changelog(serial, {e.name for e in events}, complete=complete, as_of=as_of)
+    return SyncResult(
+        serial=serial, events=len(events), invalidated=invalidated, baseline=since is None, complete=complete
+    )
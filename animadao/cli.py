@@ -3,15 +3,24 @@ from __future__ import annotations
 import json
 import sys
 from collections.abc import Iterable
+from dataclasses import asdict, replace
 from pathlib import Path
 
 import click
 from packaging.requirements import Requirement
 
+from animadao.changelog import PYPI_XMLRPC, sync_cache
 from animadao.config import load_config
-from animadao.dependency_checker import guess_unused, load_declared_deps_any
-from animadao.native import scan_imports
-from animadao.report_generator import generate_report
+from animadao.dependency_checker import guess_unused, import_candidates
+from animadao.dist_index import DistIndex, InstalledVersions, target_site_dirs
+from animadao.import_map import default_import_map, is_stdlib, load_dump, user_map_path, write_import_map
+from animadao.index_api import PYPI_JSON_BASE
+from animadao.manifest import ProjectManifest
+from animadao.provenance import ProvenanceIndex
+from animadao.pypi_cache import PyPICache, read_export
+from animadao.release_history import POLICIES
+from animadao.report_generator import environment_matrix, generate_report
+from animadao.scan_session import ScanSession
 from animadao.version_checker import VersionChecker
 
 
@@ -21,6 +30,60 @@ def _merge_ignore(base: set[str] | None, extra: Iterable[str] | None) -> set[str
     return out
 
 
+# installed mode: audit another environment without activating it
+_TARGET_PYTHON = click.option(
+    "--python",
+    type=click.Path(path_type=Path, exists=True),
+    multiple=True,
+    help=(
+        "Installed mode: environment to audit instead of the current one — a venv/prefix, container rootfs, "
+        "site-packages dir or interpreter. Repeat to audit several environments in one run."
+    ),
+)
+_TARGET_SITE_PACKAGES = click.option(
+    "--site-packages",
+    type=click.Path(path_type=Path, exists=True, file_okay=False),
+    multiple=True,
+    help="Installed mode: site-packages directory to audit (can repeat).",
+)
+
+
+_OFFLINE = click.option(
+    "--offline",
+    is_flag=True,
+    default=False,
+    envvar="ANIMADAO_OFFLINE",
+    help="Never contact the index: answer from the local cache only (see `animadao cache import`).",
+)
+
+
+_POLICY = click.option(
+    "--policy",
+    type=click.Choice(POLICIES),
+    default=None,
+    help=(
+        "Version a pin is compared with: the index's latest, the newest final release, the newest within "
+        "its major version, or the newest whose requires-python admits target_python (default from config)."
+    ),
+)
+
+
+_INDEX_URL = click.option(
+    "--index-url",
+    "index_urls",
+    multiple=True,
+    help=(
+        "Package index to query instead of pypi.org (overrides [index].urls): a JSON API base such as "
+        "https://pypi.org/pypi or a Simple API base ending in /simple. Repeat for fallbacks, in order."
+    ),
+)
+
+
+def _reject_mixed_targets(site_packages: tuple[Path, ...]) -> None:
+    if site_packages:
+        raise click.UsageError("--site-packages describes a single environment; pass each one as --python instead.")
+
+
 @click.group(help="AnimaDao — dependency health checker.")
 def cli() -> None: ...
 
@@ -38,18 +101,50 @@ def cli() -> None: ...
     default=None,
     help="Source root to scan imports.",
 )
-def scan_cmd(project: Path, src: Path | None) -> None:
-    deps: list[Requirement] = load_declared_deps_any(project).requirements
-    imports = set(scan_imports([str(src or project)]))
-    click.echo(
-        json.dumps(
-            {
-                "declared": [r.name + (str(r.specifier) if str(r.specifier) else "") for r in deps],
-                "imports": sorted(imports),
-            },
-            indent=2,
-        )
-    )
+@click.option("--stats", "show_stats", is_flag=True, default=False, help="Include import-index statistics.")
+@click.option(
+    "--format",
+    "fmt",
+    type=click.Choice(["json", "ndjson"]),
+    default="json",
+    help="json: declared deps + import set; ndjson: stream one record per file and per import site.",
+)
+@click.option(
+    "--engine",
+    type=click.Choice(["auto", "native", "tokenize", "ast"]),
+    default=None,
+    help="Import scan engine (default: [core].engine, else auto).",
+)
+def scan_cmd(project: Path, src: Path | None, show_stats: bool, fmt: str, engine: str | None) -> None:
+    cfg = load_config(project)
+    if engine:
+        cfg = replace(cfg, engine=engine)
+    session = ScanSession.from_config(project, cfg, [src] if src else None)
+    if fmt == "ndjson":
+
+        def emit_file(file_id: int, path: Path) -> None:
+            click.echo(json.dumps({"type": "file", "id": file_id, "path": str(path)}))
+
+        for rec in session.iter_records(on_file=emit_file):
+            click.echo(
+                json.dumps(
+                    {"type": "import", "file": rec.file_id, "module": rec.module, "line": rec.lineno, "kind": rec.kind}
+                )
+            )
+        if show_stats:
+            stats = asdict(session.stats) if session.stats else {}
+            click.echo(json.dumps({"type": "stats", "engine": session.engine_used, **stats}))
+        return
+
+    deps: list[Requirement] = ProjectManifest.load(project).declared.requirements
+    out: dict[str, object] = {
+        "declared": [r.name + (str(r.specifier) if str(r.specifier) else "") for r in deps],
+        "imports": sorted(session.imports),
+        "engine": session.engine_used,
+    }
+    if show_stats:
+        out["stats"] = asdict(session.stats) if session.stats else None
+    click.echo(json.dumps(out, indent=2))
 
 
 @cli.command("check")
@@ -61,39 +156,80 @@ def scan_cmd(project: Path, src: Path | None) -> None:
 )
 @click.option(
     "--mode",
-    type=click.Choice(["declared", "installed"]),
+    type=click.Choice(["declared", "installed", "locked"]),
     default=None,
-    help="What to compare against PyPI.",
+    help="What to compare against PyPI (locked: packages pinned in uv.lock / poetry.lock / pylock.toml).",
 )
 @click.option("--ignore", multiple=True, help="Ignore packages (can repeat).")
 @click.option("--pypi-ttl", type=int, default=None, help="PyPI cache TTL seconds (default 86400).")
 @click.option("--pypi-concurrency", type=int, default=None, help="Parallel HTTP requests to PyPI (default 8).")
+@_TARGET_PYTHON
+@_TARGET_SITE_PACKAGES
+@_OFFLINE
+@_INDEX_URL
+@_POLICY
+@click.option(
+    "--stats", "show_stats", is_flag=True, default=False, help="Include index request statistics (retries, hedges)."
+)
 def check_cmd(
     project: Path,
     mode: str | None,
     ignore: tuple[str, ...],
     pypi_ttl: int | None,
     pypi_concurrency: int | None,
+    python: tuple[Path, ...],
+    site_packages: tuple[Path, ...],
+    offline: bool,
+    index_urls: tuple[str, ...],
+    policy: str | None,
+    show_stats: bool,
 ) -> None:
-    cfg = load_config(project).with_overrides(mode=mode, ignore=ignore, ttl=pypi_ttl, conc=pypi_concurrency)
+    cfg = load_config(project).with_overrides(
+        mode=mode,
+        ignore=ignore,
+        ttl=pypi_ttl,
+        conc=pypi_concurrency,
+        offline=offline or None,
+        index_urls=index_urls,
+        policy=policy,
+    )
 
-    checker = VersionChecker(ttl_seconds=cfg.pypi_ttl_seconds, concurrency=cfg.pypi_concurrency)
-    if cfg.mode == "declared":
-        declared = load_declared_deps_any(project).requirements
-        outdated, unpinned = checker.check_declared(declared)
-    else:
-        from importlib import metadata as im
+    ig = cfg.ignore_distributions or set()
+    with VersionChecker.from_config(cfg, project) as checker:
+        if cfg.mode == "installed" and len(python) > 1:
+            _reject_mixed_targets(site_packages)
+            installed_by_env = InstalledVersions.for_environments(python)
+            outdated_by_env = checker.check_installed_many(installed_by_env)
+            out = {**environment_matrix(installed_by_env, outdated_by_env, ig), "mode": cfg.mode}
+            if show_stats:
+                out["stats"] = checker.run_stats()
+            click.echo(json.dumps(out, indent=2))
+            checker.revalidate()
+            return
 
-        installed = {d.metadata["Name"]: d.version for d in im.distributions()}
-        outdated, unpinned = checker.check_installed(installed)
+        if cfg.mode == "declared":
+            declared = ProjectManifest.load(project).declared.requirements
+            outdated, unpinned = checker.check_declared(declared)
+        elif cfg.mode == "locked":
+            outdated, unpinned = checker.check_installed(ProjectManifest.load(project).locked)
+        else:
+            installed = InstalledVersions.for_target(python[0] if python else None, site_packages).versions
+            outdated, unpinned = checker.check_installed(installed)
 
-    ig = cfg.ignore_distributions or set()
-    out = {
-        "outdated": [o.__dict__ for o in outdated if o.name.lower() not in ig],
-        "unpinned": [u.__dict__ for u in unpinned if u.name.lower() not in ig],
-        "mode": cfg.mode,
-    }
-    click.echo(json.dumps(out, indent=2))
+        out = {
+            "outdated": [o.__dict__ for o in outdated if o.name.lower() not in ig],
+            "unpinned": [u.__dict__ for u in unpinned if u.name.lower() not in ig],
+            "mode": cfg.mode,
+        }
+        if cfg.version_policy != "latest":
+            out["policy"] = cfg.version_policy
+            out["yanked"] = [
+                {"name": n, "version": v} for n, v in sorted(checker.yanked.items()) if n.lower() not in ig
+            ]
+        if show_stats:
+            out["stats"] = checker.run_stats()
+        click.echo(json.dumps(out, indent=2))
+        checker.revalidate()
 
 
 @cli.command("unused")
@@ -116,25 +252,240 @@ def unused_cmd(project: Path, srcs: tuple[Path, ...], ignore: tuple[str, ...]) -
     """Report declared-but-not-imported distributions.
 
     - Accepts multiple ``--src`` occurrences; imports are unioned across roots.
-    - Falls back to the project root when ``--src`` is not provided.
+    - Falls back to ``[core].src`` from the config, then the project root, when ``--src`` is not provided.
     - Ignores packages listed via ``--ignore`` (case-insensitive).
     """
-    declared = load_declared_deps_any(project).requirements
-
-    # Determine roots to scan
-    roots: list[Path] = list(srcs) if srcs else [project]
+    cfg = load_config(project)
+    declared = ProjectManifest.load(project).declared.requirements
 
-    # Collect imports from all roots
-    imports = set(scan_imports([str(p) for p in roots]))
+    # Collect imports from all roots (overlapping roots are scanned once)
+    imports = ScanSession.from_config(project, cfg, srcs).imports
 
     # Apply ignore list and keep stable ordering
     ig = {s.lower() for s in ignore}
-    unused = [u for u in guess_unused(declared, imports) if u.lower() not in ig]
+    unused = [u for u in guess_unused(declared, imports, DistIndex.for_environment()) if u.lower() not in ig]
     unused = sorted(unused)
 
     click.echo(json.dumps({"unused": unused}, indent=2))
 
 
+@cli.command("why")
+@click.argument("name")
+@click.option(
+    "--project",
+    type=click.Path(path_type=Path, exists=True, file_okay=False),
+    default=Path("."),
+    help="Project root.",
+)
+@click.option(
+    "--src",
+    "srcs",
+    type=click.Path(path_type=Path, exists=True, file_okay=False),
+    multiple=True,
+    default=None,
+    help="Source roots (can repeat). If omitted, [core].src or the project root is used.",
+)
+@click.option("--rescan", is_flag=True, default=False, help="Rebuild the provenance index before answering.")
+def why_cmd(name: str, project: Path, srcs: tuple[Path, ...], rescan: bool) -> None:
+    """Show which files and lines import NAME (a top-level module or a distribution name).
+
+    Answers from the provenance index written by the last scan of the same roots; the tree is
+    scanned only when no index exists yet (or with ``--rescan``).
+    """
+    session = ScanSession.from_config(project, load_config(project), srcs)
+    prov: ProvenanceIndex | None = None
+    if not rescan:
+        try:
+            prov = ProvenanceIndex.load(session.provenance_path)
+        except (OSError, ValueError):
+            prov = None
+    if prov is None:
+        prov = session.build_provenance()
+
+    modules = [name] if prov.sites(name) else []
+    if not modules:
+        # not imported under that exact name: treat it as a distribution name
+        by_lower = {m.lower(): m for m in prov.modules}
+        modules = sorted(by_lower[c] for c in import_candidates(name, DistIndex.for_environment()) if c in by_lower)
+    sites = [site for m in modules for site in prov.sites(m)]
+    click.echo(
+        json.dumps(
+            {
+                "name": name,
+                "stdlib": is_stdlib(name),
+                "modules": modules,
+                "sites": [{"path": s.path, "line": s.lineno, "module": s.module} for s in sites],
+            },
+            indent=2,
+        )
+    )
+
+
+@cli.group("mapping")
+def mapping_group() -> None:
+    """Offline import-name mapping used when distributions are not installed."""
+
+
+@mapping_group.command("build")
+@click.option(
+    "--from",
+    "dump",
+    type=click.Path(path_type=Path, exists=True),
+    required=True,
+    help="Metadata dump: a site-packages-like directory or JSON lines with 'name' and 'imports'.",
+)
+@click.option(
+    "--out",
+    type=click.Path(path_type=Path, dir_okay=False),
+    default=None,
+    help="Output file (default: the user cache, which takes precedence over the bundled map).",
+)
+def mapping_build_cmd(dump: Path, out: Path | None) -> None:
+    """Rebuild the binary dist -> import-name map from a local metadata dump."""
+    target = out or user_map_path()
+    count = write_import_map(load_dump(dump), target)
+    default_import_map.cache_clear()
+    click.echo(json.dumps({"entries": count, "path": str(target)}, indent=2))
+
+
+@cli.group("cache")
+def cache_group() -> None:
+    """Local PyPI latest-version cache."""
+
+
+@cache_group.command("refresh")
+@click.argument("names", nargs=-1, required=True)
+@click.option(
+    "--project",
+    type=click.Path(path_type=Path, exists=True, file_okay=False),
+    default=Path("."),
+    help="Project root (for its PyPI settings).",
+)
+@_INDEX_URL
+def cache_refresh_cmd(names: tuple[str, ...], project: Path, index_urls: tuple[str, ...]) -> None:
+    """Re-query the index for NAMES regardless of cache age (run in the background after stale hits)."""
+    with VersionChecker.from_config(load_config(project).with_overrides(index_urls=index_urls)) as checker:
+        latest = checker.refresh(names)
+    click.echo(json.dumps({n: str(v) if v is not None else None for n, v in latest.items()}, indent=2))
+
+
+def _project_names(project: Path, mode: str, python: tuple[Path, ...], site_packages: tuple[Path, ...]) -> list[str]:
+    """Distribution names `check --mode <mode>` would look up."""
+    if mode == "declared":
+        return [r.name for r in ProjectManifest.load(project).declared.requirements]
+    if mode == "locked":
+        return list(ProjectManifest.load(project).locked)
+    if len(python) > 1:
+        _reject_mixed_targets(site_packages)
+        return [n for versions in InstalledVersions.for_environments(python).values() for n in versions]
+    return list(InstalledVersions.for_target(python[0] if python else None, site_packages).versions)
+
+
+@cache_group.command("warm")
+@click.option(
+    "--project",
+    type=click.Path(path_type=Path, exists=True, file_okay=False),
+    default=Path("."),
+    help="Project root.",
+)
+@click.option(
+    "--mode",
+    type=click.Choice(["declared", "installed", "locked"]),
+    default=None,
+    help="Which package set to fetch (default: the configured mode).",
+)
+@click.option("--force", is_flag=True, default=False, help="Re-query entries that are still fresh too.")
+@click.option("--pypi-concurrency", type=int, default=None, help="Parallel HTTP requests to PyPI (default 8).")
+@_TARGET_PYTHON
+@_TARGET_SITE_PACKAGES
+@_INDEX_URL
+def cache_warm_cmd(
+    project: Path,
+    mode: str | None,
+    force: bool,
+    pypi_concurrency: int | None,
+    python: tuple[Path, ...],
+    site_packages: tuple[Path, ...],
+    index_urls: tuple[str, ...],
+) -> None:
+    """Fetch latest versions for the project's packages in one concurrent pass."""
+    cfg = load_config(project).with_overrides(mode=mode, conc=pypi_concurrency, index_urls=index_urls)
+    if cfg.pypi_offline:
+        raise click.UsageError("cache warm needs the network; unset pypi_offline in the config.")
+    names = list(dict.fromkeys(_project_names(project, cfg.mode, python, site_packages)))
+    # expired entries must be fetched here, not served stale
+    with VersionChecker.from_config(replace(cfg, pypi_stale_seconds=0)) as checker:
+        latest = checker.refresh(names) if force else checker.get_latest_versions(names)
+        requests = checker.session.stats.requests
+    out = {
+        "mode": cfg.mode,
+        "packages": len(names),
+        "cached": sum(v is not None for v in latest.values()),
+        "not_found": sorted(n for n, v in latest.items() if v is None),
+        "requests": requests,
+    }
+    click.echo(json.dumps(out, indent=2))
+
+
+@cache_group.command("sync")
+@click.option(
+    "--project",
+    type=click.Path(path_type=Path, exists=True, file_okay=False),
+    default=Path("."),
+    help="Project root (for its PyPI settings).",
+)
+@click.option("--feed", default=PYPI_XMLRPC, show_default=True, help="XML-RPC endpoint with the changelog.")
+@click.option(
+    "--from-file",
+    "dump",
+    type=click.Path(path_type=Path, exists=True, dir_okay=False),
+    default=None,
+    help="Read change events from a local dump (JSON / JSON lines) instead of the feed.",
+)
+@click.option("--index-url", default=None, help="Sync the cache of this index instead of pypi.org's.")
+@click.option("--refresh/--no-refresh", default=True, help="Refetch the changed packages right away.")
+def cache_sync_cmd(project: Path, feed: str, dump: Path | None, index_url: str | None, refresh: bool) -> None:
+    """Apply the index changelog since the last sync: drop changed entries, keep the rest fresh."""
+    # the feed describes one index: pypi.org unless told otherwise, whatever [index].urls lists first
+    cfg = load_config(project).with_overrides(index_urls=[index_url or PYPI_JSON_BASE])
+    if cfg.pypi_offline and dump is None:
+        raise click.UsageError("syncing from the feed needs the network; use --from-file in offline mode.")
+    with VersionChecker.from_config(cfg) as checker:
+        result = sync_cache(checker.cache, session=checker.session, url=feed, dump=dump)
+        refreshed = checker.refresh(result.invalidated) if refresh and not cfg.pypi_offline else {}
+    out = {**asdict(result), "refreshed": sorted(n for n, v in refreshed.items() if v is not None)}
+    click.echo(json.dumps(out, indent=2))
+
+
+@cache_group.command("export")
+@click.argument("out", type=click.Path(path_type=Path, dir_okay=False))
+@click.option("--index-url", default=None, help="Export the cache of this index instead of pypi.org's.")
+def cache_export_cmd(out: Path, index_url: str | None) -> None:
+    """Write the whole PyPI cache to OUT (gzip JSON) for `cache import` elsewhere."""
+    cache = PyPICache(index_url=index_url)
+    try:
+        count = cache.export(out)
+    finally:
+        cache.close()
+    click.echo(json.dumps({"entries": count, "path": str(out)}, indent=2))
+
+
+@cache_group.command("import")
+@click.argument("artifact", type=click.Path(path_type=Path, exists=True, dir_okay=False))
+def cache_import_cmd(artifact: Path) -> None:
+    """Merge a `cache export` file into the local cache of its index (newer entries win)."""
+    try:
+        doc = read_export(artifact)
+        cache = PyPICache(index_url=doc.get("index"))
+        try:
+            count = cache.merge(doc)
+        finally:
+            cache.close()
+    except (OSError, ValueError) as exc:  # unreadable, truncated, foreign or malformed artifact
+        raise click.ClickException(str(exc)) from exc
+    click.echo(json.dumps({"entries": count, "path": str(artifact)}, indent=2))
+
+
 @cli.command("report")
 @click.option(
     "--project",
@@ -151,7 +502,7 @@ def unused_cmd(project: Path, srcs: tuple[Path, ...], ignore: tuple[str, ...]) -
     help="Source roots to scan imports (can repeat).",
 )
 @click.option("--out", type=click.Path(path_type=Path), default=None, help="Path to write report.")
-@click.option("--mode", type=click.Choice(["declared", "installed"]), default=None, help="Report mode.")
+@click.option("--mode", type=click.Choice(["declared", "installed", "locked"]), default=None, help="Report mode.")
 @click.option("--ignore", multiple=True, help="Ignore packages (can repeat).")
 @click.option(
     "--format",
@@ -162,6 +513,11 @@ def unused_cmd(project: Path, srcs: tuple[Path, ...], ignore: tuple[str, ...]) -
 )
 @click.option("--pypi-ttl", type=int, default=None, help="PyPI cache TTL seconds (default 86400).")
 @click.option("--pypi-concurrency", type=int, default=None, help="Parallel HTTP requests to PyPI (default 8).")
+@_TARGET_PYTHON
+@_TARGET_SITE_PACKAGES
+@_OFFLINE
+@_INDEX_URL
+@_POLICY
 def report_cmd(
     project: Path,
     srcs: tuple[Path, ...],
@@ -171,26 +527,43 @@ def report_cmd(
     fmt: str,
     pypi_ttl: int | None,
     pypi_concurrency: int | None,
+    python: tuple[Path, ...],
+    site_packages: tuple[Path, ...],
+    offline: bool,
+    index_urls: tuple[str, ...],
+    policy: str | None,
 ) -> None:
+    if len(python) > 1:
+        _reject_mixed_targets(site_packages)
     cfg = load_config(project).with_overrides(
         mode=mode,
         src=[str(p) for p in srcs] if srcs else None,
         ignore=ignore,
         ttl=pypi_ttl,
         conc=pypi_concurrency,
+        offline=offline or None,
+        index_urls=index_urls,
+        policy=policy,
     )
+    one_env = python[0] if len(python) == 1 else None
     try:
-        path = generate_report(
-            project_root=project,
-            src_roots=list(srcs) if srcs else None,
-            out_path=out,
-            mode=cfg.mode,
-            ignore=cfg.ignore_distributions or set(),
-            ttl_seconds=cfg.pypi_ttl_seconds,
-            concurrency=cfg.pypi_concurrency,
-            output_format=fmt,
-        )
-        click.echo(str(path))
+        with VersionChecker.from_config(cfg, project) as checker:
+            path = generate_report(
+                project_root=project,
+                out_path=out,
+                mode=cfg.mode,
+                ignore=cfg.ignore_distributions or set(),
+                ttl_seconds=cfg.pypi_ttl_seconds,
+                concurrency=cfg.pypi_concurrency,
+                output_format=fmt,
+                session=ScanSession.from_config(project, cfg, srcs),
+                manifest=ProjectManifest.load(project),
+                checker=checker,
+                site_dirs=target_site_dirs(one_env, site_packages) if one_env or site_packages else None,
+                environments=list(python) if len(python) > 1 else None,
+            )
+            click.echo(str(path))
+            checker.revalidate()
     except Exception as exc:
         click.echo(f"ERROR: {exc}", err=True)
         sys.exit(1)
@@ -1,9 +1,13 @@
 from __future__ import annotations
 
+import os
+import time
 from collections.abc import Iterable
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from pathlib import Path
 
+from animadao.walker import DEFAULT_MAX_FILE_SIZE, WalkOptions
+
 try:
     import tomllib as tomli  # 3.11+
 except Exception:  # 3.10
@@ -12,12 +16,32 @@ except Exception:  # 3.10
 
 @dataclass(frozen=True)
 class Config:
-    mode: str = "declared"  # declared | installed
+    mode: str = "declared"  # declared | installed | locked
     src: list[str] = None  # список путей; если None -> [project_root]
     ignore_distributions: set[str] = None  # lower-case имена дистрибутивов
     ignore_imports: set[str] = None  # lower-case имена импортов
     pypi_ttl_seconds: int = 86400  # кеш PyPI (по умолчанию сутки)
     pypi_concurrency: int = 8  # параллелизм запросов к PyPI
+    pypi_http2: bool = False  # HTTP/2 к индексу (нужен пакет h2: `anima-dao[http2]`)
+    pypi_retries: int = 3  # повторы при 429/5xx/сетевых ошибках (с jitter backoff)
+    pypi_rate_limit: float = 0.0  # запросов в секунду к индексу; 0 -> без лимита
+    pypi_api: str = "stream"  # stream | json | simple (PEP 691): как читать последнюю версию
+    pypi_stale_seconds: int = 0  # просроченные записи кеша отдаются сразу ещё столько секунд (0 -> ждать сеть)
+    pypi_revalidate: str = "background"  # background | end: когда обновлять отданные просроченные записи
+    pypi_negative_ttl: int = 3600  # сколько помнить 404 от индекса
+    pypi_offline: bool = False  # без сети: только локальный кеш (любой давности)
+    index_urls: list[str] = None  # [index].urls: индексы по порядку (JSON API или simple); None -> pypi.org
+    pypi_hedge_delay: float = 0.0  # сек. до дублирующего запроса в следующий индекс; 0 -> без hedging
+    version_policy: str = "latest"  # latest | final | major | python: с какой версией сравнивать пины
+    target_python: str = None  # для policy=python; None -> нижняя граница requires-python проекта
+    scan_workers: int = 0  # процессы для скана импортов (0 -> по числу CPU)
+    import_index: bool = True  # инкрементальный индекс импортов на диске
+    exclude: list[str] = None  # доп. glob-исключения для скана импортов
+    max_file_size: int = DEFAULT_MAX_FILE_SIZE  # файлы больше (байт) не сканируются; 0 -> без лимита
+    respect_gitignore: bool = True  # учитывать .gitignore при обходе
+    file_source: str = "walk"  # walk | git (список файлов из .git/index)
+    provenance: bool = True  # индекс "кто импортирует X" для `animadao why`
+    engine: str = "auto"  # auto | native | tokenize | ast
 
     def with_overrides(
         self,
@@ -26,21 +50,82 @@ class Config:
         ignore: Iterable[str] | None = None,
         ttl: int | None = None,
         conc: int | None = None,
+        offline: bool | None = None,
+        index_urls: Iterable[str] | None = None,
+        policy: str | None = None,
     ) -> Config:
-        return Config(
-            mode=mode or self.mode,
-            src=list(src) if src is not None else (self.src or []),
-            ignore_distributions=set(self.ignore_distributions or set())
+        """Copy with CLI overrides applied; `None` keeps the configured value (`ignore` adds to it)."""
+        overrides = {
+            "mode": mode or None,
+            "src": list(src) if src is not None else (self.src or []),
+            "ignore_distributions": set(self.ignore_distributions or set())
             | ({s.lower() for s in ignore} if ignore else set()),
-            ignore_imports=self.ignore_imports or set(),
-            pypi_ttl_seconds=ttl if ttl is not None else self.pypi_ttl_seconds,
-            pypi_concurrency=conc if conc is not None else self.pypi_concurrency,
+            "ignore_imports": self.ignore_imports or set(),
+            "pypi_ttl_seconds": ttl,
+            "pypi_concurrency": conc,
+            "pypi_offline": offline,
+            "index_urls": list(index_urls) if index_urls else None,
+            "version_policy": policy or None,
+        }
+        return replace(self, **{k: v for k, v in overrides.items() if v is not None})
+
+    def walk_options(self) -> WalkOptions:
+        """Pruning rules for the import-scan walker."""
+        return WalkOptions(
+            exclude=tuple(self.exclude or ()),
+            max_file_size=self.max_file_size,
+            gitignore=self.respect_gitignore,
         )
 
 
+def default_cache_dir() -> Path:
+    """Root of AnimaDao's on-disk caches: `$XDG_CACHE_HOME/animadao` (or `~/.cache/animadao`)."""
+    base = Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")).expanduser()
+    return base / "animadao"
+
+
+# Files modified this recently may change again within the same mtime tick: an unchanged mtime
+# proves nothing for them (config memo, `ImportIndex`), so they are re-read or verified by hash.
+RACY_WINDOW_NS = 2_000_000_000
+
+_TOML_MEMO: dict[str, tuple[int, int, dict]] = {}
+
+
+def file_fingerprint(path: Path | str) -> tuple[int, int] | None:
+    """`(mtime_ns, size)` of `path`, or None when it doesn't exist."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def is_settled(fingerprint: tuple[int, int] | None) -> bool:
+    """Whether a file with this fingerprint is old enough for its mtime to be trusted."""
+    return fingerprint is None or fingerprint[0] + RACY_WINDOW_NS < time.time_ns()
+
+
+def read_toml(path: Path | str) -> dict:
+    """
+    Parse a TOML file, memoized per process by path + mtime + size.
+
+    The returned dict is shared between callers and must not be mutated. Files touched within
+    the last `RACY_WINDOW_NS` are always re-parsed. Raises `OSError` / `TOMLDecodeError`.
+    """
+    key = os.path.abspath(path)
+    fp = file_fingerprint(key)
+    hit = _TOML_MEMO.get(key)
+    if hit is not None and fp is not None and hit[:2] == fp:
+        return hit[2]
+    data = tomli.loads(Path(key).read_text(encoding="utf-8"))
+    if fp is not None and is_settled(fp):
+        _TOML_MEMO[key] = (fp[0], fp[1], data)
+    return data
+
+
 def _load_one(path: Path) -> dict:
     try:
-        return tomli.loads(path.read_text(encoding="utf-8"))
+        return read_toml(path)
     except Exception:
         return {}
 
@@ -65,6 +150,7 @@ def load_config(project_root: Path) -> Config:
 
     core = data.get("core", {}) or {}
     ignore = data.get("ignore", {}) or {}
+    index = data.get("index", {}) or {}
 
     mode = str(core.get("mode", conf.mode))
     src = core.get("src")
@@ -74,15 +160,59 @@ def load_config(project_root: Path) -> Config:
 
     ttl = int(core.get("pypi_ttl_seconds", conf.pypi_ttl_seconds))
     conc = int(core.get("pypi_concurrency", conf.pypi_concurrency))
+    http2 = bool(core.get("pypi_http2", conf.pypi_http2))
+    retries = int(core.get("pypi_retries", conf.pypi_retries))
+    rate_limit = float(core.get("pypi_rate_limit", conf.pypi_rate_limit))
+    api = str(core.get("pypi_api", conf.pypi_api))
+    stale = int(core.get("pypi_stale_seconds", conf.pypi_stale_seconds))
+    revalidate = str(core.get("pypi_revalidate", conf.pypi_revalidate))
+    negative_ttl = int(core.get("pypi_negative_ttl", conf.pypi_negative_ttl))
+    offline = bool(core.get("pypi_offline", conf.pypi_offline))
+    urls = index.get("urls")
+    hedge_delay = float(index.get("hedge_delay", conf.pypi_hedge_delay))
+    if isinstance(urls, str):
+        urls = [urls]
+    policy = str(core.get("version_policy", conf.version_policy))
+    target_python = core.get("target_python", conf.target_python)
+    workers = int(core.get("scan_workers", conf.scan_workers))
+    use_index = bool(core.get("import_index", conf.import_index))
+    exclude = core.get("exclude")
+    if isinstance(exclude, str):
+        exclude = [exclude]
+    max_size = int(core.get("max_file_size", conf.max_file_size))
+    gitignore = bool(core.get("respect_gitignore", conf.respect_gitignore))
+    file_source = str(core.get("file_source", conf.file_source))
+    provenance = bool(core.get("provenance", conf.provenance))
+    engine = str(core.get("engine", conf.engine))
 
     ig_dist = {s.lower() for s in (ignore.get("distributions") or [])}
     ig_imp = {s.lower() for s in (ignore.get("imports") or [])}
 
     return Config(
-        mode=mode if mode in {"declared", "installed"} else "declared",
+        mode=mode if mode in {"declared", "installed", "locked"} else "declared",
         src=src_list or None,
         ignore_distributions=ig_dist or None,
         ignore_imports=ig_imp or None,
         pypi_ttl_seconds=ttl,
         pypi_concurrency=conc,
+        pypi_http2=http2,
+        pypi_retries=max(0, retries),
+        pypi_rate_limit=max(0.0, rate_limit),
+        pypi_api=api if api in {"stream", "json", "simple"} else "stream",
+        pypi_stale_seconds=max(0, stale),
+        pypi_revalidate=revalidate if revalidate in {"background", "end"} else "background",
+        pypi_negative_ttl=max(0, negative_ttl),
+        pypi_offline=offline,
+        index_urls=[str(u) for u in urls] if urls else None,
+        pypi_hedge_delay=max(0.0, hedge_delay),
+        version_policy=policy if policy in {"latest", "final", "major", "python"} else "latest",
+        target_python=str(target_python) if target_python else None,
+        scan_workers=max(0, workers),
+        import_index=use_index,
+        exclude=[str(g) for g in exclude] if exclude else None,
+        max_file_size=max(0, max_size),
+        respect_gitignore=gitignore,
+        file_source=file_source if file_source in {"walk", "git"} else "walk",
+        provenance=provenance,
+        engine=engine if engine in {"auto", "native", "tokenize", "ast"} else "auto",
     )
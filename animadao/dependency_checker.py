@@ -3,14 +3,17 @@ from __future__ import annotations
 from collections.abc import Iterable
 from dataclasses import dataclass
 from pathlib import Path
-
-try:
-    import tomllib as tomli  # Python 3.11+
-except Exception:
-    import tomli  # type: ignore
+from typing import TYPE_CHECKING
 
 from packaging.requirements import Requirement
 
+from animadao.config import read_toml
+from animadao.import_map import default_import_map
+from animadao.requirements_file import parse_requirement, requirements_from_file
+
+if TYPE_CHECKING:
+    from animadao.dist_index import DistIndex
+
 
 @dataclass(frozen=True)
 class DeclaredDeps:
@@ -26,22 +29,23 @@ def _normalize_dist_name(name: str) -> str:
 # ---------- PEP 621 (project) ----------
 
 
-def load_declared_deps(pyproject_path: Path) -> DeclaredDeps:
-    """Existing PEP 621 loader (kept for backward compatibility)."""
-    data = tomli.loads(pyproject_path.read_text(encoding="utf-8"))
+def _requirements(specs: Iterable[str]) -> list[Requirement]:
+    return [req for s in specs if (req := parse_requirement(s)) is not None]
+
+
+def pep621_requirements(data: dict) -> list[Requirement]:
+    """`[project].dependencies` + all optional-dependency groups of a parsed pyproject."""
     project = data.get("project", {}) or {}
     deps_raw: list[str] = list(project.get("dependencies") or [])
     opt = project.get("optional-dependencies") or {}
     for _extra, items in (opt or {}).items():
         deps_raw.extend(items or [])
+    return _requirements(deps_raw)
 
-    requirements: list[Requirement] = []
-    for s in deps_raw:
-        try:
-            requirements.append(Requirement(s))
-        except Exception:
-            continue
-    return DeclaredDeps(requirements=requirements)
+
+def load_declared_deps(pyproject_path: Path) -> DeclaredDeps:
+    """Existing PEP 621 loader (kept for backward compatibility)."""
+    return DeclaredDeps(requirements=pep621_requirements(read_toml(pyproject_path)))
 
 
 # ---------- Poetry ([tool.poetry.dependencies]) ----------
@@ -101,8 +105,8 @@ def _prepend_spec(spec: str) -> str:
     return f"{spec}" if spec.startswith((">", "<", "=", "!")) else f"=={spec}"
 
 
-def load_poetry_deps(pyproject_path: Path) -> DeclaredDeps:
-    data = tomli.loads(pyproject_path.read_text(encoding="utf-8"))
+def poetry_requirements(data: dict) -> list[Requirement]:
+    """`[tool.poetry.dependencies]` of a parsed pyproject (the `python` constraint is skipped)."""
     tool = data.get("tool", {}) or {}
     poetry = tool.get("poetry", {}) or {}
     deps = poetry.get("dependencies") or {}
@@ -111,51 +115,23 @@ def load_poetry_deps(pyproject_path: Path) -> DeclaredDeps:
         if name.lower() == "python":
             continue
         try:
-            req_str = _poetry_value_to_req(name, val)
-            requirements.append(Requirement(req_str))
+            req = parse_requirement(_poetry_value_to_req(name, val))
         except Exception:
             continue
-    return DeclaredDeps(requirements=requirements)
+        if req is not None:
+            requirements.append(req)
+    return requirements
 
 
-# ---------- requirements.txt ----------
+def load_poetry_deps(pyproject_path: Path) -> DeclaredDeps:
+    return DeclaredDeps(requirements=poetry_requirements(read_toml(pyproject_path)))
 
 
-def _parse_requirements_file(path: Path, seen: set[Path] | None = None, depth: int = 0) -> list[str]:
-    if seen is None:
-        seen = set()
-    if depth > 3:
-        return []
-    try:
-        text = path.read_text(encoding="utf-8")
-    except Exception:
-        return []
-    seen.add(path.resolve())
-    out: list[str] = []
-    for raw in text.splitlines():
-        line = raw.strip()
-        if not line or line.startswith("#"):
-            continue
-        if line.startswith("-r ") or line.startswith("--requirement "):
-            ref = line.split(maxsplit=1)[1].strip()
-            sub = (path.parent / ref).resolve()
-            if sub not in seen:
-                out.extend(_parse_requirements_file(sub, seen, depth + 1))
-            continue
-        out.append(line)
-    return out
+# ---------- requirements.txt ----------
 
 
 def load_requirements_txt(project_root: Path) -> DeclaredDeps:
-    req_file = project_root / "requirements.txt"
-    specs = _parse_requirements_file(req_file)
-    requirements: list[Requirement] = []
-    for s in specs:
-        try:
-            requirements.append(Requirement(s))
-        except Exception:
-            continue
-    return DeclaredDeps(requirements=requirements)
+    return DeclaredDeps(requirements=requirements_from_file(project_root / "requirements.txt"))
 
 
 # ---------- Универсальный лоадер ----------
@@ -167,29 +143,37 @@ def load_declared_deps_any(project_root: Path) -> DeclaredDeps:
       1) pyproject.toml [project] (PEP 621)
       2) pyproject.toml [tool.poetry.dependencies]
       3) requirements.txt
+
+    Served from the memoized `ProjectManifest` of `project_root`.
+    """
+    from animadao.manifest import ProjectManifest
+
+    return ProjectManifest.load(project_root).declared
+
+
+def import_candidates(dist_name: str, dists: DistIndex | None = None) -> set[str]:
+    """
+    Lower-case import names a distribution is likely to provide.
+
+    Installed metadata (`dists`) is authoritative when it knows the distribution; otherwise the
+    bundled offline map covers well-known mismatches (`PyYAML` -> `yaml`, `Pillow` -> `PIL`).
+    The normalized distribution name is always a candidate.
     """
-    pyproject = project_root / "pyproject.toml"
-    if pyproject.is_file():
-        data = tomli.loads(pyproject.read_text(encoding="utf-8"))
-        if "project" in data:
-            return load_declared_deps(pyproject)
-        if "tool" in data and "poetry" in (data.get("tool") or {}):
-            return load_poetry_deps(pyproject)
-    req = project_root / "requirements.txt"
-    if req.is_file():
-        return load_requirements_txt(project_root)
-    raise FileNotFoundError("No dependencies source found (pyproject or requirements.txt)")
-
-
-def guess_unused(requirements: Iterable[Requirement], imported: Iterable[str]) -> list[str]:
+    candidates = {_normalize_dist_name(dist_name)}
+    known = dists.imports_for(dist_name) if dists is not None else ()
+    if not known:
+        known = default_import_map().imports_for(dist_name)
+    candidates.update(t.lower() for t in known)
+    return candidates
+
+
+def guess_unused(
+    requirements: Iterable[Requirement], imported: Iterable[str], dists: DistIndex | None = None
+) -> list[str]:
+    """Declared distributions none of whose import names (see `import_candidates`) are imported."""
     imported_set = {name.lower() for name in imported}
     unused: list[str] = []
     for req in requirements:
-        name = req.name
-        norm = _normalize_dist_name(name)
-        candidates = {norm}
-        if name.lower() in {"beautifulsoup4", "bs4"}:
-            candidates.update({"bs4", "beautifulsoup4"})
-        if imported_set.isdisjoint(candidates):
-            unused.append(name)
+        if imported_set.isdisjoint(import_candidates(req.name, dists)):
+            unused.append(req.name)
     return sorted(unused)
@@ -0,0 +1,349 @@
+from __future__ import annotations
+
+import glob
+import json
+import os
+import subprocess
+import sys
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import suppress
+from pathlib import Path
+
+from packaging.utils import canonicalize_name
+
+from animadao.config import default_cache_dir
+
+# RECORD entries that are install plumbing rather than importable top-level names
+_RECORD_SKIP_SUFFIXES = (".dist-info", ".data", ".pth", ".egg-info")
+
+
+def _has_dists(path: str) -> bool:
+    try:
+        with os.scandir(path) as it:
+            return any(e.name.endswith((".dist-info", ".egg-info")) for e in it)
+    except OSError:
+        return False
+
+
+def environment_site_dirs() -> list[Path]:
+    """
+    Directories on the running interpreter's `sys.path` that hold distributions: `site-packages` /
+    `dist-packages`, plus any other entry with `*.dist-info` / `*.egg-info` in it (`PYTHONPATH`,
+    `pip install --target`, `.pth`-added paths), the same places `importlib.metadata` searches.
+    """
+    out: list[Path] = []
+    for entry in sys.path:
+        p = entry or "."  # the current directory, as for imports
+        if not os.path.isdir(p):
+            continue
+        if os.path.basename(p) in ("site-packages", "dist-packages") or _has_dists(p):
+            path = Path(os.path.realpath(p))
+            if path not in out:
+                out.append(path)
+    return out
+
+
+# where site directories live under a venv / prefix / container rootfs
+_SITE_GLOBS = (
+    "lib*/python*/site-packages",
+    "Lib/site-packages",
+    "usr/lib*/python*/*-packages",
+    "usr/local/lib*/python*/*-packages",
+)
+
+
+def site_dirs_for(python: Path | str) -> list[Path]:
+    """
+    Site directories of another environment, without activating it.
+
+    `python` is a site-packages directory, a venv / prefix / container rootfs, or an interpreter
+    inside one. Known layouts are found on disk; for anything else the interpreter is asked once
+    for `site.getsitepackages()`.
+    """
+    target = Path(python)
+    if target.is_dir() and target.name in ("site-packages", "dist-packages"):
+        return _unique([target])
+    prefix = target.parent.parent if target.is_file() else target
+    found = sorted(p for pattern in _SITE_GLOBS for p in glob.glob(os.path.join(prefix, pattern)) if os.path.isdir(p))
+    if found:
+        return _unique(Path(p) for p in found)
+    if not target.is_file():
+        return []
+    code = "import json, site; print(json.dumps(site.getsitepackages()))"
+    try:
+        out = subprocess.run([str(target), "-c", code], capture_output=True, text=True, timeout=30, check=True).stdout
+        return _unique(Path(p) for p in json.loads(out) if os.path.isdir(p))
+    except (OSError, subprocess.SubprocessError, ValueError):
+        return []
+
+
+def target_site_dirs(python: Path | str | None = None, site_packages: Iterable[Path | str] = ()) -> list[Path]:
+    """Explicit `site_packages` dirs plus those of `python`; the running interpreter's when neither is given."""
+    dirs = [Path(d) for d in site_packages]
+    if python is not None:
+        dirs += site_dirs_for(python)
+    return _unique(dirs) if dirs or python is not None else environment_site_dirs()
+
+
+def _unique(paths: Iterable[Path]) -> list[Path]:
+    out: list[Path] = []
+    for p in paths:
+        real = Path(os.path.realpath(p))
+        if real not in out:
+            out.append(real)
+    return out
+
+
+def _dist_name(entry: str) -> str:
+    # "scikit_learn-1.3.2.dist-info" / "PyYAML-6.0-py3.11.egg-info" -> canonical project name
+    stem = entry.rsplit(".", 1)[0]
+    return canonicalize_name(stem.split("-", 1)[0])
+
+
+def _read_lines(path: str) -> list[str] | None:
+    try:
+        with open(path, encoding="utf-8", errors="replace") as fh:
+            return fh.read().splitlines()
+    except OSError:
+        return None
+
+
+def _record_tops(lines: Iterable[str]) -> set[str]:
+    """Top-level importable names from RECORD rows (`path,hash,size`), as `packages_distributions()` does."""
+    tops: set[str] = set()
+    for row in lines:
+        path = row.split(",", 1)[0]
+        first, sep, _rest = path.partition("/")
+        if not first or first.startswith((".", "__editable__", "__pycache__")) or first.endswith(_RECORD_SKIP_SUFFIXES):
+            continue
+        if sep:
+            if first.isidentifier():
+                tops.add(first)  # package dir (regular or namespace)
+        elif first.endswith(".py"):
+            tops.add(first[:-3])
+        elif first.endswith((".so", ".pyd")):
+            tops.add(first.split(".", 1)[0])  # extension module: "_cffi_backend.cpython-311-x86_64-linux-gnu.so"
+    return tops
+
+
+def _header_name_version(path: str) -> tuple[str | None, str | None]:
+    """`Name` / `Version` from the header block of METADATA / PKG-INFO; stops as soon as both are seen."""
+    name = version = None
+    try:
+        with open(path, encoding="utf-8", errors="replace") as fh:
+            for line in fh:
+                if not line.strip():
+                    break  # end of headers; the description body follows
+                key, sep, value = line.partition(":")
+                if not sep:
+                    continue
+                key = key.lower()
+                if key == "name":
+                    name = value.strip()
+                elif key == "version":
+                    version = value.strip()
+                if name and version:
+                    break
+    except OSError:
+        pass
+    return name, version
+
+
+def _name_version(site_dir: str, entry: str) -> tuple[str, str] | None:
+    """Installed `(name, version)` of one `*.dist-info` / `*.egg-info` entry."""
+    base = os.path.join(site_dir, entry)
+    if entry.endswith(".dist-info"):
+        name, version = _header_name_version(os.path.join(base, "METADATA"))
+    elif os.path.isdir(base):
+        name, version = _header_name_version(os.path.join(base, "PKG-INFO"))
+    else:
+        name, version = _header_name_version(base)  # single-file egg-info is the PKG-INFO itself
+    if not (name and version):
+        # "scikit_learn-1.4.0.dist-info" / "PyYAML-6.0-py3.11.egg-info"
+        parts = entry.rsplit(".", 1)[0].split("-")
+        if len(parts) < 2:
+            return None
+        name, version = name or parts[0], version or parts[1]
+    return name, version
+
+
+def site_dir_versions(site_dir: str) -> dict[str, str]:
+    """Installed distribution name (as in its metadata) -> version, for one site directory."""
+    out: dict[str, str] = {}
+    try:
+        with os.scandir(site_dir) as it:
+            entries = sorted(e.name for e in it if e.name.endswith((".dist-info", ".egg-info")))
+    except OSError:
+        return {}
+    for entry in entries:
+        nv = _name_version(site_dir, entry)
+        if nv is not None:
+            out.setdefault(nv[0], nv[1])
+    return out
+
+
+def _load_per_dir(
+    cache_path: Path, version: int, site_dirs: Iterable[str], scan: Callable[[str], dict], workers: int = 1
+) -> tuple[list[tuple[str, dict]], list[str]]:
+    """
+    `[(dir, scan(dir))]` for the existing `site_dirs`, reusing `cache_path` entries whose directory
+    mtime is unchanged; returns them with the directories that had to be re-read (scanned on up to
+    `workers` threads).
+    """
+    try:
+        cached = json.loads(cache_path.read_text(encoding="utf-8"))
+        dirs = cached["dirs"] if cached.get("version") == version else {}
+    except Exception:
+        dirs = {}
+
+    present: list[str] = []
+    stale: dict[str, int] = {}
+    for d in site_dirs:
+        try:
+            mtime_ns = os.stat(d).st_mtime_ns
+        except OSError:
+            continue
+        present.append(d)
+        entry = dirs.get(d)
+        if entry is None or entry.get("mtime_ns") != mtime_ns:
+            stale[d] = mtime_ns
+
+    rebuilt = list(stale)
+    if len(rebuilt) > 1 and workers > 1:
+        with ThreadPoolExecutor(max_workers=min(workers, len(rebuilt))) as pool:
+            scanned = list(pool.map(scan, rebuilt))
+    else:
+        scanned = [scan(d) for d in rebuilt]
+    for d, dists in zip(rebuilt, scanned, strict=True):
+        dirs[d] = {"mtime_ns": stale[d], "dists": dists}
+    out = [(d, dirs[d]["dists"]) for d in present]
+
+    if rebuilt:
+        with suppress(OSError):
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = cache_path.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_text(json.dumps({"version": version, "dirs": dirs}), encoding="utf-8")
+            os.replace(tmp, cache_path)
+    return out, rebuilt
+
+
+def site_dir_imports(site_dir: str) -> dict[str, list[str]]:
+    """Canonical dist name -> sorted top-level import names, for one site directory."""
+    dists: dict[str, set[str]] = {}
+    try:
+        with os.scandir(site_dir) as it:
+            entries = [e.name for e in it if e.name.endswith((".dist-info", ".egg-info"))]
+    except OSError:
+        return {}
+    for entry in entries:
+        base = os.path.join(site_dir, entry)
+        tops = _read_lines(os.path.join(base, "top_level.txt"))
+        if tops is not None:
+            names = {t.strip().split("/", 1)[0] for t in tops if t.strip()}
+        else:
+            record = _read_lines(os.path.join(base, "RECORD"))
+            names = _record_tops(record) if record else set()
+        if names:
+            dists.setdefault(_dist_name(entry), set()).update(names)
+    return {name: sorted(tops) for name, tops in dists.items()}
+
+
+class DistIndex:
+    """
+    Persistent `distribution -> import names` map for one or more site-packages directories.
+
+    Built from each dist's `top_level.txt`, else its `RECORD` (the same sources as
+    `importlib.metadata.packages_distributions()`), but per directory, so a cached directory is
+    only re-read when its mtime changes (i.e. something was installed or removed there).
+    Lookups are plain dict hits.
+    """
+
+    VERSION = 1
+
+    def __init__(self, site_dirs: Iterable[Path | str], cache_path: Path | None = None) -> None:
+        self.site_dirs = [str(d) for d in site_dirs]
+        self.cache_path = cache_path or (default_cache_dir() / "dists.json")
+        self.rebuilt: list[str] = []  # directories re-read during this load
+        self._by_dist: dict[str, frozenset[str]] = {}
+        self._load()
+
+    @classmethod
+    def for_environment(cls, site_dirs: Iterable[Path | str] | None = None) -> DistIndex:
+        """Index over `site_dirs`, defaulting to the running interpreter's site directories."""
+        return cls(environment_site_dirs() if site_dirs is None else site_dirs)
+
+    def _load(self) -> None:
+        per_dir, self.rebuilt = _load_per_dir(self.cache_path, self.VERSION, self.site_dirs, site_dir_imports)
+        for _d, dists in per_dir:
+            for name, tops in dists.items():
+                # first directory on the path wins, as for imports
+                self._by_dist.setdefault(name, frozenset(tops))
+
+    def imports_for(self, dist_name: str) -> frozenset[str]:
+        """Top-level import names an installed distribution provides (empty when not installed)."""
+        return self._by_dist.get(canonicalize_name(dist_name), frozenset())
+
+    def __len__(self) -> int:
+        return len(self._by_dist)
+
+
+class InstalledVersions:
+    """
+    `name -> version` of the distributions installed in one environment's site directories.
+
+    Only the `Name` / `Version` headers of each `METADATA` / `PKG-INFO` are read (falling back to
+    the `*.dist-info` directory name), and results are cached per directory mtime next to
+    `DistIndex`'s, so an unchanged environment costs one `stat` per site directory.
+    """
+
+    VERSION = 1
+
+    def __init__(self, site_dirs: Iterable[Path | str], cache_path: Path | None = None) -> None:
+        self.site_dirs = [str(d) for d in site_dirs]
+        self.cache_path = cache_path or (default_cache_dir() / "installed.json")
+        per_dir, self.rebuilt = _load_per_dir(self.cache_path, self.VERSION, self.site_dirs, site_dir_versions)
+        self.versions = _first_wins(dists for _d, dists in per_dir)
+
+    @classmethod
+    def for_target(
+        cls, python: Path | str | None = None, site_packages: Iterable[Path | str] = ()
+    ) -> InstalledVersions:
+        """Versions in `site_packages` / `python`'s environment, else the running interpreter's."""
+        return cls(target_site_dirs(python, site_packages))
+
+    @classmethod
+    def for_environments(
+        cls, targets: Iterable[Path | str], cache_path: Path | None = None, workers: int = 8
+    ) -> dict[str, dict[str, str]]:
+        """
+        `{target: {name: version}}` for many environments (see `site_dirs_for`) in one pass.
+
+        Targets are resolved and their stale site directories scanned on up to `workers` threads;
+        the cache file is read and written once for all of them.
+        """
+        targets = [str(t) for t in targets]
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(targets) or 1))) as pool:
+            dirs_of = dict(zip(targets, pool.map(site_dirs_for, targets), strict=True))
+        all_dirs = list(dict.fromkeys(str(d) for dirs in dirs_of.values() for d in dirs))
+        per_dir, _rebuilt = _load_per_dir(
+            cache_path or (default_cache_dir() / "installed.json"), cls.VERSION, all_dirs, site_dir_versions, workers
+        )
+        by_dir = dict(per_dir)
+        return {t: _first_wins(by_dir.get(str(d), {}) for d in dirs) for t, dirs in dirs_of.items()}
+
+    def __len__(self) -> int:
+        return len(self.versions)
+
+
+def _first_wins(per_dir: Iterable[dict[str, str]]) -> dict[str, str]:
+    """Merge per-directory `{name: version}` maps; the first directory on the path wins."""
+    out: dict[str, str] = {}
+    seen: set[str] = set()
+    for dists in per_dir:
+        for name, version in dists.items():
+            key = canonicalize_name(name)
+            if key not in seen:
+                seen.add(key)
+                out[name] = version
+    return out
@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import os
+import struct
+from dataclasses import dataclass
+from fnmatch import fnmatchcase
+from pathlib import Path
+
+from animadao.walker import WalkOptions, is_build_output
+
+_HEADER = struct.Struct(">4sII")
+# ctime s/ns, mtime s/ns, dev, ino, mode, uid, gid, size, sha1, flags
+_ENTRY = struct.Struct(">10I20sH")
+
+_S_IFMT = 0o170000
+_S_IFREG = 0o100000
+_S_IFLNK = 0o120000
+
+_FLAG_EXTENDED = 0x4000
+_XFLAG_SKIP_WORKTREE = 0x4000
+
+
+class GitIndexError(ValueError):
+    """The index file is missing, unsupported or corrupt."""
+
+
+@dataclass(frozen=True)
+class GitIndexEntry:
+    """One stage-0 entry of `.git/index`, with the stat data git recorded at its last refresh."""
+
+    path: str  # posix, relative to the worktree top
+    mtime_ns: int
+    size: int
+    mode: int
+
+
+def find_worktree(start: Path | str) -> Path | None:
+    """Closest directory at or above `start` that holds a `.git` dir or file."""
+    cur = Path(os.path.abspath(start))
+    if cur.is_file():
+        cur = cur.parent
+    for d in (cur, *cur.parents):
+        if (d / ".git").exists():
+            return d
+    return None
+
+
+def _git_dir(worktree: Path) -> Path:
+    dot_git = worktree / ".git"
+    if dot_git.is_file():
+        # linked worktrees / submodules: ".git" is a file with "gitdir: <path>"
+        text = dot_git.read_text(encoding="utf-8", errors="replace").strip()
+        if not text.startswith("gitdir:"):
+            raise GitIndexError(f"unrecognized .git file: {dot_git}")
+        gd = Path(text.split(":", 1)[1].strip())
+        return gd if gd.is_absolute() else (worktree / gd).resolve()
+    return dot_git
+
+
+def _read_varint(data: bytes, pos: int) -> tuple[int, int]:
+    # git's offset varint (used by index v4 path compression)
+    c = data[pos]
+    pos += 1
+    val = c & 0x7F
+    while c & 0x80:
+        c = data[pos]
+        pos += 1
+        val = ((val + 1) << 7) | (c & 0x7F)
+    return val, pos
+
+
+def parse_index(data: bytes) -> list[GitIndexEntry]:
+    """
+    Parse an index file (versions 2-4) into stage-0 entries for regular files and symlinks.
+
+    Conflicted (stage > 0), skip-worktree, gitlink and sparse-directory entries are left out.
+    Split indexes (`link` extension) are rejected, since their entries are incomplete on their own.
+    """
+    if len(data) < _HEADER.size + 20:
+        raise GitIndexError("index too short")
+    sig, version, count = _HEADER.unpack_from(data, 0)
+    if sig != b"DIRC" or version not in (2, 3, 4):
+        raise GitIndexError(f"unsupported index signature/version: {sig!r} v{version}")
+
+    entries: list[GitIndexEntry] = []
+    pos = _HEADER.size
+    prev_path = b""
+    end = len(data) - 20  # trailing checksum
+    for _ in range(count):
+        if pos + _ENTRY.size > end:
+            raise GitIndexError("truncated index entry")
+        f = _ENTRY.unpack_from(data, pos)
+        entry_start = pos
+        pos += _ENTRY.size
+        flags = f[11]
+        xflags = 0
+        if version >= 3 and flags & _FLAG_EXTENDED:
+            (xflags,) = struct.unpack_from(">H", data, pos)
+            pos += 2
+        if version == 4:
+            strip, pos = _read_varint(data, pos)
+            nul = data.index(b"\0", pos)
+            path = prev_path[: len(prev_path) - strip] + data[pos:nul]
+            pos = nul + 1
+        else:
+            nul = data.index(b"\0", pos)
+            path = data[pos:nul]
+            # entries are NUL-padded to a multiple of 8 bytes
+            pos = entry_start + ((nul - entry_start + 8) & ~7)
+        prev_path = path
+
+        mode = f[6]
+        stage = (flags >> 12) & 0x3
+        if stage or xflags & _XFLAG_SKIP_WORKTREE or (mode & _S_IFMT) not in (_S_IFREG, _S_IFLNK):
+            continue
+        entries.append(
+            GitIndexEntry(
+                path=path.decode("utf-8", errors="surrogateescape"),
+                mtime_ns=f[2] * 1_000_000_000 + f[3],
+                size=f[9],
+                mode=mode,
+            )
+        )
+
+    # extensions: 4-byte signature + 4-byte size, until the checksum
+    while pos + 8 <= end:
+        sig, size = struct.unpack_from(">4sI", data, pos)
+        if sig == b"link":
+            raise GitIndexError("split index is not supported")
+        pos += 8 + size
+    return entries
+
+
+def read_index(worktree: Path) -> list[GitIndexEntry]:
+    """Entries of the worktree's index; raises `GitIndexError` when it can't be used."""
+    try:
+        data = (_git_dir(worktree) / "index").read_bytes()
+    except OSError as exc:
+        raise GitIndexError(str(exc)) from exc
+    return parse_index(data)
+
+
+def tracked_python_files(root: Path | str, options: WalkOptions | None = None) -> list[Path] | None:
+    """
+    Tracked `*.py` files under `root`, read from the git index without a `git` subprocess.
+
+    The index only says which files are tracked: its recorded `(mtime_ns, size)` predates any
+    unstaged edit, so the size cap is checked against the worktree file (as git itself re-stats
+    it) and files deleted from the worktree are skipped. `options` prune dirs and exclude globs
+    still apply; `.gitignore` does not (tracked files are wanted by definition).
+    Returns None when `root` is not inside a usable git worktree, so callers can fall back to walking.
+    """
+    opts = options or WalkOptions()
+    worktree = find_worktree(root)
+    if worktree is None or os.path.isfile(root):
+        return None
+    try:
+        entries = read_index(worktree)
+    except (GitIndexError, ValueError, IndexError, struct.error):
+        return None
+
+    root_abs = Path(os.path.abspath(root))
+    prefix = root_abs.relative_to(worktree).as_posix()
+    prefix = "" if prefix == "." else prefix + "/"
+    globs = tuple(g.rstrip("/") for g in opts.exclude)
+
+    out: list[Path] = []
+    for e in entries:
+        if not e.path.endswith(".py") or not e.path.startswith(prefix):
+            continue
+        rel = e.path[len(prefix) :]
+        parts = rel.split("/")
+        if any(p in opts.prune_dirs or p.endswith(".egg-info") for p in parts[:-1]):
+            continue
+        if any(
+            p in opts.output_dirs and is_build_output(os.path.join(root_abs, *parts[: i + 1]), opts)
+            for i, p in enumerate(parts[:-1])
+        ):
+            continue
+        if globs and any(
+            fnmatchcase("/".join(parts[: i + 1]), g) or fnmatchcase(parts[i], g)
+            for g in globs
+            for i in range(len(parts))
+        ):
+            continue
+        path = worktree / e.path
+        try:
+            size = os.stat(path).st_size
+        except OSError:
+            continue  # deleted (or unreadable) in the worktree
+        if opts.max_file_size and size > opts.max_file_size:
+            continue
+        out.append(path)
+    return out
@@ -0,0 +1,283 @@
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import random
+import threading
+import time
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass
+
+import httpx
+
+# responses worth another try; anything else (incl. 404) is a definitive answer
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of sending a request while the circuit breaker is open."""
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Bounded retries with "full jitter" exponential backoff: sleep U(0, min(cap, base * 2**attempt))."""
+
+    retries: int = 3
+    backoff: float = 0.25
+    max_backoff: float = 8.0
+
+    def delay(self, attempt: int, retry_after: str | None = None) -> float:
+        if retry_after:
+            try:
+                return min(self.max_backoff, max(0.0, float(retry_after)))
+            except ValueError:
+                pass  # HTTP-date form: fall back to our own schedule
+        return random.uniform(0.0, min(self.max_backoff, self.backoff * (2**attempt)))
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: `rate` requests per second on average, bursts of up to `burst`.
+
+    `reserve()` takes a token and returns how long the caller must wait for it, so sync and async
+    callers can share one bucket. A `rate` of 0 disables limiting.
+    """
+
+    def __init__(self, rate: float, burst: int | None = None, clock: Callable[[], float] = time.monotonic) -> None:
+        self.rate = max(0.0, float(rate))
+        self.burst = float(burst if burst is not None else max(1, int(self.rate)))
+        self._clock = clock
+        self._tokens = self.burst
+        self._stamp = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+            self._stamp = now
+            self._tokens -= 1.0  # may go negative: later callers queue behind this one
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+
+class CircuitBreaker:
+    """
+    Opens after `threshold` consecutive failures; while open, requests are refused so callers fall
+    back to cached data. After `reset_after` seconds one probe request is let through (half-open):
+    success closes the circuit, failure re-opens it.
+    """
+
+    def __init__(self, threshold: int = 5, reset_after: float = 30.0, clock: Callable[[], float] = time.monotonic):
+        self.threshold = max(1, int(threshold))
+        self.reset_after = reset_after
+        self._clock = clock
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """`"closed"`, `"open"` or `"half-open"`."""
+        if self._opened_at is None:
+            return "closed"
+        return "half-open" if self._clock() - self._opened_at >= self.reset_after else "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.threshold:
+                self._opened_at = self._clock()
+            self._probing = False
+
+
+@dataclass
+class SessionStats:
+    requests: int = 0  # attempts actually sent
+    retries: int = 0
+    refused: int = 0  # short-circuited by the breaker
+    bytes_received: int = 0  # response bytes read off the wire (compressed), see VersionChecker
+    hedged: int = 0  # lookups duplicated to the next index after `hedge_delay`, see VersionChecker
+    hedge_wins: int = 0  # ... of which the duplicate answered first
+
+
+class HttpSession:
+    """
+    Long-lived HTTP layer for index lookups.
+
+    - one pooled, keep-alive `httpx.Client` for sync calls (HTTP/2 when asked for and `h2` is
+      installed); `async_client()` builds the async counterpart for a batch
+    - `RetryPolicy` retries on transport errors and `RETRY_STATUSES`, honouring `Retry-After`
+    - a shared `TokenBucket` paces every attempt, sync or async
+    - a `CircuitBreaker` refuses requests (`CircuitOpenError`) after repeated failures; requests
+      tagged with an `index` get one breaker per index (`breaker_for`), so a dead mirror doesn't
+      cut off the indexes behind it. `breaker` serves untagged requests and is the template
+      (threshold, cool-down, clock) for the per-index ones.
+    """
+
+    def __init__(
+        self,
+        *,
+        concurrency: int = 8,
+        timeout: float = 10.0,
+        http2: bool = False,
+        retry: RetryPolicy | None = None,
+        rate_limit: float = 0.0,
+        breaker: CircuitBreaker | None = None,
+        transport: httpx.BaseTransport | httpx.AsyncBaseTransport | None = None,
+    ) -> None:
+        self.concurrency = max(1, int(concurrency))
+        self.timeout = timeout
+        self.http2 = bool(http2) and importlib.util.find_spec("h2") is not None
+        self.retry = retry or RetryPolicy()
+        self.bucket = TokenBucket(rate_limit, burst=self.concurrency)
+        self.breaker = breaker or CircuitBreaker()
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self._breakers_lock = threading.Lock()
+        self.transport = transport
+        self.stats = SessionStats()
+        self._client: httpx.Client | None = None
+
+    def _limits(self) -> httpx.Limits:
+        return httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+
+    @property
+    def client(self) -> httpx.Client:
+        if self._client is None:
+            self._client = httpx.Client(
+                timeout=self.timeout, limits=self._limits(), http2=self.http2, transport=self.transport
+            )
+        return self._client
+
+    def async_client(self) -> httpx.AsyncClient:
+        """A pooled async client; bound to the running event loop, so one per batch."""
+        return httpx.AsyncClient(
+            timeout=self.timeout, limits=self._limits(), http2=self.http2, transport=self.transport
+        )
+
+    def close(self) -> None:
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+    def breaker_for(self, index: str | None) -> CircuitBreaker:
+        """The breaker guarding `index` (a `PackageIndex.url`); `self.breaker` for untagged requests."""
+        if index is None:
+            return self.breaker
+        with self._breakers_lock:
+            breaker = self._breakers.get(index)
+            if breaker is None:
+                template = self.breaker
+                breaker = CircuitBreaker(template.threshold, template.reset_after, clock=template._clock)
+                self._breakers[index] = breaker
+            return breaker
+
+    def _check_breaker(self, breaker: CircuitBreaker) -> None:
+        if not breaker.allow():
+            self.stats.refused += 1
+            raise CircuitOpenError("index unavailable: serving cached data only")
+
+    def _settle(self, response: httpx.Response | None, attempt: int, breaker: CircuitBreaker) -> float | None:
+        """Seconds to wait before retrying, or None when `response` is final."""
+        if response is not None and response.status_code not in RETRY_STATUSES:
+            breaker.record_success()
+            return None
+        if attempt >= self.retry.retries:
+            breaker.record_failure()
+            return None
+        self.stats.retries += 1
+        return self.retry.delay(attempt, response.headers.get("Retry-After") if response is not None else None)
+
+    def get(
+        self, url: str, headers: Mapping[str, str] | None = None, *, stream: bool = False, index: str | None = None
+    ) -> httpx.Response:
+        """
+        GET with pacing, retries and the breaker (of `index`, see `breaker_for`); raises the last
+        error when retries run out.
+
+        With `stream=True` the body is left unread: the caller iterates it and must `close()` it.
+        """
+        return self.request("GET", url, headers, stream=stream, index=index)
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: Mapping[str, str] | None = None,
+        *,
+        content: bytes | None = None,
+        stream: bool = False,
+        index: str | None = None,
+    ) -> httpx.Response:
+        """`get` for any method, e.g. XML-RPC POSTs with a `content` body."""
+        breaker = self.breaker_for(index)
+        self._check_breaker(breaker)
+        attempt = 0
+        while True:
+            time.sleep(self.bucket.reserve())
+            self.stats.requests += 1
+            try:
+                request = self.client.build_request(method, url, headers=headers, content=content)
+                response: httpx.Response | None = self.client.send(request, stream=stream)
+                error: Exception | None = None
+            except httpx.TransportError as exc:
+                response, error = None, exc
+            wait = self._settle(response, attempt, breaker)
+            if wait is None:
+                if response is None:
+                    raise error  # type: ignore[misc]
+                return response
+            if response is not None:
+                response.close()
+            time.sleep(wait)
+            attempt += 1
+
+    async def aget(
+        self,
+        client: httpx.AsyncClient,
+        url: str,
+        headers: Mapping[str, str] | None = None,
+        *,
+        stream: bool = False,
+        index: str | None = None,
+    ) -> httpx.Response:
+        """Async `get` over `client` (see `async_client`); streamed responses must be `aclose()`d."""
+        breaker = self.breaker_for(index)
+        self._check_breaker(breaker)
+        attempt = 0
+        while True:
+            await asyncio.sleep(self.bucket.reserve())
+            self.stats.requests += 1
+            try:
+                request = client.build_request("GET", url, headers=headers)
+                response: httpx.Response | None = await client.send(request, stream=stream)
+                error: Exception | None = None
+            except httpx.TransportError as exc:
+                response, error = None, exc
+            wait = self._settle(response, attempt, breaker)
+            if wait is None:
+                if response is None:
+                    raise error  # type: ignore[misc]
+                return response
+            if response is not None:
+                await response.aclose()
+            await asyncio.sleep(wait)
+            attempt += 1
@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import suppress
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+
+from animadao.config import RACY_WINDOW_NS, default_cache_dir
+from animadao.import_scanner import ImportRecord, run_batches, source_records, top_level
+
+
+@dataclass
+class IndexStats:
+    """How a scan through `ImportIndex` was served."""
+
+    reused: int = 0  # unchanged files answered from the index
+    parsed: int = 0  # new or changed files that were (re-)parsed
+    purged: int = 0  # entries dropped because the file is gone
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def _index_batch(paths: list[str], engine: str = "tokenize") -> list[tuple[str, int, int, str, list[list]]]:
+    """Worker entry point: fingerprint and parse files -> (path, mtime_ns, size, digest, records)."""
+    out: list[tuple[str, int, int, str, list[list]]] = []
+    for p in paths:
+        try:
+            st = os.stat(p)
+            data = Path(p).read_bytes()
+        except OSError:
+            continue
+        try:
+            records = [list(r) for r in source_records(data.decode("utf-8"), filename=p, engine=engine)]
+        except UnicodeDecodeError:
+            records = []
+        out.append((p, st.st_mtime_ns, st.st_size, _digest(data), records))
+    return out
+
+
+class ImportIndex:
+    """
+    On-disk per-file import cache for incremental scans.
+
+    Each file is stored as `path -> [mtime_ns, size, digest, [[module, lineno, kind], ...], engine]`. A file is
+    reused when mtime+size match and its records came from the requested engine; when only the size
+    matches (touched/checked-out files) or the mtime is too close to the last index write to be
+    trusted, the content hash decides. Files that disappeared from the scanned set are purged. One
+    index file exists per set of scan roots.
+    """
+
+    VERSION = 3
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.stats = IndexStats()
+        self._files: dict[str, list] = {}
+        self._written_ns = 0
+        self._dirty = False
+        self._load()
+
+    @classmethod
+    def for_roots(cls, roots: Iterable[Path | str], cache_dir: Path | None = None) -> ImportIndex:
+        key = "\n".join(sorted(str(Path(r).resolve()) for r in roots))
+        name = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+        return cls((cache_dir or (default_cache_dir() / "imports")) / f"{name}.json")
+
+    def _load(self) -> None:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except Exception:
+            return
+        if data.get("version") != self.VERSION:
+            return
+        self._files = dict(data.get("files") or {})
+        self._written_ns = int(data.get("written_ns", 0))
+
+    def save(self) -> None:
+        """Atomically persist the index (no-op when nothing changed)."""
+        if not self._dirty:
+            return
+        payload = {"version": self.VERSION, "written_ns": time.time_ns(), "files": self._files}
+        with suppress(OSError):
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(payload, separators=(",", ":")), encoding="utf-8")
+            os.replace(tmp, self.path)
+            self._dirty = False
+
+    def _unchanged(self, path: str, entry: list, mtime_ns: int, size: int) -> bool:
+        if size != entry[1]:
+            return False
+        if mtime_ns == entry[0] and mtime_ns + RACY_WINDOW_NS < self._written_ns:
+            return True
+        try:
+            same = _digest(Path(path).read_bytes()) == entry[2]
+        except OSError:
+            return False
+        if same and mtime_ns != entry[0]:
+            entry[0] = mtime_ns
+            self._dirty = True
+        elif same and mtime_ns + RACY_WINDOW_NS < time.time_ns():
+            self._dirty = True  # re-save so the next run can trust this mtime without hashing
+        return same
+
+    def scan(
+        self,
+        files: Iterable[Path | str],
+        workers: int | None = 1,
+        engine: str = "tokenize",
+    ) -> set[str]:
+        """Top-level imports of `files` (consumer of `iter_records`)."""
+        recs = self.iter_records(files, workers=workers, engine=engine)
+        return {top for rec in recs if (top := top_level(rec.module))}
+
+    def iter_records(
+        self,
+        files: Iterable[Path | str],
+        workers: int | None = 1,
+        on_file: Callable[[int, Path], None] | None = None,
+        engine: str = "tokenize",
+    ) -> Iterator[ImportRecord]:
+        """
+        Stream import records of `files`, re-parsing only new or changed ones.
+
+        Records of unchanged files are yielded as they are found; new/changed files are parsed
+        afterwards with the record `engine` (in a pool when large). `file_id` is the file's position
+        among the distinct stat-able `files`. Once exhausted, stale entries are purged, the index is
+        saved and counters for this call are available in `self.stats`.
+        """
+        self.stats = IndexStats()
+        ids: dict[str, int] = {}
+        to_parse: list[str] = []
+        for f in files:
+            key = str(f)
+            if key in ids:
+                continue
+            try:
+                st = os.stat(key)
+            except OSError:
+                continue
+            mtime_ns, size = st.st_mtime_ns, st.st_size
+            file_id = ids[key] = len(ids)
+            entry = self._files.get(key)
+            if entry is not None and entry[4] == engine and self._unchanged(key, entry, mtime_ns, size):
+                self.stats.reused += 1
+                if on_file:
+                    on_file(file_id, Path(key))
+                for module, lineno, kind in entry[3]:
+                    yield ImportRecord(file_id, module, lineno, kind)
+            else:
+                to_parse.append(key)
+
+        for batch in run_batches(partial(_index_batch, engine=engine), to_parse, workers):
+            for key, mtime_ns, size, digest, records in batch:
+                self._files[key] = [mtime_ns, size, digest, records, engine]
+                self.stats.parsed += 1
+                self._dirty = True
+                if on_file:
+                    on_file(ids[key], Path(key))
+                for module, lineno, kind in records:
+                    yield ImportRecord(ids[key], module, lineno, kind)
+
+        for key in self._files.keys() - ids.keys():
+            del self._files[key]
+            self.stats.purged += 1
+            self._dirty = True
+
+        self.save()
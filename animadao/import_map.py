@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import struct
+import sys
+from collections.abc import Iterable, Iterator, Mapping
+from functools import lru_cache
+from pathlib import Path
+
+from packaging.utils import canonicalize_name
+
+from animadao.config import default_cache_dir
+from animadao.import_scanner import top_level
+
+# Shipped with the package; `animadao mapping build` writes an override to the user cache.
+BUNDLED_PATH = Path(__file__).with_name("data") / "import_map.bin"
+
+_MAGIC = b"ADMAP1\0\0"
+# Generic top-level names that wheels ship by accident (test suites, docs, build leftovers). Mapped
+# to a distribution, they would mark it used whenever a project has its own `tests` or `utils`.
+_NOT_PACKAGES = frozenset(
+    {
+        *("tests", "test", "testing", "conftest", "docs", "doc", "examples", "example", "samples", "tutorials"),
+        *("scripts", "build", "dist", "benchmarks", "benchmark", "wheelhouse", "requirements", "ci"),
+        *("bin", "lib", "lib64", "include", "share", "src", "node_modules", "third_party", "resources"),
+        *("images", "misc", "tools", "devtools", "utils", "cli", "core", "plugins", "cpp"),
+    }
+)
+_U32 = struct.Struct("<I")
+
+
+def user_map_path() -> Path:
+    return default_cache_dir() / "import_map.bin"
+
+
+def _obvious(dist: str) -> str:
+    # what the name heuristic already guesses (`typing-extensions` -> `typing_extensions`)
+    return dist.replace("-", "_")
+
+
+def write_import_map(entries: Mapping[str, Iterable[str]], path: Path) -> int:
+    """
+    Write `dist -> import names` as a sorted, mmap-searchable table; returns the entry count.
+
+    Layout: magic | uint32 n | n x uint32 offsets | `name\\timport,import\\n` records sorted by
+    canonical name. Distributions whose only import name is the obvious one are left out, and so
+    are names that can't be imported (`peewee-stubs`, `win32\\lib\\winerror` in real-world
+    `top_level.txt` files) or that would claim a project's own code: `tests`, `docs` & co.
+    (`_NOT_PACKAGES`) and private `_*` modules.
+    """
+    table: dict[str, set[str]] = {}
+    for dist, imports in entries.items():
+        name = canonicalize_name(dist)
+        names = {i for i in imports if i.isidentifier() and not i.startswith("_") and i not in _NOT_PACKAGES}
+        if names and {i.lower() for i in names} != {_obvious(name)}:
+            table.setdefault(name, set()).update(names)
+
+    blob = bytearray()
+    offsets: list[int] = []
+    for name in sorted(table, key=lambda n: n.encode("utf-8")):
+        offsets.append(len(blob))
+        blob += f"{name}\t{','.join(sorted(table[name]))}\n".encode()
+    head = _MAGIC + _U32.pack(len(offsets)) + b"".join(_U32.pack(o) for o in offsets)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_bytes(head + blob)
+    os.replace(tmp, path)
+    return len(offsets)
+
+
+def load_dump(path: Path) -> dict[str, set[str]]:
+    """
+    Read a local metadata dump: a site-packages-like directory (`*.dist-info` / `*.egg-info`),
+    or JSON lines with `name` and `imports` (or `top_level`) fields.
+    """
+    if path.is_dir():
+        from animadao.dist_index import site_dir_imports
+
+        return {name: set(tops) for name, tops in site_dir_imports(str(path)).items()}
+    out: dict[str, set[str]] = {}
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            imports = row.get("imports") or row.get("top_level") or []
+            out.setdefault(str(row["name"]), set()).update(str(i) for i in imports)
+    return out
+
+
+class ImportMap:
+    """
+    Read-only view of a file written by `write_import_map`.
+
+    Nothing is read up front: the file is memory-mapped on the first lookup and each lookup is a
+    binary search touching O(log n) records. A missing or foreign file behaves as an empty map.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._mm: mmap.mmap | None = None
+        self._count = -1
+
+    def _open(self) -> mmap.mmap | None:
+        if self._count < 0:
+            self._count = 0
+            try:
+                with open(self.path, "rb") as fh:
+                    mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):  # ValueError: empty file
+                return None
+            if mm[: len(_MAGIC)] != _MAGIC:
+                mm.close()
+                return None
+            self._mm = mm
+            (self._count,) = _U32.unpack_from(mm, len(_MAGIC))
+        return self._mm
+
+    def _record(self, mm: mmap.mmap, i: int) -> tuple[bytes, int]:
+        base = len(_MAGIC) + _U32.size
+        start = base + _U32.size * self._count + _U32.unpack_from(mm, base + _U32.size * i)[0]
+        tab = mm.find(b"\t", start)
+        return mm[start:tab], tab + 1
+
+    @staticmethod
+    def _value(mm: mmap.mmap, at: int) -> tuple[str, ...]:
+        return tuple(mm[at : mm.find(b"\n", at)].decode("utf-8").split(","))
+
+    def imports_for(self, dist_name: str) -> tuple[str, ...]:
+        """Import names of `dist_name`, or `()` when the map has no (non-obvious) entry for it."""
+        mm = self._open()
+        if mm is None:
+            return ()
+        key = canonicalize_name(dist_name).encode("utf-8")
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            name, value_at = self._record(mm, mid)
+            if name < key:
+                lo = mid + 1
+            elif name > key:
+                hi = mid
+            else:
+                return self._value(mm, value_at)
+        return ()
+
+    def items(self) -> Iterator[tuple[str, tuple[str, ...]]]:
+        """All `(canonical dist name, import names)` records, in file order."""
+        mm = self._open()
+        for i in range(self._count if mm is not None else 0):
+            name, value_at = self._record(mm, i)
+            yield name.decode("utf-8"), self._value(mm, value_at)
+
+    def __len__(self) -> int:
+        self._open()
+        return self._count
+
+
+@lru_cache(maxsize=1)
+def default_import_map() -> ImportMap:
+    """The user-built map when present (see `animadao mapping build`), else the bundled one."""
+    user = user_map_path()
+    return ImportMap(user if user.is_file() else BUNDLED_PATH)
+
+
+def is_stdlib(module: str) -> bool:
+    """Whether the top-level package of `module` ships with the running interpreter."""
+    return top_level(module) in sys.stdlib_module_names
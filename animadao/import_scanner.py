@@ -1,36 +1,286 @@
 from __future__ import annotations
 
 import ast
+import io
+import os
+import re
+import tokenize
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
+from typing import NamedTuple, TypeVar
 
+from animadao.walker import WalkOptions, iter_python_files
 
-def find_top_level_imports(src_root: Path) -> set[str]:
+T = TypeVar("T")
+
+# Below this many files a process pool costs more (startup + pickling) than it saves.
+SERIAL_CUTOFF = 256
+
+
+def resolve_workers(workers: int | None) -> int:
+    """Map a configured worker count to a real one: `0`/`None` -> CPU count, anything else clamped to >= 1."""
+    if not workers:
+        return os.cpu_count() or 1
+    return max(1, int(workers))
+
+
+class ImportRecord(NamedTuple):
+    """One import site: `module` as written (relative imports keep their leading dots)."""
+
+    file_id: int
+    module: str
+    lineno: int
+    kind: str  # "import" | "from"
+
+
+def top_level(module: str) -> str:
+    """`requests.adapters` -> `requests`; `.foo.bar` -> `foo`; `.` -> `""`."""
+    return module.lstrip(".").split(".")[0]
+
+
+# Per-file extractors; "tokenize" falls back to "ast" whenever it can't be sure of the result.
+RECORD_ENGINES = ("tokenize", "ast")
+
+# Statements that can only be found by a full parse: `x = 1; import os`, `if TYPE_CHECKING: import y`.
+_AMBIGUOUS_IMPORT = re.compile(r"[;:][ \t]*(?:import|from)\b")
+# Logical lines that may start an import statement (the tokenizer rules out strings/continuations).
+_IMPORT_LINE = re.compile(r"^[ \t]*(?:import|from)\b", re.MULTILINE)
+_TOKEN_SKIP = frozenset({tokenize.NL, tokenize.COMMENT, tokenize.INDENT, tokenize.DEDENT, tokenize.ENCODING})
+
+
+def ast_records(text: str, filename: str = "<unknown>") -> list[tuple[str, int, str]]:
+    """`(module, lineno, kind)` for every import statement of one module, in source order; [] on syntax errors."""
+    try:
+        tree = ast.parse(text, filename=filename)
+    except (SyntaxError, ValueError):  # ValueError: null bytes in source
+        return []
+
+    out: list[tuple[int, int, int, str, str]] = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for i, alias in enumerate(node.names):
+                out.append((node.lineno, node.col_offset, i, alias.name, "import"))
+        elif isinstance(node, ast.ImportFrom):
+            out.append((node.lineno, node.col_offset, 0, "." * node.level + (node.module or ""), "from"))
+    out.sort()
+    return [(module, lineno, kind) for lineno, _col, _i, module, kind in out]
+
+
+def _statement_records(toks: list[tokenize.TokenInfo]) -> list[tuple[str, int, str]] | None:
+    lineno = toks[0].start[0]
+    words = [t.string for t in toks]
+    if words[0] == "import":
+        # import a.b [as c], d
+        out: list[tuple[str, int, str]] = []
+        cur, i = "", 1
+        while i < len(toks):
+            w = words[i]
+            if w == "as":
+                i += 2
+                continue
+            if w == ",":
+                if not cur:
+                    return None
+                out.append((cur, lineno, "import"))
+                cur = ""
+            elif w == "." or toks[i].type == tokenize.NAME:
+                cur += w
+            else:
+                return None
+            i += 1
+        if not cur:
+            return None
+        out.append((cur, lineno, "import"))
+        return out
+    # from ..a.b import (x, y)
+    if "import" not in words:
+        return None
+    k = words.index("import")
+    module = "".join(words[1:k])
+    if not module or any(toks[j].type != tokenize.NAME and words[j] not in (".", "...") for j in range(1, k)):
+        return None
+    return [(module, lineno, "from")]
+
+
+def token_records(text: str) -> list[tuple[str, int, str]] | None:
+    """
+    Fast path of `ast_records`: tokenize only as far as the last line that may start an import.
+
+    Only logical lines beginning with `import`/`from` are looked at, so no tree is built. Returns
+    None when the answer needs a real parse (imports after `;` or `:`, tokenizer errors, unexpected
+    tokens); callers then use `ast_records`. Unlike the AST, it still reports the imports of files
+    that are tokenizable but don't compile (e.g. Python 2 sources).
+    """
+    if "import" not in text:
+        return []
+    if _AMBIGUOUS_IMPORT.search(text):
+        return None
+    last = -1
+    for m in _IMPORT_LINE.finditer(text):
+        last = m.start()
+    if last < 0:
+        return []
+    last_line = text.count("\n", 0, last) + 1
+
+    out: list[tuple[str, int, str]] = []
+    stmt: list[tokenize.TokenInfo] | None = None
+    at_start = True
+    try:
+        for tok in tokenize.generate_tokens(io.StringIO(text).readline):
+            tt = tok.type
+            if stmt is not None:
+                if tt in (tokenize.NEWLINE, tokenize.ENDMARKER):
+                    recs = _statement_records(stmt)
+                    if recs is None:
+                        return None
+                    out.extend(recs)
+                    stmt, at_start = None, True
+                elif tt not in (tokenize.NL, tokenize.COMMENT):
+                    stmt.append(tok)
+                continue
+            if tt in _TOKEN_SKIP:
+                continue
+            if tt == tokenize.NEWLINE:
+                at_start = True
+                continue
+            if at_start:
+                if tok.start[0] > last_line:
+                    break
+                if tt == tokenize.NAME and tok.string in ("import", "from"):
+                    stmt = [tok]
+                at_start = False
+    except (tokenize.TokenError, SyntaxError):
+        return None
+    return out
+
+
+def source_records(text: str, filename: str = "<unknown>", engine: str = "tokenize") -> list[tuple[str, int, str]]:
+    """`(module, lineno, kind)` for every import statement of one module, in source order; [] on syntax errors."""
+    if engine == "tokenize":
+        recs = token_records(text)
+        if recs is not None:
+            return recs
+    elif engine != "ast":
+        raise ValueError(f"unknown record engine: {engine!r} (expected one of {RECORD_ENGINES})")
+    return ast_records(text, filename)
+
+
+def _read_source(path: Path | str) -> str | None:
+    try:
+        return Path(path).read_text(encoding="utf-8")
+    except Exception:
+        return None
+
+
+def _records_batch(
+    items: list[tuple[int, str]], engine: str = "tokenize"
+) -> list[tuple[int, list[tuple[str, int, str]]]]:
+    """Worker entry point: `(file_id, path)` pairs -> `(file_id, records)` pairs."""
+    out: list[tuple[int, list[tuple[str, int, str]]]] = []
+    for file_id, p in items:
+        text = _read_source(p)
+        out.append((file_id, [] if text is None else source_records(text, filename=p, engine=engine)))
+    return out
+
+
+def run_batches(fn: Callable[[list], T], paths: list, workers: int | None = 1) -> Iterator[T]:
+    """
+    Apply `fn` to batches of `paths`, in a process pool when it pays off.
+
+    With more than one worker and at least `SERIAL_CUTOFF` paths, the list is split into batches
+    parsed by a process pool; otherwise `fn` runs once, in-process, over the whole list.
+    `fn` must be picklable: a module-level function, or a `functools.partial` of one.
+    """
+    if not paths:
+        return
+    n_workers = min(resolve_workers(workers), len(paths))
+    if n_workers <= 1 or len(paths) < SERIAL_CUTOFF:
+        yield fn(paths)
+        return
+
+    # a few batches per worker keeps the pool busy when file sizes are uneven
+    n_batches = n_workers * 4
+    batches = [b for b in (paths[i::n_batches] for i in range(n_batches)) if b]
+    with ProcessPoolExecutor(max_workers=n_workers) as pool:
+        yield from pool.map(fn, batches)
+
+
+def scan_files(files: Iterable[Path], workers: int | None = 1, engine: str = "tokenize") -> set[str]:
+    """Collect top-level imports from an explicit list of files (consumer of `iter_file_records`)."""
+    recs = iter_file_records(files, workers=workers, engine=engine)
+    return {top for rec in recs if (top := top_level(rec.module))}
+
+
+def _serial_records(
+    items: Iterable[tuple[int, str]], on_file: Callable[[int, Path], None] | None, engine: str
+) -> Iterator[ImportRecord]:
+    for file_id, p in items:
+        if on_file:
+            on_file(file_id, Path(p))
+        text = _read_source(p)
+        for module, lineno, kind in [] if text is None else source_records(text, filename=p, engine=engine):
+            yield ImportRecord(file_id, module, lineno, kind)
+
+
+def iter_file_records(
+    files: Iterable[Path | str],
+    workers: int | None = 1,
+    on_file: Callable[[int, Path], None] | None = None,
+    engine: str = "tokenize",
+) -> Iterator[ImportRecord]:
+    """
+    Stream `ImportRecord`s for `files`; `file_id` is the file's position in `files`.
+
+    `on_file(file_id, path)` is called before any record of that file is yielded, so callers can
+    keep (or stream out) a file table. Serially, `files` is consumed lazily and each file is parsed
+    right before its records are yielded; with a process pool (see `run_batches`) the file list is
+    materialized and records arrive batch by batch. `engine` is one of `RECORD_ENGINES`.
+    """
+    numbered = ((i, str(f)) for i, f in enumerate(files))
+    if resolve_workers(workers) <= 1:
+        yield from _serial_records(numbered, on_file, engine)
+        return
+    items = list(numbered)
+    if len(items) < SERIAL_CUTOFF:
+        yield from _serial_records(items, on_file, engine)
+        return
+    for batch in run_batches(partial(_records_batch, engine=engine), items, workers):
+        for file_id, recs in batch:
+            if on_file:
+                on_file(file_id, Path(items[file_id][1]))
+            for module, lineno, kind in recs:
+                yield ImportRecord(file_id, module, lineno, kind)
+
+
+def iter_imports(
+    src_root: Path,
+    *,
+    workers: int | None = 1,
+    walk: WalkOptions | None = None,
+    on_file: Callable[[int, Path], None] | None = None,
+    engine: str = "tokenize",
+) -> Iterator[ImportRecord]:
+    """Stream import records for every Python file under `src_root` (see `iter_file_records`)."""
+    return iter_file_records(iter_python_files(src_root, walk), workers=workers, on_file=on_file, engine=engine)
+
+
+def find_top_level_imports(
+    src_root: Path, *, workers: int | None = 1, walk: WalkOptions | None = None, engine: str = "tokenize"
+) -> set[str]:
     """
     Walk Python files under `src_root` and collect top-level import names.
     We record only the top module part: e.g. `requests.adapters` -> `requests`.
 
+    Args:
+        src_root: directory to walk.
+        workers: process count for parsing (`0` -> CPU count); small trees are always parsed serially.
+        walk: pruning rules (venvs, build dirs, .gitignore, excludes, size cap); defaults to `WalkOptions()`.
+        engine: `"tokenize"` (fast path, AST fallback on ambiguous files) or `"ast"`.
+
     Returns:
         set[str]: unique top-level import names found.
     """
-    imports: set[str] = set()
-    for py in src_root.rglob("*.py"):
-        try:
-            text = py.read_text(encoding="utf-8")
-        except Exception:
-            continue
-        try:
-            tree = ast.parse(text, filename=str(py))
-        except SyntaxError:
-            continue
-
-        for node in ast.walk(tree):
-            if isinstance(node, ast.Import):
-                for alias in node.names:
-                    top = alias.name.split(".")[0]
-                    if top:
-                        imports.add(top)
-            elif isinstance(node, ast.ImportFrom) and node.module:
-                top = node.module.split(".")[0]
-                if top:
-                    imports.add(top)
-    return imports
+    recs = iter_imports(src_root, workers=workers, walk=walk, engine=engine)
+    return {top for rec in recs if (top := top_level(rec.module))}
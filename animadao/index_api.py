@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import hashlib
+import html
+import json
+import re
+from contextlib import suppress
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+
+from packaging.utils import (
+    InvalidSdistFilename,
+    InvalidWheelFilename,
+    canonicalize_name,
+    parse_sdist_filename,
+    parse_wheel_filename,
+)
+from packaging.version import InvalidVersion, Version
+
+# How the latest version is read from the index:
+#   stream - `/pypi/<name>/json`, parsed incrementally and abandoned right after `info.version`
+#   json   - `/pypi/<name>/json`, whole document (the old behaviour)
+#   simple - PEP 691 JSON Simple API, `/simple/<name>/`
+API_MODES = ("stream", "json", "simple")
+
+SIMPLE_ACCEPT = "application/vnd.pypi.simple.v1+json"
+# PEP 691 preferred, PEP 503 HTML accepted (pypiserver, plain static mirrors)
+SIMPLE_OR_HTML_ACCEPT = f"{SIMPLE_ACCEPT}, text/html;q=0.1"
+
+PYPI_JSON_BASE = "https://pypi.org/pypi"
+PYPI_SIMPLE_BASE = "https://pypi.org/simple"
+
+
+@dataclass(frozen=True)
+class PackageIndex:
+    """
+    One package index to query.
+
+    `api="json"`: a PyPI-style JSON API base, projects at `<url>/<name>/json`.
+    `api="simple"`: a Simple Repository API base, projects at `<url>/<normalized-name>/`.
+    """
+
+    url: str
+    api: str
+
+    @classmethod
+    def parse(cls, url: str) -> PackageIndex:
+        """
+        Classify a configured URL: a last path segment of `simple` / `+simple` (devpi) means the
+        Simple API (`https://pypi.org/simple`, `http://localhost:3141/root/pypi/+simple/`);
+        anything else is a JSON API base (`https://pypi.org/pypi`).
+        """
+        base = url.strip().rstrip("/")
+        last = urlsplit(base).path.rsplit("/", 1)[-1]
+        return cls(base, "simple" if last in ("simple", "+simple") else "json")
+
+    def project_url(self, name: str) -> str:
+        if self.api == "simple":
+            return f"{self.url}/{canonicalize_name(name)}/"
+        return f"{self.url}/{name}/json"
+
+    @property
+    def namespace(self) -> str | None:
+        """Cache namespace: None for pypi.org (either API), else a stable digest of the URL."""
+        if self.url in (PYPI_JSON_BASE, PYPI_SIMPLE_BASE):
+            return None
+        return hashlib.sha1(self.url.encode("utf-8")).hexdigest()[:12]
+
+
+PYPI = PackageIndex(PYPI_JSON_BASE, "json")
+PYPI_SIMPLE = PackageIndex(PYPI_SIMPLE_BASE, "simple")
+
+_ANCHOR = re.compile(r"<a\s([^>]*)>([^<]*)</a\s*>", re.IGNORECASE)
+_REQUIRES_PYTHON = re.compile(r"""data-requires-python\s*=\s*["']([^"']*)["']""", re.IGNORECASE)
+
+# whitespace, then one token: a complete string, a structural char, or a bare scalar
+_TOKEN = re.compile(rb'\s*(?:"([^"\\]*(?:\\.[^"\\]*)*)"|([{}\[\]:,])|([^\s"{}\[\]:,]+))', re.DOTALL)
+
+
+class InfoVersionScanner:
+    """
+    Incremental reader for the JSON API document that stops at `info.version`.
+
+    Only the token structure is tracked (strings are skipped by one regex match each), so nothing
+    of the document is materialized. `info` is the first key PyPI sends, so for projects with
+    thousands of release files (boto3, botocore, ...) the scan ends within the first few KB.
+    """
+
+    def __init__(self) -> None:
+        self._buf = b""
+        self._stack: list[bytes] = []  # b"{" / b"["
+        self._keys: list[str | None] = []  # current key per open object
+        self._expect_key = False
+        self.done = False  # `info` was fully read (with or without a version)
+
+    def feed(self, chunk: bytes) -> str | None:
+        """Consume `chunk`; returns `info.version` as soon as it has been read, else None."""
+        if self.done:
+            return None
+        buf = self._buf + chunk
+        pos = 0
+        while True:
+            m = _TOKEN.match(buf, pos)
+            # a scalar touching the end of the buffer may continue in the next chunk
+            if m is None or (m.group(3) is not None and m.end() == len(buf)):
+                break
+            pos = m.end()
+            found = self._token(m)
+            if found is not None or self.done:
+                self._buf = b""
+                return found
+        self._buf = buf[pos:]
+        return None
+
+    def _token(self, m: re.Match[bytes]) -> str | None:
+        raw, punct = m.group(1), m.group(2)
+        if punct in (b"{", b"["):
+            self._stack.append(punct)
+            self._keys.append(None)
+            self._expect_key = punct == b"{"
+        elif punct in (b"}", b"]"):
+            if len(self._stack) == 2 and self._keys[0] == "info":
+                self.done = True  # end of `info` without a version
+            self._stack.pop()
+            self._keys.pop()
+            self._expect_key = False
+        elif punct == b",":
+            self._expect_key = bool(self._stack) and self._stack[-1] == b"{"
+        elif raw is not None:
+            text = json.loads(b'"' + raw + b'"')
+            if self._expect_key:
+                self._keys[-1] = text
+                self._expect_key = False
+            elif len(self._stack) == 2 and self._keys[0] == "info" and self._keys[1] == "version":
+                return text
+        return None
+
+
+def _file_version(filename: str) -> Version | None:
+    try:
+        if filename.endswith(".whl"):
+            return parse_wheel_filename(filename)[1]
+        return parse_sdist_filename(filename)[1]
+    except (InvalidWheelFilename, InvalidSdistFilename, InvalidVersion):
+        return None
+
+
+def latest_from_simple(data: dict) -> str | None:
+    """
+    Latest version from a PEP 691 project page: the highest final release that has at least one
+    non-yanked file (pre-releases only when there is nothing else), like `info.version`.
+
+    With API 1.1+ `versions` and nothing yanked, file names aren't parsed at all.
+    """
+    files = data.get("files") or []
+    listed = data.get("versions")
+    candidates: set[Version] = set()
+    if listed is not None and not any(f.get("yanked") for f in files):
+        for raw in listed:
+            with suppress(InvalidVersion):
+                candidates.add(Version(str(raw)))
+    else:
+        live: set[Version] = set()
+        seen: set[Version] = set()
+        for f in files:
+            v = _file_version(str(f.get("filename", "")))
+            if v is not None:
+                seen.add(v)
+                if not f.get("yanked"):
+                    live.add(v)
+        candidates = live
+        for raw in listed or []:  # releases without any files
+            with suppress(InvalidVersion):
+                if (v := Version(str(raw))) not in seen:
+                    candidates.add(v)
+    if not candidates:
+        return None
+    final = [v for v in candidates if not v.is_prerelease]
+    return str(max(final or candidates))
+
+
+def simple_html_files(text: str) -> list[dict]:
+    """The `files` of a PEP 503 HTML project page, shaped like PEP 691 JSON entries."""
+    files = []
+    for attrs, label in _ANCHOR.findall(text):
+        m = _REQUIRES_PYTHON.search(attrs)
+        files.append(
+            {
+                "filename": html.unescape(label).strip(),
+                "yanked": "data-yanked" in attrs.lower(),
+                "requires-python": html.unescape(m.group(1)) if m else None,
+            }
+        )
+    return files
+
+
+def latest_from_simple_html(text: str) -> str | None:
+    """`latest_from_simple` for a PEP 503 HTML project page (`data-yanked` anchors are skipped)."""
+    return latest_from_simple({"files": simple_html_files(text)})
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+
+from packaging.utils import canonicalize_name
+from packaging.version import InvalidVersion, Version
+
+from animadao.config import read_toml
+
+# Detection order; `pylock.<name>.toml` (PEP 751 named lockfiles) are tried after `pylock.toml`.
+LOCKFILE_NAMES = ("uv.lock", "poetry.lock", "pylock.toml")
+
+
+def lockfile_candidates(root: Path) -> list[Path]:
+    """Paths a lockfile may live at under `root`, in detection order (existing or not)."""
+    return [root / n for n in LOCKFILE_NAMES] + sorted(root.glob("pylock.*.toml"))
+
+
+def find_lockfile(root: Path) -> Path | None:
+    """The first lockfile found under `root`, or None."""
+    return next((p for p in lockfile_candidates(root) if p.is_file()), None)
+
+
+def _uv_packages(data: dict) -> Iterator[tuple[str, str]]:
+    for pkg in data.get("package") or []:
+        source = pkg.get("source") or {}
+        # the project itself and path/git/url sources aren't on the index
+        if "registry" in source and pkg.get("version"):
+            yield pkg["name"], pkg["version"]
+
+
+def _poetry_packages(data: dict) -> Iterator[tuple[str, str]]:
+    for pkg in data.get("package") or []:
+        source_type = (pkg.get("source") or {}).get("type")
+        if source_type in (None, "legacy") and pkg.get("version"):
+            yield pkg["name"], pkg["version"]
+
+
+def _pylock_packages(data: dict) -> Iterator[tuple[str, str]]:
+    for pkg in data.get("packages") or []:
+        if pkg.get("version") and not any(k in pkg for k in ("vcs", "directory", "archive")):
+            yield pkg["name"], pkg["version"]
+
+
+def _dedup(packages: Iterable[tuple[str, str]]) -> dict[str, str]:
+    """Canonical name -> version; a name locked at several versions keeps the oldest."""
+    out: dict[str, Version] = {}
+    for name, ver in packages:
+        try:
+            v = Version(str(ver))
+        except InvalidVersion:
+            continue
+        key = canonicalize_name(str(name))
+        if key not in out or v < out[key]:
+            out[key] = v
+    return {name: str(v) for name, v in out.items()}
+
+
+def read_lockfile(path: Path) -> dict[str, str]:
+    """
+    Resolved index packages of a `uv.lock`, `poetry.lock` or `pylock.toml` as `{name: version}`.
+
+    Entries repeated per platform / resolution fork collapse into one name (the oldest version
+    wins, so a stale fork still shows up as outdated). The project itself and packages from
+    VCS, path or URL sources are left out. Raises `OSError` / `TOMLDecodeError`.
+    """
+    data = read_toml(path)
+    if path.name == "uv.lock":
+        return _dedup(_uv_packages(data))
+    if path.name == "poetry.lock":
+        return _dedup(_poetry_packages(data))
+    return _dedup(_pylock_packages(data))
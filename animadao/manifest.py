@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import os
+from functools import cached_property
+from pathlib import Path
+
+from packaging.requirements import Requirement
+
+from animadao.config import file_fingerprint, is_settled, read_toml
+from animadao.dependency_checker import DeclaredDeps, pep621_requirements, poetry_requirements
+from animadao.lockfile import lockfile_candidates, read_lockfile
+from animadao.requirements_file import requirements_from_file
+
+_MEMO: dict[str, ProjectManifest] = {}
+
+
+class ProjectManifest:
+    """
+    A project's dependency declarations, parsed once per process.
+
+    `pyproject.toml` is read (through the memoized `read_toml`) when the manifest is created;
+    each source (`pep621`, `poetry`, `requirements_txt`) is turned into `Requirement`s on first
+    access only. `load` memoizes manifests per project root and hands out the same object while
+    every file it has read keeps its mtime and size.
+    """
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self.pyproject_path = root / "pyproject.toml"
+        self.requirements_path = root / "requirements.txt"
+        # every file this manifest depends on -> fingerprint at read time (None: absent)
+        self.files: dict[str, tuple[int, int] | None] = {
+            str(self.pyproject_path): file_fingerprint(self.pyproject_path),
+            str(self.requirements_path): file_fingerprint(self.requirements_path),
+        }
+        self.pyproject: dict | None = read_toml(self.pyproject_path) if self.pyproject_path.is_file() else None
+
+    @classmethod
+    def load(cls, project_root: Path | str) -> ProjectManifest:
+        """Memoized manifest of `project_root`; re-created when any file it read has changed."""
+        key = os.path.abspath(project_root)
+        hit = _MEMO.get(key)
+        if hit is not None and hit.is_current():
+            return hit
+        manifest = cls(Path(project_root))
+        if all(is_settled(fp) for fp in manifest.files.values()):
+            _MEMO[key] = manifest
+        else:
+            _MEMO.pop(key, None)  # just written: don't trust its mtime yet
+        return manifest
+
+    def is_current(self) -> bool:
+        return all(file_fingerprint(p) == fp and is_settled(fp) for p, fp in self.files.items())
+
+    # ---------- sources ----------
+
+    @cached_property
+    def pep621(self) -> list[Requirement] | None:
+        """`[project]` dependencies (incl. optional groups), or None without a `[project]` table."""
+        if self.pyproject is None or "project" not in self.pyproject:
+            return None
+        return pep621_requirements(self.pyproject)
+
+    @cached_property
+    def requires_python(self) -> str | None:
+        """`[project].requires-python`, None when not declared."""
+        spec = ((self.pyproject or {}).get("project") or {}).get("requires-python")
+        return str(spec) if spec else None
+
+    @cached_property
+    def poetry(self) -> list[Requirement] | None:
+        """`[tool.poetry.dependencies]`, or None when the pyproject has no Poetry section."""
+        if self.pyproject is None or "poetry" not in (self.pyproject.get("tool") or {}):
+            return None
+        return poetry_requirements(self.pyproject)
+
+    @cached_property
+    def requirements_txt(self) -> list[Requirement] | None:
+        """`requirements.txt` (following `-r`/`-c` includes, constraints excluded), or None when absent."""
+        if self.files[str(self.requirements_path)] is None:
+            return None
+        seen: set[Path] = set()
+        requirements = requirements_from_file(self.requirements_path, seen)
+        for included in seen:
+            self.files.setdefault(str(included), file_fingerprint(included))
+        return requirements
+
+    @cached_property
+    def lockfile(self) -> Path | None:
+        """The first of `uv.lock`, `poetry.lock`, `pylock.toml`, `pylock.*.toml` present, or None."""
+        found: Path | None = None
+        for path in lockfile_candidates(self.root):
+            fp = self.files.setdefault(str(path), file_fingerprint(path))
+            if found is None and fp is not None:
+                found = path
+        return found
+
+    @cached_property
+    def locked(self) -> dict[str, str]:
+        """Locked index packages (`{name: version}`, deduplicated) from `lockfile`; raises FileNotFoundError."""
+        if self.lockfile is None:
+            raise FileNotFoundError(f"No lockfile (uv.lock, poetry.lock, pylock.toml) in: {self.root}")
+        return read_lockfile(self.lockfile)
+
+    @property
+    def source(self) -> str | None:
+        """Which source `declared` uses: `"pep621"`, `"poetry"`, `"requirements"` or None."""
+        if self.pyproject is not None:
+            if "project" in self.pyproject:
+                return "pep621"
+            if "poetry" in (self.pyproject.get("tool") or {}):
+                return "poetry"
+        if self.files[str(self.requirements_path)] is not None:
+            return "requirements"
+        return None
+
+    @property
+    def has_sources(self) -> bool:
+        """Whether the project has a `pyproject.toml` or `requirements.txt` at all."""
+        return any(self.files[str(p)] is not None for p in (self.pyproject_path, self.requirements_path))
+
+    @cached_property
+    def declared(self) -> DeclaredDeps:
+        """Declared dependencies by priority: PEP 621, then Poetry, then requirements.txt."""
+        source = self.source
+        if source == "pep621":
+            return DeclaredDeps(requirements=self.pep621 or [])
+        if source == "poetry":
+            return DeclaredDeps(requirements=self.poetry or [])
+        if source == "requirements":
+            return DeclaredDeps(requirements=self.requirements_txt or [])
+        raise FileNotFoundError("No dependencies source found (pyproject or requirements.txt)")
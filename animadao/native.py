@@ -1,7 +1,15 @@
 from __future__ import annotations
 
-from collections.abc import Iterable
+from collections.abc import Callable, Iterable, Iterator
 from pathlib import Path
+from typing import TYPE_CHECKING
+
+from animadao.git_index import tracked_python_files
+from animadao.import_scanner import RECORD_ENGINES, ImportRecord, iter_file_records, scan_files
+from animadao.walker import WalkOptions, iter_python_files
+
+if TYPE_CHECKING:
+    from animadao.import_index import ImportIndex
 
 try:
     from anima_core import scan_imports as _scan_imports_rust
@@ -9,14 +17,101 @@ except Exception:
     _scan_imports_rust = None  # type: ignore[assignment]
 
 
-def scan_imports(paths: Iterable[Path | str]) -> list[str]:
-    """Collect top-level imports across multiple roots (Rust fast-path, Python fallback)."""
-    norm_paths = [Path(p) for p in paths]
-    if _scan_imports_rust:
-        return list(_scan_imports_rust([str(p) for p in norm_paths]))
-    from .import_scanner import find_top_level_imports
+FILE_SOURCES = ("walk", "git")
+ENGINES = ("auto", "native", *RECORD_ENGINES)
+
+
+def native_available() -> bool:
+    """Whether the Rust extension (`anima_core`) is importable."""
+    return _scan_imports_rust is not None
+
+
+def resolve_engine(engine: str = "auto", *, per_file: bool = False) -> str:
+    """
+    Concrete engine for a scan: `"native"`, `"tokenize"` or `"ast"`.
+
+    `"auto"` picks the fastest one that can do the job: the Rust extension when it is installed
+    and only the set of top-level imports is needed, the tokenizer fast path otherwise. `"native"`
+    degrades the same way when the extension is missing or per-file results (`per_file`: import
+    index, provenance, records) are needed. The extension only returns an import set, so under
+    the default config (`import_index` and `provenance` on) scans take the tokenizer path, and warm
+    runs are served from the import index instead.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"unknown scan engine: {engine!r} (expected one of {ENGINES})")
+    if engine in ("auto", "native"):
+        return "native" if native_available() and not per_file else "tokenize"
+    return engine
+
+
+def collect_files(
+    paths: Iterable[Path | str],
+    *,
+    walk: WalkOptions | None = None,
+    source: str = "walk",
+) -> list[Path]:
+    """
+    Enumerate `*.py` files under `paths`.
+
+    - `source="walk"`: filesystem walk with pruning (see `iter_python_files`).
+    - `source="git"`: tracked files read straight from `.git/index` (see `tracked_python_files`);
+      roots outside a worktree are walked.
+    """
+    files: dict[str, Path] = {}
+    for p in paths:
+        tracked = tracked_python_files(p, walk) if source == "git" else None
+        files.update((str(f), f) for f in (iter_python_files(p, walk) if tracked is None else tracked))
+    # overlapping roots must not parse a file twice
+    return list(files.values())
+
+
+def scan_imports(
+    paths: Iterable[Path | str],
+    *,
+    workers: int | None = 1,
+    index: ImportIndex | None = None,
+    walk: WalkOptions | None = None,
+    source: str = "walk",
+    engine: str = "auto",
+) -> list[str]:
+    """
+    Collect top-level imports across multiple roots with the chosen `engine` (see `resolve_engine`).
+
+    - `workers` only affects the Python engines: files from all roots are parsed in one process pool.
+    - With an `index`, only new/changed files are parsed and the rest are answered from disk.
+      The Rust extension has no per-file results, so an index takes the Python path.
+    - `walk` controls directory pruning (venvs, build dirs, .gitignore, excludes, size cap).
+    - `source` picks how files are enumerated: `"walk"` or `"git"` (see `collect_files`).
+
+    Files are enumerated here for every engine, so the Rust extension gets the same file list.
+    """
+    used = resolve_engine(engine, per_file=index is not None)
+    files = collect_files([Path(p) for p in paths], walk=walk, source=source)
+    if used == "native":
+        return sorted(set(_scan_imports_rust([str(f) for f in files])))
+    if index is not None:
+        return sorted(index.scan(files, workers=workers, engine=used))
+    return sorted(scan_files(files, workers=workers, engine=used))
+
+
+def iter_imports(
+    paths: Iterable[Path | str],
+    *,
+    workers: int | None = 1,
+    index: ImportIndex | None = None,
+    walk: WalkOptions | None = None,
+    source: str = "walk",
+    on_file: Callable[[int, Path], None] | None = None,
+    engine: str = "auto",
+) -> Iterator[ImportRecord]:
+    """
+    Stream `(file_id, module, lineno, kind)` records across roots as files are parsed.
 
-    acc: set[str] = set()
-    for p in norm_paths:
-        acc |= find_top_level_imports(p)
-    return sorted(acc)
+    `on_file(file_id, path)` announces each file before its records. Options mean the same as for
+    `scan_imports`; this always takes a Python engine (the Rust extension has no per-site output).
+    """
+    used = resolve_engine(engine, per_file=True)
+    files = collect_files([Path(p) for p in paths], walk=walk, source=source)
+    if index is not None:
+        return index.iter_records(files, workers=workers, on_file=on_file, engine=used)
+    return iter_file_records(files, workers=workers, on_file=on_file, engine=used)
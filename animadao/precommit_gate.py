@@ -6,8 +6,11 @@ from pathlib import Path
 import click
 
 from animadao.config import load_config
-from animadao.dependency_checker import guess_unused, load_declared_deps_any
-from animadao.native import scan_imports
+from animadao.dependency_checker import guess_unused
+from animadao.dist_index import DistIndex, InstalledVersions
+from animadao.manifest import ProjectManifest
+from animadao.release_history import POLICIES
+from animadao.scan_session import ScanSession
 from animadao.version_checker import VersionChecker
 
 
@@ -28,9 +31,9 @@ def _lower_set(items: Iterable[str] | None) -> set[str]:
 )
 @click.option(
     "--mode",
-    type=click.Choice(["declared", "installed"]),
+    type=click.Choice(["declared", "installed", "locked"]),
     default=None,
-    help="Check declared pins or installed packages.",
+    help="Check declared pins, installed packages or lockfile pins.",
 )
 @click.option("--ignore", multiple=True, help="Ignore packages (case-insensitive). Can repeat.")
 @click.option("--pypi-ttl", type=int, default=None, help="PyPI cache TTL seconds (default 86400).")
@@ -40,6 +43,43 @@ def _lower_set(items: Iterable[str] | None) -> set[str]:
     "--fail-if-unpinned", is_flag=True, default=False, help="Fail if any unpinned requirements (declared mode)."
 )
 @click.option("--max-unused", type=int, default=None, help="Fail if count of unused declared deps exceeds this value.")
+@click.option(
+    "--python",
+    type=click.Path(path_type=Path, exists=True),
+    default=None,
+    help="Installed mode: a venv/prefix directory or interpreter to audit instead of the current one.",
+)
+@click.option(
+    "--site-packages",
+    type=click.Path(path_type=Path, exists=True, file_okay=False),
+    multiple=True,
+    help="Installed mode: site-packages directory to audit (can repeat).",
+)
+@click.option(
+    "--offline",
+    is_flag=True,
+    default=False,
+    envvar="ANIMADAO_OFFLINE",
+    help="Never contact the index: answer from the local cache only.",
+)
+@click.option(
+    "--index-url",
+    "index_urls",
+    multiple=True,
+    help="Package index to query instead of pypi.org (JSON API or Simple API base). Can repeat.",
+)
+@click.option(
+    "--policy",
+    type=click.Choice(POLICIES),
+    default=None,
+    help="Version pins are compared with: latest, newest final, newest within the major, or newest for target_python.",
+)
+@click.option(
+    "--fail-if-yanked",
+    is_flag=True,
+    default=False,
+    help="Fail if a pinned release is yanked (policies other than latest).",
+)
 def main(
     project: Path,
     srcs: tuple[Path, ...],
@@ -50,6 +90,12 @@ def main(
     fail_if_outdated: bool,
     fail_if_unpinned: bool,
     max_unused: int | None,
+    python: Path | None,
+    site_packages: tuple[Path, ...],
+    offline: bool,
+    index_urls: tuple[str, ...],
+    policy: str | None,
+    fail_if_yanked: bool,
 ) -> None:
     """Pre-commit gate for AnimaDao."""
     cfg = load_config(project).with_overrides(
@@ -58,56 +104,63 @@ def main(
         ttl=pypi_ttl,
         conc=pypi_concurrency,
         src=[str(p) for p in srcs] if srcs else None,
+        offline=offline or None,
+        index_urls=index_urls,
+        policy=policy,
     )
     ig = _lower_set(cfg.ignore_distributions)
-    roots: list[Path] = [Path(p) for p in (cfg.src or [])] or [project]
-
-    checker = VersionChecker(ttl_seconds=cfg.pypi_ttl_seconds, concurrency=cfg.pypi_concurrency)
-
-    outdated = []
-    unpinned = []
-    unused: list[str] = []
-    imports_found = 0
-    declared_count = 0
-
-    if cfg.mode == "declared":
-        declared = load_declared_deps_any(project).requirements
-        declared_count = len(declared)
-
-        # combine imports from all roots
-        imports = set(scan_imports([str(r) for r in roots]))
-        imports_found = len(imports)
-
-        outdated, unpinned = checker.check_declared(declared)
-        unused = guess_unused(declared, imports)
-    else:
-        from importlib import metadata as im
-
-        installed = {d.metadata["Name"]: d.version for d in im.distributions()}
-        outdated, _ = checker.check_installed(installed)
-
-    # apply ignore
-    outdated = [o for o in outdated if o.name.lower() not in ig]
-    unpinned = [u for u in unpinned if u.name.lower() not in ig]
-    unused = [u for u in unused if u.lower() not in ig]
-
-    summary = {
-        "mode": cfg.mode,
-        "declared": declared_count,
-        "imports_found": imports_found,
-        "outdated": len(outdated),
-        "unpinned": len(unpinned),
-        "unused": len(unused),
-    }
-    print("AnimaDao summary:", __import__("json").dumps(summary, indent=2))
-
-    violations: list[str] = []
-    if fail_if_outdated and summary["outdated"] > 0:
-        violations.append(f"outdated={summary['outdated']}")
-    if cfg.mode == "declared":
-        if fail_if_unpinned and summary["unpinned"] > 0:
-            violations.append(f"unpinned={summary['unpinned']}")
-        if max_unused is not None and summary["unused"] > max_unused:
-            violations.append(f"unused={summary['unused']} > {max_unused}")
-
+    session = ScanSession.from_config(project, cfg, srcs)
+
+    with VersionChecker.from_config(cfg, project) as checker:
+        outdated = []
+        unpinned = []
+        unused: list[str] = []
+        imports_found = 0
+        declared_count = 0
+
+        if cfg.mode == "declared":
+            declared = ProjectManifest.load(project).declared.requirements
+            declared_count = len(declared)
+
+            # combine imports from all roots
+            imports = session.imports
+            imports_found = len(imports)
+
+            outdated, unpinned = checker.check_declared(declared)
+            unused = guess_unused(declared, imports, DistIndex.for_environment())
+        elif cfg.mode == "locked":
+            outdated, _ = checker.check_installed(ProjectManifest.load(project).locked)
+        else:
+            installed = InstalledVersions.for_target(python, site_packages).versions
+            outdated, _ = checker.check_installed(installed)
+
+        # apply ignore
+        outdated = [o for o in outdated if o.name.lower() not in ig]
+        unpinned = [u for u in unpinned if u.name.lower() not in ig]
+        unused = [u for u in unused if u.lower() not in ig]
+
+        summary = {
+            "mode": cfg.mode,
+            "declared": declared_count,
+            "imports_found": imports_found,
+            "outdated": len(outdated),
+            "unpinned": len(unpinned),
+            "unused": len(unused),
+        }
+        if cfg.version_policy != "latest":
+            summary["yanked"] = len([n for n in checker.yanked if n.lower() not in ig])
+        print("AnimaDao summary:", __import__("json").dumps(summary, indent=2))
+
+        violations: list[str] = []
+        if fail_if_outdated and summary["outdated"] > 0:
+            violations.append(f"outdated={summary['outdated']}")
+        if fail_if_yanked and summary.get("yanked", 0) > 0:
+            violations.append(f"yanked={summary['yanked']}")
+        if cfg.mode == "declared":
+            if fail_if_unpinned and summary["unpinned"] > 0:
+                violations.append(f"unpinned={summary['unpinned']}")
+            if max_unused is not None and summary["unused"] > max_unused:
+                violations.append(f"unused={summary['unused']} > {max_unused}")
+
+        checker.revalidate()
     raise SystemExit(2 if violations else 0)
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import struct
+from array import array
+from bisect import bisect_left
+from collections.abc import Iterable
+from dataclasses import dataclass
+from pathlib import Path
+
+from animadao.config import default_cache_dir
+from animadao.import_scanner import ImportRecord, top_level
+
+_MAGIC = b"ADPROV1\n"
+_LEN = struct.Struct("<I")
+
+
+def _u32(values: Iterable[int] = ()) -> array:
+    a = array("I", values)
+    if a.itemsize != 4:  # pragma: no cover - exotic platforms
+        a = array("L", values)
+    return a
+
+
+@dataclass(frozen=True)
+class ImportSite:
+    """Where a module is imported."""
+
+    path: str
+    lineno: int
+    module: str  # full dotted name as written
+
+
+class ProvenanceBuilder:
+    """Accumulates `ImportRecord`s (plus the file table) into a `ProvenanceIndex`."""
+
+    def __init__(self) -> None:
+        self.files: dict[int, str] = {}
+        self._names: dict[str, int] = {}  # interned full module names
+        self._sites: dict[str, list[tuple[int, int, int]]] = {}  # top-level -> (file_id, lineno, name_id)
+
+    def add_file(self, file_id: int, path: Path) -> None:
+        self.files[file_id] = str(path)
+
+    def add(self, rec: ImportRecord) -> None:
+        top = top_level(rec.module)
+        if not top:
+            return
+        name_id = self._names.setdefault(rec.module, len(self._names))
+        self._sites.setdefault(top, []).append((rec.file_id, rec.lineno, name_id))
+
+    def build(self) -> ProvenanceIndex:
+        # re-number files densely, in path order, so the table has no gaps
+        order = sorted(self.files, key=self.files.__getitem__)
+        remap = {old: new for new, old in enumerate(order)}
+        modules = sorted(self._sites)
+        offsets, file_ids, lines, name_ids = _u32([0]), _u32(), _u32(), _u32()
+        for m in modules:
+            for fid, line, nid in sorted((remap[f], ln, n) for f, ln, n in self._sites[m]):
+                file_ids.append(fid)
+                lines.append(line)
+                name_ids.append(nid)
+            offsets.append(len(file_ids))
+        names = [""] * len(self._names)
+        for name, nid in self._names.items():
+            names[nid] = name
+        return ProvenanceIndex([self.files[f] for f in order], modules, names, offsets, file_ids, lines, name_ids)
+
+
+class ProvenanceIndex:
+    """
+    Which files and lines import a given top-level module.
+
+    Strings are interned once (file paths, top-level modules, full dotted names); each import site
+    is three integers in parallel `array('I')` columns, grouped per module in CSR layout:
+    sites of `modules[i]` live in `[offsets[i], offsets[i + 1])`. A lookup is a bisect over the
+    sorted module list plus a slice, i.e. O(log m + hits).
+    """
+
+    def __init__(
+        self,
+        files: list[str],
+        modules: list[str],
+        names: list[str],
+        offsets: array,
+        file_ids: array,
+        lines: array,
+        name_ids: array,
+    ) -> None:
+        self.files = files
+        self.modules = modules
+        self.names = names
+        self._offsets = offsets
+        self._file_ids = file_ids
+        self._lines = lines
+        self._name_ids = name_ids
+
+    @staticmethod
+    def path_for(roots: Iterable[Path | str], cache_dir: Path | None = None) -> Path:
+        """On-disk location of the index for a set of scan roots."""
+        key = "\n".join(sorted(str(Path(r).resolve()) for r in roots))
+        name = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+        return (cache_dir or (default_cache_dir() / "provenance")) / f"{name}.bin"
+
+    def sites(self, module: str) -> list[ImportSite]:
+        """Import sites of top-level `module` (exact, case-sensitive); [] when it's never imported."""
+        i = bisect_left(self.modules, module)
+        if i == len(self.modules) or self.modules[i] != module:
+            return []
+        lo, hi = self._offsets[i], self._offsets[i + 1]
+        return [
+            ImportSite(self.files[self._file_ids[k]], self._lines[k], self.names[self._name_ids[k]])
+            for k in range(lo, hi)
+        ]
+
+    # ---------- persistence ----------
+
+    def save(self, path: Path) -> None:
+        """Atomically write `magic | header length | JSON string tables | uint32 columns`."""
+        header = json.dumps(
+            {"files": self.files, "modules": self.modules, "names": self.names, "sites": len(self._file_ids)},
+            separators=(",", ":"),
+        ).encode("utf-8")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "wb") as fh:
+            fh.write(_MAGIC + _LEN.pack(len(header)) + header)
+            for col in (self._offsets, self._file_ids, self._lines, self._name_ids):
+                fh.write(col.tobytes())
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path) -> ProvenanceIndex:
+        """Read an index written by `save`; raises `ValueError` on foreign or corrupt files."""
+        data = path.read_bytes()
+        if not data.startswith(_MAGIC):
+            raise ValueError(f"not a provenance index: {path}")
+        pos = len(_MAGIC)
+        try:
+            (hlen,) = _LEN.unpack_from(data, pos)
+            pos += _LEN.size
+            header = json.loads(data[pos : pos + hlen])
+            pos += hlen
+            cols: list[array] = []
+            for count in (len(header["modules"]) + 1, header["sites"], header["sites"], header["sites"]):
+                col = _u32()
+                col.frombytes(data[pos : pos + count * col.itemsize])
+                pos += count * col.itemsize
+                cols.append(col)
+            files, modules, names = header["files"], header["modules"], header["names"]
+        except (struct.error, KeyError, TypeError) as exc:  # short file, header missing fields or not a dict
+            raise ValueError(f"corrupt provenance index: {path}") from exc
+        if pos != len(data):
+            raise ValueError(f"truncated provenance index: {path}")
+        return cls(files, modules, names, *cols)
@@ -0,0 +1,350 @@
+from __future__ import annotations
+
+import gzip
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections.abc import Iterable
+from contextlib import suppress
+from pathlib import Path
+
+from packaging.utils import canonicalize_name
+
+from animadao.config import default_cache_dir
+from animadao.index_api import PackageIndex
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS latest (
+    name    TEXT PRIMARY KEY,  -- canonical project name
+    version TEXT NOT NULL,
+    etag    TEXT,
+    ts      REAL NOT NULL      -- epoch seconds of the last successful lookup
+);
+CREATE TABLE IF NOT EXISTS missing (
+    name TEXT PRIMARY KEY,  -- canonical name the index answered 404 for
+    ts   REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS history (
+    name TEXT PRIMARY KEY,  -- canonical project name
+    data BLOB NOT NULL,     -- `ReleaseHistory.to_blob()`
+    etag TEXT,
+    ts   REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+# (version, etag, ts); (None, None, 0.0) when unknown
+CacheEntry = tuple[str | None, str | None, float]
+_MISS: CacheEntry = (None, None, 0.0)
+# (compressed release history, etag, ts); (None, None, 0.0) when unknown
+HistoryEntry = tuple[bytes | None, str | None, float]
+_NO_HISTORY: HistoryEntry = (None, None, 0.0)
+
+# version of the `export` / `import_file` artifact layout
+EXPORT_FORMAT = 1
+
+
+class PyPICache:
+    """
+    Latest-version cache (`name -> version, ETag, timestamp`) in one SQLite database.
+
+    The database runs in WAL mode, so parallel runs (matrix jobs sharing a cache directory) read
+    concurrently and serialize their short write transactions; every write is atomic. `load_many`
+    / `save_many` answer a whole batch with one query / one transaction. Entries of the old
+    one-JSON-file-per-package layout (`<cache>/pypi/*.json`) are imported on first use. If the
+    database can't be opened (read-only home, ...) the cache lives in memory for this process.
+
+    Names the index doesn't know (404) are remembered separately (`load_missing` / `save_missing`)
+    with their own, shorter `negative_ttl`. `export` / `import_file` move the whole cache between
+    machines as one gzip-compressed JSON file (e.g. into air-gapped CI runners).
+
+    Full release histories (`animadao.release_history`) live next to the latest versions
+    (`load_histories` / `save_histories`), one compressed row per project; they aren't exported.
+
+    Each package index gets its own database (`index_url`; pypi.org uses `pypi.sqlite3`), so a
+    mirror's answers never shadow upstream's or the other way round.
+
+    Once the index's changelog has been applied (`apply_changelog`, see `animadao.changelog`), an
+    entry fetched after the first sync and not touched by a later change event counts as checked at
+    the last sync (`checked_at`): regular syncs keep unchanged entries fresh indefinitely.
+    """
+
+    FILENAME = "pypi.sqlite3"
+
+    def __init__(
+        self,
+        ttl_seconds: int = 86400,
+        cache_dir: Path | None = None,
+        negative_ttl: int = 3600,
+        index_url: str | None = None,
+    ) -> None:
+        self.root = (cache_dir or default_cache_dir()).resolve()
+        self.index_url = index_url
+        namespace = _namespace(index_url)
+        self.path = self.root / (f"pypi-{namespace}.sqlite3" if namespace else self.FILENAME)
+        self.ttl = ttl_seconds
+        self.negative_ttl = negative_ttl
+        self._lock = threading.Lock()
+        self._db = self._connect()
+        if namespace is None:
+            self._migrate_legacy(self.root / "pypi")
+        self._feed = self._read_feed()  # (serial, baseline ts, last sync ts) or None
+
+    def _connect(self) -> sqlite3.Connection:
+        try:
+            self.root.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(self.path, timeout=30.0, isolation_level=None, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.executescript(_SCHEMA)
+        except (OSError, sqlite3.Error):
+            db = sqlite3.connect(":memory:", isolation_level=None, check_same_thread=False)
+            db.executescript(_SCHEMA)
+        return db
+
+    def _migrate_legacy(self, legacy_dir: Path) -> None:
+        """Import `<name>.json` files of the pre-SQLite layout once (existing rows win)."""
+        if not legacy_dir.is_dir():
+            return
+        with self._lock:
+            try:
+                if self._db.execute("SELECT 1 FROM meta WHERE key = 'legacy_migrated'").fetchone():
+                    return
+                rows = []
+                for p in legacy_dir.glob("*.json"):
+                    try:
+                        data = json.loads(p.read_text(encoding="utf-8"))
+                    except (OSError, ValueError):
+                        continue
+                    if isinstance(data, dict) and data.get("version"):
+                        ts = float(data.get("ts", 0))
+                        rows.append((canonicalize_name(p.stem), str(data["version"]), data.get("etag"), ts))
+                self._db.execute("BEGIN IMMEDIATE")
+                self._db.executemany("INSERT OR IGNORE INTO latest VALUES (?, ?, ?, ?)", rows)
+                self._db.execute("INSERT OR REPLACE INTO meta VALUES ('legacy_migrated', ?)", (str(len(rows)),))
+                self._db.execute("COMMIT")
+            except sqlite3.Error:
+                if self._db.in_transaction:
+                    self._db.execute("ROLLBACK")
+
+    def load(self, name: str) -> CacheEntry:
+        return self.load_many([name]).get(name, _MISS)
+
+    def _select(self, sql: str, keys: Iterable[str]) -> list[tuple]:
+        """Run `sql` (with one `{marks}` placeholder list) over `keys` in chunks; [] on database errors."""
+        unique = list(set(keys))
+        rows: list[tuple] = []
+        with self._lock:
+            try:
+                for i in range(0, len(unique), 500):  # stay under SQLite's bound-parameter limit
+                    chunk = unique[i : i + 500]
+                    rows += self._db.execute(sql.format(marks=",".join("?" * len(chunk))), chunk).fetchall()
+            except sqlite3.Error:
+                pass
+        return rows
+
+    def _write(self, statements: list[tuple[str, list[tuple]]]) -> None:
+        """Apply `(sql, rows)` pairs in one transaction."""
+        with self._lock:
+            try:
+                self._db.execute("BEGIN IMMEDIATE")
+                for sql, rows in statements:
+                    self._db.executemany(sql, rows)
+                self._db.execute("COMMIT")
+            except sqlite3.Error:
+                if self._db.in_transaction:
+                    self._db.execute("ROLLBACK")
+
+    def load_many(self, names: Iterable[str]) -> dict[str, CacheEntry]:
+        """Entries for `names` (keys mirror the given names; misses included)."""
+        keys = {n: canonicalize_name(n) for n in names}
+        sql = "SELECT name, version, etag, ts FROM latest WHERE name IN ({marks})"
+        found = {name: (version, etag, float(ts)) for name, version, etag, ts in self._select(sql, keys.values())}
+        return {n: found.get(key, _MISS) for n, key in keys.items()}
+
+    def save(self, name: str, version: str, etag: str | None) -> None:
+        self.save_many([(name, version, etag)])
+
+    def save_many(self, entries: Iterable[tuple[str, str, str | None]]) -> None:
+        """Upsert `(name, version, etag)` rows in one transaction, stamped with the current time."""
+        now = time.time()
+        rows = [(canonicalize_name(n), v, e, now) for n, v, e in entries]
+        if rows:
+            self._write(
+                [
+                    ("INSERT OR REPLACE INTO latest VALUES (?, ?, ?, ?)", rows),
+                    ("DELETE FROM missing WHERE name = ?", [(r[0],) for r in rows]),
+                ]
+            )
+
+    def load_missing(self, names: Iterable[str]) -> set[str]:
+        """Those of `names` that got a 404 within the last `negative_ttl` seconds."""
+        keys = {n: canonicalize_name(n) for n in names}
+        cutoff = time.time() - self.negative_ttl
+        sql = "SELECT name, ts FROM missing WHERE name IN ({marks})"
+        recent = {name for name, ts in self._select(sql, keys.values()) if ts > cutoff}
+        return {n for n, key in keys.items() if key in recent}
+
+    def save_missing(self, names: Iterable[str]) -> None:
+        now = time.time()
+        rows = [(canonicalize_name(n), now) for n in names]
+        if rows:
+            self._write([("INSERT OR REPLACE INTO missing VALUES (?, ?)", rows)])
+
+    def load_histories(self, names: Iterable[str]) -> dict[str, HistoryEntry]:
+        """Release history rows for `names` (keys mirror the given names; misses included)."""
+        keys = {n: canonicalize_name(n) for n in names}
+        sql = "SELECT name, data, etag, ts FROM history WHERE name IN ({marks})"
+        found = {name: (bytes(data), etag, float(ts)) for name, data, etag, ts in self._select(sql, keys.values())}
+        return {n: found.get(key, _NO_HISTORY) for n, key in keys.items()}
+
+    def save_histories(self, entries: Iterable[tuple[str, bytes, str | None]]) -> None:
+        """Upsert `(name, blob, etag)` rows in one transaction, stamped with the current time."""
+        now = time.time()
+        rows = [(canonicalize_name(n), sqlite3.Binary(b), e, now) for n, b, e in entries]
+        if rows:
+            self._write(
+                [
+                    ("INSERT OR REPLACE INTO history VALUES (?, ?, ?, ?)", rows),
+                    ("DELETE FROM missing WHERE name = ?", [(r[0],) for r in rows]),
+                ]
+            )
+
+    def export(self, path: Path) -> int:
+        """Write all entries (original timestamps kept) to `path` atomically; returns the entry count."""
+        with self._lock:
+            latest = self._db.execute("SELECT name, version, etag, ts FROM latest ORDER BY name").fetchall()
+            missing = self._db.execute("SELECT name, ts FROM missing ORDER BY name").fetchall()
+        doc = {
+            "format": EXPORT_FORMAT,
+            "index": self.index_url,
+            "latest": [list(r) for r in latest],
+            "missing": [list(r) for r in missing],
+        }
+        data = gzip.compress(json.dumps(doc, separators=(",", ":")).encode("utf-8"), mtime=0)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            tmp.write_bytes(data)
+            os.replace(tmp, path)
+        finally:
+            with suppress(OSError):
+                tmp.unlink()
+        return len(latest)
+
+    def import_file(self, path: Path) -> int:
+        """
+        Merge an `export` artifact into this cache; per name the newer entry wins. Returns the number
+        of entries read. Raises `OSError` / `ValueError` for unreadable or foreign files, and for
+        exports of another index (open `PyPICache(index_url=read_export(path)["index"])` for those).
+        """
+        return self.merge(read_export(path))
+
+    def merge(self, doc: dict) -> int:
+        """`import_file` for an already loaded export."""
+        if _namespace(doc.get("index")) != _namespace(self.index_url):
+            raise ValueError(f"export of {doc.get('index') or 'pypi.org'} can't be merged into this index's cache")
+        try:
+            latest = [(canonicalize_name(str(n)), str(v), e, float(ts)) for n, v, e, ts in doc.get("latest", [])]
+            missing = [(canonicalize_name(str(n)), float(ts)) for n, ts in doc.get("missing", [])]
+        except (TypeError, ValueError) as exc:
+            raise ValueError(f"malformed cache export rows ({exc})") from exc
+        self._write(
+            [
+                (
+                    "INSERT INTO latest VALUES (?, ?, ?, ?) ON CONFLICT(name) DO UPDATE SET"
+                    " version = excluded.version, etag = excluded.etag, ts = excluded.ts WHERE excluded.ts > latest.ts",
+                    latest,
+                ),
+                (
+                    "INSERT INTO missing VALUES (?, ?) ON CONFLICT(name) DO UPDATE SET ts = excluded.ts"
+                    " WHERE excluded.ts > missing.ts",
+                    missing,
+                ),
+            ]
+        )
+        return len(latest)
+
+    def _read_feed(self) -> tuple[int, float, float] | None:
+        with self._lock:
+            try:
+                rows = dict(self._db.execute("SELECT key, value FROM meta WHERE key LIKE 'changelog_%'").fetchall())
+                return int(rows["changelog_serial"]), float(rows["changelog_baseline"]), float(rows["changelog_synced"])
+            except (KeyError, ValueError, sqlite3.Error):
+                return None
+
+    @property
+    def changelog_serial(self) -> int | None:
+        """Last changelog serial applied to this cache (None before the first sync)."""
+        return self._feed[0] if self._feed else None
+
+    def checked_at(self, ts: float) -> float:
+        """When an entry saved at `ts` was last known to be current (the last sync, if it covers it)."""
+        if self._feed is None or ts < self._feed[1]:
+            return ts
+        return max(ts, self._feed[2])
+
+    def apply_changelog(
+        self, serial: int, names: Iterable[str], complete: bool = True, as_of: float | None = None
+    ) -> list[str]:
+        """
+        Drop the entries (histories, 404 marks) of `names`, which changed upstream, and record `serial` as
+        seen, all in one transaction. The first call only sets the baseline: entries cached before
+        it were never covered by the feed and keep expiring by TTL. Other entries count as confirmed
+        up to `as_of` (default: now; a saved dump is only as current as its newest event). With
+        `complete=False` (events read only up to `serial`, not to the feed's end) the last sync
+        time stays where it was, so no entry counts as confirmed by this call. Returns the dropped
+        cached names.
+        """
+        keys = sorted({canonicalize_name(n) for n in names})
+        cached = [row[0] for row in self._select("SELECT name FROM latest WHERE name IN ({marks})", keys)]
+        now = time.time()
+        as_of = now if as_of is None else min(as_of, now)
+        baseline = self._feed[1] if self._feed else now
+        last = self._feed[2] if self._feed else as_of
+        synced = max(as_of, last) if complete else last
+        meta = [
+            ("changelog_serial", str(serial)),
+            ("changelog_baseline", repr(baseline)),
+            ("changelog_synced", repr(synced)),
+        ]
+        rows = [(k,) for k in keys]
+        self._write(
+            [
+                ("DELETE FROM latest WHERE name = ?", rows),
+                ("DELETE FROM history WHERE name = ?", rows),
+                ("DELETE FROM missing WHERE name = ?", rows),
+                ("INSERT OR REPLACE INTO meta VALUES (?, ?)", meta),
+            ]
+        )
+        self._feed = self._read_feed()
+        return sorted(cached)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM latest").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+def _namespace(index_url: str | None) -> str | None:
+    return PackageIndex.parse(index_url).namespace if index_url else None
+
+
+def read_export(path: Path) -> dict:
+    """Load a `PyPICache.export` artifact (gzip or plain JSON); `ValueError` for anything else."""
+    raw = path.read_bytes()
+    try:
+        if raw[:2] == b"\x1f\x8b":
+            raw = gzip.decompress(raw)
+    except (OSError, EOFError, zlib.error) as exc:  # truncated or corrupt gzip stream
+        raise ValueError(f"{path}: not an AnimaDao cache export ({exc})") from exc
+    doc = json.loads(raw)
+    if not isinstance(doc, dict) or doc.get("format") != EXPORT_FORMAT:
+        raise ValueError(f"{path}: not an AnimaDao cache export (format {EXPORT_FORMAT})")
+    return doc
@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import json
+import zlib
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterable
+from contextlib import suppress
+from functools import lru_cache
+
+from packaging.specifiers import InvalidSpecifier, SpecifierSet
+from packaging.version import InvalidVersion, Version
+
+from animadao.index_api import _file_version, simple_html_files
+
+# version policies `VersionChecker` can apply on top of a release history ("latest" needs none)
+POLICIES = ("latest", "final", "major", "python")
+
+
+@lru_cache(maxsize=65536)
+def _parse(raw: str) -> Version:
+    return Version(raw)
+
+
+@lru_cache(maxsize=1024)
+def _specifier(raw: str) -> SpecifierSet | None:
+    try:
+        return SpecifierSet(raw)
+    except InvalidSpecifier:
+        return None
+
+
+class ReleaseHistory:
+    """
+    Every release of one project, sorted by version, with yanked flags and `requires-python`.
+
+    Stored as compressed JSON (`to_blob` / `from_blob`): the version strings in order, the indexes
+    of yanked releases and `requires-python` as runs (`[first index, specifier]`), which neighbouring
+    releases nearly always share. Versions are parsed lazily while bisecting, so a query parses
+    O(log n) of them instead of the whole list; "newest release matching X" walks down from the
+    bisection point and usually stops at the first candidate.
+    """
+
+    __slots__ = ("versions", "yanked", "_runs", "_run_starts")
+
+    def __init__(
+        self, versions: list[str], yanked: Iterable[int] = (), runs: list[tuple[int, str | None]] | None = None
+    ) -> None:
+        self.versions = versions  # normalized, ascending
+        self.yanked = frozenset(yanked)
+        self._runs = runs or []
+        self._run_starts = [start for start, _spec in self._runs]
+
+    # -------- building --------
+    @classmethod
+    def build(cls, releases: Iterable[tuple[str, bool, str | None]]) -> ReleaseHistory:
+        """From `(version, yanked, requires_python)` rows in any order; invalid versions are dropped."""
+        parsed: dict[Version, tuple[bool, str | None]] = {}
+        for raw, yanked, requires_python in releases:
+            with suppress(InvalidVersion):
+                parsed[Version(str(raw))] = (bool(yanked), requires_python or None)
+        ordered = sorted(parsed)
+        runs: list[tuple[int, str | None]] = []
+        for i, v in enumerate(ordered):
+            spec = parsed[v][1]
+            if not runs or runs[-1][1] != spec:
+                runs.append((i, spec))
+        return cls([str(v) for v in ordered], (i for i, v in enumerate(ordered) if parsed[v][0]), runs)
+
+    @classmethod
+    def from_json_api(cls, doc: dict) -> ReleaseHistory:
+        """From a JSON API project document (`releases`); releases without files are skipped."""
+        return cls.build(_releases_of(doc.get("releases") or {}, "requires_python"))
+
+    @classmethod
+    def from_simple(cls, data: dict) -> ReleaseHistory:
+        """From a PEP 691 project page (or `simple_html_files` wrapped as `{"files": ...}`)."""
+        by_version: dict[str, list[dict]] = {}
+        for f in data.get("files") or []:
+            v = _file_version(str(f.get("filename", "")))
+            if v is not None:
+                by_version.setdefault(str(v), []).append(f)
+        return cls.build(_releases_of(by_version, "requires-python"))
+
+    @classmethod
+    def from_simple_html(cls, text: str) -> ReleaseHistory:
+        return cls.from_simple({"files": simple_html_files(text)})
+
+    # -------- storage --------
+    def to_blob(self) -> bytes:
+        doc = {"v": self.versions, "y": sorted(self.yanked), "rp": [list(r) for r in self._runs]}
+        return zlib.compress(json.dumps(doc, separators=(",", ":")).encode("utf-8"))
+
+    @classmethod
+    def from_blob(cls, blob: bytes) -> ReleaseHistory:
+        doc = json.loads(zlib.decompress(blob))
+        return cls(list(doc["v"]), doc.get("y", ()), [(int(i), s) for i, s in doc.get("rp", [])])
+
+    # -------- queries --------
+    def __len__(self) -> int:
+        return len(self.versions)
+
+    def _find(self, version: Version) -> int | None:
+        i = bisect_left(self.versions, version, key=_parse)
+        return i if i < len(self.versions) and _parse(self.versions[i]) == version else None
+
+    def __contains__(self, version: object) -> bool:
+        return isinstance(version, Version) and self._find(version) is not None
+
+    def is_yanked(self, version: Version) -> bool:
+        """True when `version` was released and all of its files are yanked."""
+        i = self._find(version)
+        return i is not None and i in self.yanked
+
+    def requires_python(self, version: Version) -> str | None:
+        i = self._find(version)
+        return None if i is None else self._requires_python(i)
+
+    def _requires_python(self, i: int) -> str | None:
+        run = bisect_right(self._run_starts, i) - 1
+        return self._runs[run][1] if run >= 0 else None
+
+    def _admits(self, i: int, python: Version) -> bool:
+        raw = self._requires_python(i)
+        spec = _specifier(raw) if raw else None
+        return spec is None or spec.contains(python, prereleases=True)
+
+    def latest(
+        self, *, prereleases: bool = False, below: Version | None = None, python: Version | None = None
+    ) -> Version | None:
+        """
+        Newest non-yanked release, optionally lower than `below` and installable on `python`.
+        Pre-releases only count with `prereleases=True`.
+        """
+        hi = len(self.versions) if below is None else bisect_left(self.versions, below, key=_parse)
+        for i in range(hi - 1, -1, -1):
+            if i in self.yanked or (python is not None and not self._admits(i, python)):
+                continue
+            v = _parse(self.versions[i])
+            if prereleases or not v.is_prerelease:
+                return v
+        return None
+
+    def latest_within_major(self, current: Version, **kwargs: object) -> Version | None:
+        """`latest` restricted to `current`'s major version (`1.4.2` -> anything below `2.dev0`)."""
+        ceiling = Version(f"{current.epoch}!{current.major + 1}.dev0")
+        return self.latest(below=ceiling, **kwargs)  # type: ignore[arg-type]
+
+    def select(self, policy: str, current: Version | None = None, python: Version | None = None) -> Version | None:
+        """The newest release allowed by a `POLICIES` entry (`major` needs `current`, `python` needs `python`)."""
+        if policy == "major" and current is not None:
+            return self.latest_within_major(current)
+        if policy == "python" and python is not None:
+            return self.latest(python=python)
+        if policy == "latest":  # like `info.version`: pre-releases only when there is nothing else
+            return self.latest() or self.latest(prereleases=True)
+        return self.latest()
+
+
+def _releases_of(files_by_version: dict[str, list[dict]], rp_key: str) -> Iterable[tuple[str, bool, str | None]]:
+    """`(version, yanked, requires_python)`: yanked when every file is; the first live file's `requires-python`."""
+    for version, files in files_by_version.items():
+        if not files:
+            continue
+        live = [f for f in files if not f.get("yanked")]
+        yield version, not live, (live or files)[0].get(rp_key)
+
+
+def lowest_python(requires_python: str | None) -> Version | None:
+    """The oldest `3.x.y` a `requires-python` specifier admits (`>=3.9,<4` -> 3.9.0); None if unparseable."""
+    spec = _specifier(requires_python) if requires_python else None
+    if spec is None:
+        return None
+    candidates = (Version(f"3.{minor}.{micro}") for minor in range(40) for micro in range(32))
+    return next((v for v in candidates if spec.contains(v)), None)
@@ -2,14 +2,18 @@ from __future__ import annotations
 
 import json
 from collections.abc import Iterable
+from contextlib import nullcontext
 from dataclasses import asdict
 from pathlib import Path
 
 from packaging.requirements import Requirement
+from packaging.utils import canonicalize_name
 
-from animadao.dependency_checker import guess_unused, load_declared_deps_any
-from animadao.native import scan_imports
-from animadao.version_checker import VersionChecker
+from animadao.dependency_checker import guess_unused
+from animadao.dist_index import DistIndex, InstalledVersions
+from animadao.manifest import ProjectManifest
+from animadao.scan_session import ScanSession
+from animadao.version_checker import Outdated, VersionChecker
 
 
 def _apply_ignore(names: Iterable[str], ignore: set[str] | None) -> list[str]:
@@ -19,6 +23,39 @@ def _apply_ignore(names: Iterable[str], ignore: set[str] | None) -> list[str]:
     return [n for n in names if n.lower() not in ig]
 
 
+def environment_matrix(
+    installed: dict[str, dict[str, str]], outdated: dict[str, list[Outdated]], ignore: set[str] | None = None
+) -> dict:
+    """
+    Report section for a multi-environment audit.
+
+    - `outdated`: every outdated package with the environment it was found in (`env`)
+    - `environments`: per-environment installed / outdated counts
+    - `matrix`: `{package: {"latest": ..., "current": {env: version}}}` for outdated packages
+    - `lookups`: distinct names resolved against PyPI (shared by all environments)
+    """
+    ig = {s.lower() for s in (ignore or set())}
+    rows: list[dict] = []
+    matrix: dict[str, dict] = {}
+    for env, items in outdated.items():
+        for o in items:
+            if o.name.lower() in ig:
+                continue
+            rows.append({**asdict(o), "env": env})
+            cell = matrix.setdefault(canonicalize_name(o.name), {"latest": o.latest, "current": {}})
+            cell["current"][env] = o.current
+    return {
+        "outdated": rows,
+        "unpinned": [],
+        "environments": {
+            env: {"installed": len(installed.get(env, {})), "outdated": sum(r["env"] == env for r in rows)}
+            for env in outdated
+        },
+        "matrix": dict(sorted(matrix.items())),
+        "lookups": len({canonicalize_name(n) for per_env in installed.values() for n in per_env}),
+    }
+
+
 def _render_md(data: dict) -> str:
     lines: list[str] = []
     s = data["summary"]
@@ -31,7 +68,12 @@ def _render_md(data: dict) -> str:
         f"**unused:** {s['unused']}\n"
     )
     lines.append(summary)
-    if data["outdated"]:
+    if data["outdated"] and "environments" in data:
+        lines.append("## Outdated\n\n| environment | package | current | latest |\n|---|---|---:|---:|")
+        for o in data["outdated"]:
+            lines.append(f"| {o['env']} | {o['name']} | {o['current']} | {o['latest']} |")
+        lines.append("")
+    elif data["outdated"]:
         lines.append("## Outdated\n\n| package | current | latest |\n|---|---:|---:|")
         for o in data["outdated"]:
             lines.append(f"| {o['name']} | {o['current']} | {o['latest']} |")
@@ -68,7 +110,10 @@ def _render_html(data: dict) -> str:
         f"&nbsp; <b>outdated:</b> {s['outdated']} &nbsp; <b>unpinned:</b> {s['unpinned']} "
         f"&nbsp; <b>unused:</b> {s['unused']}</p>",
     ]
-    if data["outdated"]:
+    if data["outdated"] and "environments" in data:
+        rows = [[o["env"], o["name"], o["current"], o["latest"]] for o in data["outdated"]]
+        parts += ["<h2>Outdated</h2>", table(rows, ["environment", "package", "current", "latest"])]
+    elif data["outdated"]:
         rows = [[o["name"], o["current"], o["latest"]] for o in data["outdated"]]
         parts += ["<h2>Outdated</h2>", table(rows, ["package", "current", "latest"])]
     if data["unpinned"]:
@@ -86,49 +131,63 @@ def generate_report(
     out_path: Path | None = None,
     *,
     src_roots: list[Path] | None = None,
-    mode: str = "declared",  # declared | installed
+    mode: str = "declared",  # declared | installed | locked
     ignore: set[str] | None = None,  # ignore package by name (case-insensitive)
     ttl_seconds: int = 86400,
     concurrency: int = 8,
     output_format: str = "json",  # json | md | html
+    session: ScanSession | None = None,  # shared import scan; built from the roots above if omitted
+    manifest: ProjectManifest | None = None,  # parsed declarations; loaded (memoized) from project_root if omitted
+    checker: VersionChecker | None = None,  # PyPI client; built from ttl_seconds / concurrency if omitted
+    site_dirs: list[Path] | None = None,  # installed mode: environment to audit; the running one if omitted
+    environments: list[Path] | None = None,  # installed mode: audit several environments (see `environment_matrix`)
 ) -> Path:
     """
     Generate a report (json/md/html) by selected mode.
+
+    Imports come from one `ScanSession` over all roots (`session`, else `src_roots`, else `src_root`,
+    else the project root) and are reused by every phase. Declarations come from `manifest`.
     """
-    roots: list[Path]
-    if src_roots:
-        roots = list(src_roots)
-    elif src_root:
-        roots = [src_root]
-    else:
-        roots = [project_root]
+    if session is None:
+        roots: list[Path]
+        if src_roots:
+            roots = list(src_roots)
+        elif src_root:
+            roots = [src_root]
+        else:
+            roots = [project_root]
+        session = ScanSession(roots)
 
     # Collect imports across all roots using Rust fast-path (falls back to Python internally)
-    imports: set[str] = set(scan_imports([str(p) for p in roots]))
-    if not (project_root / "pyproject.toml").is_file() and not (project_root / "requirements.txt").is_file():
+    imports: set[str] = session.imports
+    manifest = manifest or ProjectManifest.load(project_root)
+    if not manifest.has_sources:
         raise FileNotFoundError(f"No pyproject.toml or requirements.txt in: {project_root}")
 
     ignore = {s.lower() for s in (ignore or set())}
 
     declared_reqs: list[Requirement] = []
-
-    if mode == "declared":
-        declared_reqs = load_declared_deps_any(project_root).requirements
-        imports = set(scan_imports([str(src_root or project_root)]))
-        # Version check on declared
-        checker = VersionChecker(ttl_seconds=ttl_seconds, concurrency=concurrency)
-        outdated, unpinned = checker.check_declared(declared_reqs)
-    elif mode == "installed":
-        # collect the installed packages
-        from importlib import metadata as im
-
-        installed = {d.metadata["Name"]: d.version for d in im.distributions()}
-        checker = VersionChecker(ttl_seconds=ttl_seconds, concurrency=concurrency)
-        outdated, unpinned = checker.check_installed(installed)
-        # для installed импорт-скан имеет меньший смысл, но оставим для консистентности
-        imports = set(scan_imports([str(src_root or project_root)]))
-    else:
-        raise ValueError("mode must be 'declared' or 'installed'")
+    multi_env: dict | None = None
+    # a checker passed in belongs to the caller; one built here is closed here
+    ctx = VersionChecker(ttl_seconds=ttl_seconds, concurrency=concurrency) if checker is None else nullcontext(checker)
+    with ctx as checker:
+        if mode == "installed" and environments:
+            installed_by_env = InstalledVersions.for_environments(environments)
+            multi_env = environment_matrix(installed_by_env, checker.check_installed_many(installed_by_env), ignore)
+            outdated, unpinned = [], []
+        elif mode == "declared":
+            declared_reqs = manifest.declared.requirements
+            # Version check on declared
+            outdated, unpinned = checker.check_declared(declared_reqs)
+        elif mode == "installed":
+            # collect the installed packages
+            installed = InstalledVersions.for_target(site_packages=site_dirs or ()).versions
+            outdated, unpinned = checker.check_installed(installed)
+        elif mode == "locked":
+            # the resolved set from the lockfile: transitive deps too, no environment needed
+            outdated, unpinned = checker.check_installed(manifest.locked)
+        else:
+            raise ValueError("mode must be 'declared', 'installed' or 'locked'")
 
     # Ignore packages in the report
     outdated = [o for o in outdated if o.name.lower() not in ignore]
@@ -136,7 +195,8 @@ def generate_report(
 
     unused: list[str] = []
     if mode == "declared":
-        unused = [u for u in guess_unused(declared_reqs, imports) if u.lower() not in ignore]
+        guessed = guess_unused(declared_reqs, imports, DistIndex.for_environment())
+        unused = [u for u in guessed if u.lower() not in ignore]
 
     data = {
         "summary": {
@@ -151,7 +211,11 @@ def generate_report(
         "unused": unused,
         "imports": sorted(imports),
         "mode": mode,
+        "engine": session.engine_used,
     }
+    if multi_env is not None:
+        data.update(multi_env)
+        data["summary"]["outdated"] = len(multi_env["outdated"])
 
     # write to file
     out = out_path or (project_root / ("report." + ("json" if output_format == "json" else output_format)))
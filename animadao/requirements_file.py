@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import os
+import re
+from collections.abc import Iterator
+from functools import lru_cache
+from pathlib import Path
+from typing import NamedTuple
+
+from packaging.requirements import Requirement
+
+# Per-requirement options trail the spec: `pkg==1.0 --hash=sha256:...`.
+_TRAILING_OPTIONS = re.compile(r"\s+--?[A-Za-z]")
+# pip treats `#` as a comment only at line start or after whitespace (URLs keep `#egg=` / `#sha256=`).
+_COMMENT = re.compile(r"(^|\s+)#.*$")
+_EGG = re.compile(r"#(?:.*&)?egg=([A-Za-z0-9][A-Za-z0-9._-]*(?:\[[^\]]*\])?)")
+_URL = re.compile(r"^[a-z][a-z0-9+.-]*://", re.IGNORECASE)
+_VCS = re.compile(r"^(?:git|hg|svn|bzr)\+", re.IGNORECASE)
+
+
+class RequirementLine(NamedTuple):
+    """One declaration from a requirements file graph."""
+
+    path: str
+    lineno: int  # first physical line of the logical line
+    spec: str  # PEP 508 string, e.g. "requests==2.31.0" or "pkg @ https://..."
+    kind: str  # "requirement" | "editable" | "url" | "constraint"
+
+
+def iter_logical_lines(path: Path) -> Iterator[tuple[int, str]]:
+    """
+    Stream `(lineno, line)` from a requirements file without reading it whole.
+
+    Backslash continuations are joined (pip-compile's `--hash` blocks), comments are stripped and
+    blank lines skipped.
+    """
+    buf: list[str] = []
+    start = 0
+    with open(path, encoding="utf-8", errors="replace") as fh:
+        for lineno, raw in enumerate(fh, start=1):
+            line = raw.rstrip("\r\n")
+            if not buf:
+                start = lineno
+            if line.endswith("\\") and not _COMMENT.search(line):
+                buf.append(line[:-1])
+                continue
+            buf.append(line)
+            logical = _COMMENT.sub("", " ".join(buf)).strip()
+            buf = []
+            if logical:
+                yield start, logical
+    if buf:
+        logical = _COMMENT.sub("", " ".join(buf)).strip()
+        if logical:
+            yield start, logical
+
+
+def _option(line: str, short: str, long: str) -> str | None:
+    """Value of `-r x` / `-rx` / `--requirement x` / `--requirement=x`; None if `line` is another option."""
+    for flag in (long, short):
+        if line == flag:
+            return ""
+        if line.startswith(flag):
+            rest = line[len(flag) :]
+            if rest[:1] in (" ", "\t", "="):
+                return rest[1:].strip()
+            if flag == short and rest and not rest.startswith("-"):
+                return rest.strip()
+    return None
+
+
+def _egg_spec(target: str) -> str | None:
+    m = _EGG.search(target)
+    if not m:
+        return None
+    return f"{m.group(1)} @ {target.split('#', 1)[0]}" if _URL.match(target) else m.group(1)
+
+
+def _classify(target: str) -> tuple[str, str] | None:
+    """Requirement target -> (spec, kind), or None for local paths/archives without a name."""
+    name_part = target.split(";", 1)[0].split(" @ ", 1)[0]
+    if _VCS.match(target) or _URL.match(target) or target.startswith((".", "/", "~")) or os.sep in name_part:
+        spec = _egg_spec(target)
+        return (spec, "url") if spec else None
+    return target, "requirement"
+
+
+def iter_requirement_lines(path: Path, visited: set[Path] | None = None) -> Iterator[RequirementLine]:
+    """
+    Walk a requirements file and everything it includes, streaming declarations.
+
+    - `-r/--requirement` includes and `-c/--constraint` files are followed to any depth; each file
+      is read once (`visited` collects resolved paths and doubles as the cycle guard).
+      Remote includes (`-r https://...`) are skipped.
+    - Entries from constraint files (and their includes) come out with `kind="constraint"`.
+    - `-e/--editable` and URL/VCS lines yield a spec only when they name the project (`#egg=name`
+      or `name @ url`); local paths without a name are skipped.
+    - Per-requirement options (`--hash=...`, `--config-settings ...`) and global options are dropped.
+    """
+    visited = set() if visited is None else visited
+    stack: list[tuple[Iterator[tuple[int, str]], Path, bool]] = []
+
+    def _push(p: Path, constraint: bool) -> None:
+        resolved = p.resolve()
+        if resolved in visited or not resolved.is_file():
+            return
+        visited.add(resolved)
+        stack.append((iter_logical_lines(resolved), resolved, constraint))
+
+    _push(path, False)
+    while stack:
+        lines, current, constraint = stack[-1]
+        try:
+            lineno, line = next(lines)
+        except (StopIteration, OSError):
+            stack.pop()
+            continue
+
+        if line.startswith("-"):
+            include = _option(line, "-r", "--requirement")
+            nested_constraint = False
+            if include is None:
+                include = _option(line, "-c", "--constraint")
+                nested_constraint = True
+            if include is not None:
+                if include and not _URL.match(include):
+                    _push(current.parent / include, constraint or nested_constraint)
+                continue
+            editable = _option(line, "-e", "--editable")
+            if editable:
+                classified = _classify(_TRAILING_OPTIONS.split(editable, 1)[0])
+                if classified:
+                    kind = "constraint" if constraint else "editable"
+                    yield RequirementLine(str(current), lineno, classified[0], kind)
+            # anything else is a global option (`--index-url ...`, `--pre`, ...)
+            continue
+
+        target = _TRAILING_OPTIONS.split(line, 1)[0].strip()
+        classified = _classify(target)
+        if classified:
+            spec, kind = classified
+            yield RequirementLine(str(current), lineno, spec, "constraint" if constraint else kind)
+
+
+@lru_cache(maxsize=65536)
+def parse_requirement(spec: str) -> Requirement | None:
+    """
+    `Requirement(spec)`, interned: identical strings (across files and projects) are parsed once.
+
+    The returned object is shared and must not be mutated. Returns None for invalid specs.
+    """
+    try:
+        return Requirement(spec)
+    except Exception:
+        return None
+
+
+def requirements_from_file(path: Path, visited: set[Path] | None = None) -> list[Requirement]:
+    """Declared (non-constraint) requirements of a requirements file graph, in file order."""
+    out: list[Requirement] = []
+    for line in iter_requirement_lines(path, visited):
+        if line.kind != "constraint" and (req := parse_requirement(line.spec)) is not None:
+            out.append(req)
+    return out
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import os
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import suppress
+from pathlib import Path
+
+from animadao.config import Config
+from animadao.import_index import ImportIndex, IndexStats
+from animadao.import_scanner import ImportRecord
+from animadao.native import iter_imports, resolve_engine, scan_imports
+from animadao.provenance import ProvenanceBuilder, ProvenanceIndex
+from animadao.walker import WalkOptions
+
+
+def canonical_roots(roots: Iterable[Path | str]) -> list[Path]:
+    """
+    Resolve roots and drop exact duplicates, keeping the order of first appearance.
+
+    `[".", "build/gen", "./build/gen"]` -> `[<abs .>, <abs build/gen>]`. A root nested in another
+    one is kept: the outer walk may prune it (`build/`, `.gitignore`, excludes), while an explicit
+    root is always scanned. Files reached from both are parsed once (`native.collect_files`).
+    """
+    resolved: list[Path] = []
+    for r in roots:
+        p = Path(os.path.realpath(r))
+        if p not in resolved:
+            resolved.append(p)
+    return resolved
+
+
+class ScanSession:
+    """
+    One import scan per run, shared by every phase that needs imports.
+
+    Roots are canonicalized (see `canonical_roots`), each file is parsed at most once, and the
+    result is memoized, so `generate_report`, the CLI commands and the pre-commit gate can ask
+    for imports as often as they like. With `index=True` the on-disk `ImportIndex` is used and
+    its counters are exposed as `stats`. With `provenance=True` the scan also (re)writes the
+    `ProvenanceIndex` for these roots, which `animadao why` answers from. `engine` is the
+    requested scan engine (see `native.resolve_engine`); `engine_used` tells which one ran.
+    """
+
+    def __init__(
+        self,
+        roots: Iterable[Path | str],
+        *,
+        workers: int | None = 1,
+        index: bool = False,
+        walk: WalkOptions | None = None,
+        source: str = "walk",
+        provenance: bool = False,
+        engine: str = "auto",
+    ) -> None:
+        self.roots = canonical_roots(roots)
+        self.workers = workers
+        self.walk = walk
+        self.source = source
+        self._index = ImportIndex.for_roots(self.roots) if index and self.roots else None
+        self.provenance = provenance
+        self.engine = engine
+        # what the `imports` scan will use; per-file consumers (index, provenance) can't use the Rust engine
+        self.engine_used = resolve_engine(engine, per_file=index or provenance)
+        self._imports: set[str] | None = None
+
+    @classmethod
+    def from_config(cls, project_root: Path, cfg: Config, roots: Iterable[Path | str] | None = None) -> ScanSession:
+        """
+        Session for a project: explicit `roots` (e.g. `--src`) win, then `[core].src`
+        (relative to the project root), then the project root itself.
+        """
+        chosen = [Path(r) for r in (roots or [])]
+        if not chosen:
+            chosen = [project_root / s for s in (cfg.src or [])] or [project_root]
+        return cls(
+            chosen,
+            workers=cfg.scan_workers,
+            index=cfg.import_index,
+            walk=cfg.walk_options(),
+            source=cfg.file_source,
+            provenance=cfg.provenance,
+            engine=cfg.engine,
+        )
+
+    @property
+    def imports(self) -> set[str]:
+        """Top-level imports across all roots (scanned on first access)."""
+        if self._imports is None:
+            if self.provenance:
+                self._imports = set(self.build_provenance().modules)
+            else:
+                self._imports = set(
+                    scan_imports(
+                        self.roots,
+                        workers=self.workers,
+                        index=self._index,
+                        walk=self.walk,
+                        source=self.source,
+                        engine=self.engine,
+                    )
+                )
+        return self._imports
+
+    @property
+    def provenance_path(self) -> Path:
+        return ProvenanceIndex.path_for(self.roots)
+
+    def build_provenance(self) -> ProvenanceIndex:
+        """Scan the roots once, persist the provenance index and return it (best effort on write)."""
+        builder = ProvenanceBuilder()
+        for rec in self.iter_records(on_file=builder.add_file):
+            builder.add(rec)
+        prov = builder.build()
+        with suppress(OSError):
+            prov.save(self.provenance_path)
+        self._imports = set(prov.modules)
+        return prov
+
+    def iter_records(self, on_file: Callable[[int, Path], None] | None = None) -> Iterator[ImportRecord]:
+        """Stream per-site import records across the session's roots (see `native.iter_imports`)."""
+        self.engine_used = resolve_engine(self.engine, per_file=True)
+        return iter_imports(
+            self.roots,
+            workers=self.workers,
+            index=self._index,
+            walk=self.walk,
+            source=self.source,
+            on_file=on_file,
+            engine=self.engine,
+        )
+
+    @property
+    def stats(self) -> IndexStats | None:
+        """Import-index counters of the scan, or None when no index is used."""
+        return self._index.stats if self._index else None
@@ -1,18 +1,43 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import os
+import subprocess
+import sys
 import time
-from collections.abc import Iterable
+from collections.abc import Awaitable, Callable, Coroutine, Iterable, Mapping, Sequence
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import suppress
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass, field
+from functools import partial
 from pathlib import Path
+from typing import TypeVar
 
 import httpx
 from packaging.requirements import Requirement
+from packaging.utils import canonicalize_name
 from packaging.version import Version
 from packaging.version import parse as parse_version
 
+from animadao.config import Config
+from animadao.http_session import HttpSession, RetryPolicy
+from animadao.index_api import (
+    PYPI,
+    PYPI_SIMPLE,
+    SIMPLE_ACCEPT,
+    SIMPLE_OR_HTML_ACCEPT,
+    InfoVersionScanner,
+    PackageIndex,
+    latest_from_simple,
+    latest_from_simple_html,
+)
+from animadao.manifest import ProjectManifest
+from animadao.pypi_cache import CacheEntry, HistoryEntry, PyPICache
+from animadao.release_history import POLICIES, ReleaseHistory, lowest_python
+
+T = TypeVar("T")
+
 
 @dataclass(frozen=True)
 class Outdated:
@@ -31,35 +56,29 @@ class Unpinned:
     spec: str
 
 
-class PyPICache:
-    """
-    Very small file cache for /pypi/{name}/json with ETag + TTL.
-    File content: {"version": "...", "etag": "...", "ts": <epoch>}
-    """
+@dataclass
+class _IndexBatch:
+    """Per-index state of one `get_latest_versions` batch; writes are flushed once at the end."""
 
-    def __init__(self, ttl_seconds: int = 86400, cache_dir: Path | None = None) -> None:
-        base = Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")).expanduser()
-        self.dir = (cache_dir or (base / "animadao" / "pypi")).resolve()
-        self.dir.mkdir(parents=True, exist_ok=True)
-        self.ttl = ttl_seconds
+    index: PackageIndex
+    cache: PyPICache
+    cached: dict[str, CacheEntry]
+    missing: set[str]
+    fetched: list[tuple[str, str, str | None]] = field(default_factory=list)
+    gone: list[str] = field(default_factory=list)
+    histories: dict[str, HistoryEntry] = field(default_factory=dict)
+    fetched_histories: list[tuple[str, bytes, str | None]] = field(default_factory=list)
 
-    def _path(self, name: str) -> Path:
-        return self.dir / f"{name.lower()}.json"
-
-    def load(self, name: str) -> tuple[str | None, str | None, float]:
-        p = self._path(name)
-        if not p.is_file():
-            return None, None, 0.0
-        try:
-            data = json.loads(p.read_text(encoding="utf-8"))
-            return data.get("version"), data.get("etag"), float(data.get("ts", 0))
-        except Exception:
-            return None, None, 0.0
 
-    def save(self, name: str, version: str, etag: str | None) -> None:
-        p = self._path(name)
-        payload = {"version": version, "etag": etag, "ts": time.time()}
-        p.write_text(json.dumps(payload), encoding="utf-8")
+def _run_sync(coro: Coroutine[object, object, T]) -> T:
+    """Run `coro` to completion from sync code, even if an event loop is already running."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    # Called from inside a loop (e.g. an async test or notebook): use a private loop in a worker thread.
+    with ThreadPoolExecutor(max_workers=1) as ex:
+        return ex.submit(asyncio.run, coro).result()
 
 
 class VersionChecker:
@@ -67,13 +86,34 @@ class VersionChecker:
     Backward-compatible version checker.
 
     - __init__ now accepts optional `requirements` (legacy behavior),
-      plus keyword-only TTL & concurrency (reserved).
+      plus keyword-only TTL & concurrency.
     - get_latest_version(name) is back (sync) for monkeypatching in tests.
+    - get_latest_versions(names) resolves many names at once through an asyncio engine
+      (one shared connection pool, at most `concurrency` requests in flight, duplicates single-flighted).
+    - all requests go through one long-lived `HttpSession` (keep-alive, retries, rate limit, one
+      circuit breaker per index); while an index's breaker is open its lookups are answered from
+      the cache only and fall through to the next index.
+    - `offline=True` answers every lookup from the cache, whatever its age, and never opens a
+      connection (cache misses come back as None).
+    - with `stale_seconds`, entries up to that long past their TTL are served at once and queued in
+      `self.stale`; `revalidate()` refreshes them after the run (in a detached process by default),
+      so the answer costs a disk read. 404s are cached too, for `negative_ttl` seconds.
+    - `index_urls` replaces pypi.org with one or more indexes (JSON API or Simple API bases, see
+      `PackageIndex.parse`), asked in order: a 404 or an unreachable index falls through to the
+      next. Each index has its own cache (`self.caches`; `self.cache` is the first one).
+    - with `hedge_delay` and several indexes, a lookup the current index hasn't answered within
+      that many seconds is also sent to the next index; the first answer wins and the other request
+      is cancelled (`session.stats.hedged` / `hedge_wins`).
+    - `get_release_histories(names)` fetches each project's whole release list once (full JSON /
+      Simple API document) and caches it compactly; `policy` other than "latest" compares pins with
+      the newest release it allows (`final`, same `major`, installable on `python_version`) from
+      that history, and records yanked pins in `self.yanked`.
     - check_declared(Optional[list[Requirement]]) and check_installed(mapping)
       compare against PyPI latest using cache.
     """
 
-    PYPI_JSON = "https://pypi.org/pypi/{name}/json"
+    # once `info.version` is read, finish the body (to keep the connection) only if this little is left
+    DRAIN_LIMIT = 256 * 1024
 
     def __init__(
         self,
@@ -81,11 +121,94 @@ class VersionChecker:
         *,
         ttl_seconds: int = 86400,
         concurrency: int = 8,
+        http2: bool = False,
+        retries: int = 3,
+        rate_limit: float = 0.0,
+        api: str = "stream",
+        stale_seconds: int = 0,
+        revalidate: str = "end",
+        negative_ttl: int = 3600,
+        offline: bool = False,
+        index_urls: Sequence[str] | None = None,
+        hedge_delay: float = 0.0,
+        policy: str = "latest",
+        python_version: str | None = None,
+        project: Path | None = None,
+        session: HttpSession | None = None,
     ) -> None:
         self._requirements: list[Requirement] = requirements or []
-        self.cache = PyPICache(ttl_seconds=ttl_seconds)
-        # `concurrency` зарезервирован под будущий async-bulk, здесь не критичен
+        # how the latest version is read, see `index_api.API_MODES`
+        self.api = api
+        self.indexes = [PackageIndex.parse(u) for u in index_urls or ()] or [PYPI_SIMPLE if api == "simple" else PYPI]
+        self.caches = [
+            PyPICache(ttl_seconds=ttl_seconds, negative_ttl=negative_ttl, index_url=ix.url if ix.namespace else None)
+            for ix in self.indexes
+        ]
+        self.cache = self.caches[0]
+        # seconds before a slow lookup is duplicated to the next index (0 -> never)
+        self.hedge_delay = max(0.0, float(hedge_delay))
+        # stale-while-revalidate window past the TTL (0 -> expired entries wait for the network)
+        self.stale_seconds = max(0, int(stale_seconds))
+        # "end" -> `revalidate()` fetches in-process; "background" -> it hands off to a detached process
+        self.revalidate_mode = revalidate
+        # names answered from expired entries, refreshed by `revalidate()`
+        self.stale: set[str] = set()
+        # project whose config the background refresh loads (None -> the current directory's)
+        self.project = project
+        # cache only, no network at all
+        self.offline = offline
+        # which release a pin is compared with, see `release_history.POLICIES`
+        if policy not in POLICIES:
+            raise ValueError(f"unknown version policy {policy!r} (expected one of {', '.join(POLICIES)})")
+        self.policy = policy
+        # interpreter the `python` policy checks `requires-python` against (default: this one)
+        self.python = parse_version(python_version or "{}.{}.{}".format(*sys.version_info[:3]))
+        # pins whose release is yanked (name -> version), filled by checks under a history policy
+        self.yanked: dict[str, str] = {}
+        # upper bound of simultaneous PyPI requests in get_latest_versions()
         self.concurrency = max(1, int(concurrency))
+        self.session = session or HttpSession(
+            concurrency=self.concurrency, http2=http2, retry=RetryPolicy(retries=max(0, retries)), rate_limit=rate_limit
+        )
+
+    @classmethod
+    def from_config(cls, cfg: Config, project: Path | None = None) -> VersionChecker:
+        """
+        Checker for `cfg`. With `version_policy = "python"` and no `target_python`, the oldest
+        Python the `project`'s `requires-python` admits is the target.
+        """
+        python = cfg.target_python
+        if python is None and cfg.version_policy == "python" and project is not None:
+            lowest = lowest_python(ProjectManifest.load(project).requires_python)
+            python = str(lowest) if lowest else None
+        return cls(
+            ttl_seconds=cfg.pypi_ttl_seconds,
+            concurrency=cfg.pypi_concurrency,
+            http2=cfg.pypi_http2,
+            retries=cfg.pypi_retries,
+            rate_limit=cfg.pypi_rate_limit,
+            api=cfg.pypi_api,
+            stale_seconds=cfg.pypi_stale_seconds,
+            revalidate=cfg.pypi_revalidate,
+            negative_ttl=cfg.pypi_negative_ttl,
+            offline=cfg.pypi_offline,
+            index_urls=cfg.index_urls,
+            hedge_delay=cfg.pypi_hedge_delay,
+            policy=cfg.version_policy,
+            python_version=python,
+            project=project,
+        )
+
+    def close(self) -> None:
+        self.session.close()
+        for cache in self.caches:
+            cache.close()
+
+    def __enter__(self) -> VersionChecker:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
 
     # -------- compatibility method (used by tests to monkeypatch) --------
     def get_latest_version(self, name: str) -> Version | None:
@@ -93,36 +216,445 @@ class VersionChecker:
         Return latest version from PyPI for `name`, with ETag/TTL cache.
         Sync on purpose so tests can monkeypatch it easily.
         """
-        cached_ver, etag, ts = self.cache.load(name)
-        # valid TTL?
-        if cached_ver and (time.time() - ts) < self.cache.ttl:
+        if self.offline:
+            return self._from_cache_only([name])[name]
+        if self._hedging():  # racing indexes needs the async engine
+            return _run_sync(self._aget_latest_versions([name]))[name]
+        for index, cache in zip(self.indexes, self.caches, strict=True):
+            entry = cache.load(name)
+            hit, value = self._answer_from_cache(name, entry, cache.load_missing([name]), cache)
+            if not hit:
+                value = self._fetch(index, cache, name, entry)
+            if value is not None:
+                return value
+        return None
+
+    def _fetch(self, index: PackageIndex, cache: PyPICache, name: str, entry: CacheEntry) -> Version | None:
+        cached_ver, etag, _ts = entry
+        try:
+            url, headers = self._request(index, name, etag)
+            r = self.session.get(url, headers=headers, stream=True, index=index.url)
             try:
-                return parse_version(cached_ver)
-            except Exception:
-                pass
+                if r.status_code == 404:
+                    return self._not_found(cache, name)
+                if self._not_modified(r, cached_ver):
+                    return self._store(cache, name, cached_ver, r, etag=etag)
+                return self._store(cache, name, self._read_latest(r, index), r)
+            finally:
+                self.session.stats.bytes_received += r.num_bytes_downloaded
+                r.close()
+        except Exception:
+            return self._parse_or_none(cached_ver)
+
+    # -------- async bulk engine --------
+    def get_latest_versions(self, names: Iterable[str]) -> dict[str, Version | None]:
+        """
+        Resolve latest versions for many names at once; keys mirror the given names.
+
+        Lookups fan out over one shared `httpx.AsyncClient` pool, at most `self.concurrency` at a time.
+        Names that canonicalize to the same project (`PyYAML` / `pyyaml`) are fetched once.
+        If `get_latest_version` is monkeypatched (class or instance), it is called per name instead.
+        """
+        ordered = list(dict.fromkeys(names))
+        if not ordered:
+            return {}
+        if self.offline:
+            return self._from_cache_only(ordered)
+        if self._latest_overridden():
+            return {n: self.get_latest_version(n) for n in ordered}
+        return _run_sync(self._aget_latest_versions(ordered))
+
+    def refresh(self, names: Iterable[str]) -> dict[str, Version | None]:
+        """Look `names` up on the index regardless of cache age (conditional requests still apply)."""
+        ordered = list(dict.fromkeys(names))
+        if not ordered:
+            return {}
+        if self.offline:
+            return self._from_cache_only(ordered)
+        return _run_sync(self._aget_latest_versions(ordered, force=True))
+
+    def revalidate(self, background: bool | None = None) -> list[str]:
+        """
+        Refresh the entries served stale so far and return their names.
 
-        headers = {}
-        if etag:
-            headers["If-None-Match"] = etag
+        In background mode (`revalidate="background"` unless overridden) the lookups run in a
+        detached `python -m animadao cache refresh` process and this returns immediately.
+        """
+        names = sorted(self.stale)
+        self.stale.clear()
+        if not names:
+            return names
+        if background if background is not None else self.revalidate_mode == "background":
+            self._spawn_refresh(names)
+        else:
+            self.refresh(names)
+        return names
+
+    def _spawn_refresh(self, names: list[str]) -> None:
+        cmd = [sys.executable, "-m", "animadao", "cache", "refresh", *names]
+        if self.project is not None:
+            cmd += ["--project", os.path.abspath(self.project)]
+        if self.indexes not in ([PYPI], [PYPI_SIMPLE]):
+            cmd += [arg for ix in self.indexes for arg in ("--index-url", ix.url)]
+        detach = {"creationflags": 0x00000008} if os.name == "nt" else {"start_new_session": True}  # DETACHED_PROCESS
+        with suppress(OSError):
+            subprocess.Popen(
+                cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, **detach
+            )
+
+    def _hedging(self) -> bool:
+        return self.hedge_delay > 0 and len(self.indexes) > 1
+
+    def run_stats(self) -> dict[str, int | float | None]:
+        """Request counters of this checker's session plus the hedge win rate (None before any hedge)."""
+        stats = self.session.stats
+        rate = round(stats.hedge_wins / stats.hedged, 3) if stats.hedged else None
+        return {**asdict(stats), "hedge_win_rate": rate}
+
+    def _latest_overridden(self) -> bool:
+        return "get_latest_version" in vars(self) or type(self).get_latest_version is not _DEFAULT_GET_LATEST
+
+    def _async_client(self) -> httpx.AsyncClient:
+        return self.session.async_client()
+
+    async def _aget_latest_versions(self, names: list[str], force: bool = False) -> dict[str, Version | None]:
+        sem = asyncio.Semaphore(self.concurrency)
+        inflight: dict[str, asyncio.Task[Version | None]] = {}
+        # one query per index for the whole batch; new entries saved in one transaction at the end
+        batches = [
+            _IndexBatch(ix, cache, cache.load_many(names), set() if force else cache.load_missing(names))
+            for ix, cache in zip(self.indexes, self.caches, strict=True)
+        ]
+
+        async with self._async_client() as client:
+
+            async def fetch(b: _IndexBatch, name: str) -> Version | None:
+                async with sem:
+                    return await self._afetch(client, b, name)
+
+            def from_cache(b: _IndexBatch, name: str) -> tuple[bool, Version | None]:
+                return (False, None) if force else self._answer_from_cache(name, b.cached[name], b.missing, b.cache)
+
+            async def on(b: _IndexBatch, name: str) -> Version | None:
+                hit, value = from_cache(b, name)
+                return value if hit else await fetch(b, name)
+
+            async def one(name: str) -> Version | None:
+                i = 0
+                while i < len(batches):
+                    b = batches[i]
+                    hit, value = from_cache(b, name)
+                    if not hit and self._hedging() and i + 1 < len(batches):
+                        value, both = await self._hedged(fetch(b, name), partial(on, batches[i + 1], name))
+                        i += both  # the next index has already answered (None) too
+                    elif not hit:
+                        value = await fetch(b, name)
+                    if value is not None:
+                        return value
+                    i += 1
+                return None
+
+            for n in names:
+                key = canonicalize_name(n)
+                if key not in inflight:
+                    inflight[key] = asyncio.create_task(one(n))
+            await asyncio.gather(*inflight.values())
+        for b in batches:
+            b.cache.save_many(b.fetched)
+            b.cache.save_missing(b.gone)
+        return {n: inflight[canonicalize_name(n)].result() for n in names}
+
+    async def _hedged(
+        self, primary: Awaitable[Version | None], hedge: Callable[[], Awaitable[Version | None]]
+    ) -> tuple[Version | None, bool]:
+        """
+        Await `primary`; if it takes longer than `hedge_delay`, start `hedge()` and take the first
+        non-None answer, cancelling the other. Returns `(answer, hedge_finished)`.
+        """
+        first = asyncio.ensure_future(primary)
+        done, _ = await asyncio.wait({first}, timeout=self.hedge_delay)
+        if done:
+            return first.result(), False
+        self.session.stats.hedged += 1
+        second = asyncio.ensure_future(hedge())
+        pending = {first, second}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in sorted(done, key=lambda t: t is second):  # a tie goes to the primary
+                if (value := task.result()) is not None:
+                    for loser in pending:
+                        loser.cancel()
+                    await asyncio.gather(*pending, return_exceptions=True)  # let it close its response
+                    self.session.stats.hedge_wins += task is second
+                    return value, task is second
+        return None, True
+
+    async def _afetch(self, client: httpx.AsyncClient, b: _IndexBatch, name: str) -> Version | None:
+        """Async `_fetch`, recording cache writes in `b`."""
+        cached_ver, etag, _ts = b.cached[name]
         try:
-            with httpx.Client(timeout=10.0) as client:
-                r = client.get(self.PYPI_JSON.format(name=name), headers=headers)
-                if r.status_code == 304 and cached_ver:
-                    return parse_version(cached_ver)
+            url, headers = self._request(b.index, name, etag)
+            r = await self.session.aget(client, url, headers=headers, stream=True, index=b.index.url)
+            try:
+                if r.status_code == 404:
+                    return self._not_found(b.cache, name, b.gone)
+                if self._not_modified(r, cached_ver):
+                    return self._store(b.cache, name, cached_ver, r, b.fetched, etag=etag)
+                return self._store(b.cache, name, await self._aread_latest(r, b.index), r, b.fetched)
+            finally:
+                self.session.stats.bytes_received += r.num_bytes_downloaded
+                await r.aclose()
+        except Exception:
+            return self._parse_or_none(cached_ver)
+
+    # -------- release histories --------
+    def get_release_histories(self, names: Iterable[str], force: bool = False) -> dict[str, ReleaseHistory | None]:
+        """
+        Every release of each of `names` (keys mirror the given names), one request per project.
+
+        Cached histories younger than the TTL are used as is; expired ones are revalidated with
+        their ETag. The document also refreshes the cached latest version. Offline, any cached
+        history is used. Hedging doesn't apply: indexes are asked strictly in order.
+        """
+        ordered = list(dict.fromkeys(names))
+        if not ordered:
+            return {}
+        if self.offline:
+            out: dict[str, ReleaseHistory | None] = dict.fromkeys(ordered)
+            for cache in self.caches:
+                pending = [n for n in ordered if out[n] is None]
+                for n, (blob, _etag, _ts) in cache.load_histories(pending).items():
+                    out[n] = ReleaseHistory.from_blob(blob) if blob else None
+            return out
+        return _run_sync(self._aget_histories(ordered, force))
+
+    async def _aget_histories(self, names: list[str], force: bool) -> dict[str, ReleaseHistory | None]:
+        sem = asyncio.Semaphore(self.concurrency)
+        inflight: dict[str, asyncio.Task[ReleaseHistory | None]] = {}
+        batches = [
+            _IndexBatch(
+                ix, cache, {}, set() if force else cache.load_missing(names), histories=cache.load_histories(names)
+            )
+            for ix, cache in zip(self.indexes, self.caches, strict=True)
+        ]
+
+        async with self._async_client() as client:
+
+            async def one(name: str) -> ReleaseHistory | None:
+                for b in batches:
+                    if name in b.missing:
+                        continue
+                    blob, _etag, ts = b.histories[name]
+                    if blob and not force and time.time() - b.cache.checked_at(ts) < b.cache.ttl:
+                        return ReleaseHistory.from_blob(blob)
+                    async with sem:
+                        history = await self._afetch_history(client, b, name)
+                    if history is not None:
+                        return history
+                return None
+
+            for n in names:
+                key = canonicalize_name(n)
+                if key not in inflight:
+                    inflight[key] = asyncio.create_task(one(n))
+            await asyncio.gather(*inflight.values())
+        for b in batches:
+            b.cache.save_histories(b.fetched_histories)
+            b.cache.save_many(b.fetched)
+            b.cache.save_missing(b.gone)
+        return {n: inflight[canonicalize_name(n)].result() for n in names}
+
+    async def _afetch_history(self, client: httpx.AsyncClient, b: _IndexBatch, name: str) -> ReleaseHistory | None:
+        """Fetch and parse the whole project document of `name` on `b.index`, recording cache writes in `b`."""
+        blob, etag, _ts = b.histories[name]
+        try:
+            url, headers = self._request(b.index, name, etag)
+            r = await self.session.aget(client, url, headers=headers, index=b.index.url)
+            self.session.stats.bytes_received += r.num_bytes_downloaded
+            if r.status_code == 404:
+                return self._not_found(b.cache, name, b.gone)
+            if r.status_code == 304 and blob:
+                history = ReleaseHistory.from_blob(blob)
+            else:
                 r.raise_for_status()
-                data = r.json()
-                v_str = data["info"]["version"]
-                new_etag = r.headers.get("ETag")
-                self.cache.save(name, v_str, new_etag)
-                return parse_version(v_str)
+                history = self._history_from_document(r, r.content, b.index)
+                with suppress(Exception):  # the same document answers the latest-version lookup
+                    self._store(b.cache, name, self._from_document(r, r.content, b.index), r, b.fetched)
+            b.fetched_histories.append((name, history.to_blob(), r.headers.get("ETag") or etag))
+            return history
+        except Exception:
+            return ReleaseHistory.from_blob(blob) if blob else None
+
+    @staticmethod
+    def _history_from_document(r: httpx.Response, body: bytes, index: PackageIndex) -> ReleaseHistory:
+        if index.api != "simple":
+            return ReleaseHistory.from_json_api(json.loads(body))
+        if "html" in r.headers.get("Content-Type", ""):
+            return ReleaseHistory.from_simple_html(body.decode(r.encoding or "utf-8", "replace"))
+        return ReleaseHistory.from_simple(json.loads(body))
+
+    def latest_by_policy(self, current: Mapping[str, Version]) -> dict[str, Version | None]:
+        """
+        The version each of `current` is compared with under `self.policy`: the index's latest for
+        "latest", otherwise the newest release the policy allows in the project's release history.
+        """
+        if self.policy == "latest":
+            return self.get_latest_versions(current)
+        return self._select(current, self.get_release_histories(current))
+
+    def _select(
+        self, current: Mapping[str, Version], histories: Mapping[str, ReleaseHistory | None]
+    ) -> dict[str, Version | None]:
+        out: dict[str, Version | None] = {}
+        for name, cur in current.items():
+            history = histories.get(name)
+            if history is None:
+                out[name] = None
+                continue
+            if history.is_yanked(cur):
+                self.yanked[name] = str(cur)
+            out[name] = history.select(self.policy, cur, self.python)
+        return out
+
+    # -------- shared cache/response helpers --------
+    def _from_cache_only(self, names: list[str]) -> dict[str, Version | None]:
+        """Offline answers: the first index's cached version regardless of TTL, None when never seen."""
+        out: dict[str, Version | None] = dict.fromkeys(names)
+        for cache in self.caches:
+            pending = [n for n in names if out[n] is None]
+            for n, (cached_ver, _etag, _ts) in cache.load_many(pending).items():
+                out[n] = self._parse_or_none(cached_ver)
+        return out
+
+    def _answer_from_cache(
+        self, name: str, entry: CacheEntry, missing: set[str], cache: PyPICache | None = None
+    ) -> tuple[bool, Version | None]:
+        """
+        `(True, value)` when no request is needed: a fresh entry, a recent 404, or an expired entry
+        still inside the stale window (then `name` is queued for `revalidate()`). Age counts from
+        the last changelog sync that confirmed the entry, if any (`PyPICache.checked_at`).
+        """
+        if name in missing:
+            return True, None
+        cached_ver, _etag, ts = entry
+        if not cached_ver:
+            return False, None
+        age = time.time() - (cache or self.cache).checked_at(ts)
+        if age < self.cache.ttl:
+            return True, self._parse_or_none(cached_ver)
+        if age < self.cache.ttl + self.stale_seconds:
+            self.stale.add(name)
+            return True, self._parse_or_none(cached_ver)
+        return False, None
+
+    @staticmethod
+    def _conditional_headers(etag: str | None) -> dict[str, str]:
+        return {"If-None-Match": etag} if etag else {}
+
+    @staticmethod
+    def _parse_or_none(ver: str | None) -> Version | None:
+        if not ver:
+            return None
+        try:
+            return parse_version(ver)
         except Exception:
-            if cached_ver:
-                try:
-                    return parse_version(cached_ver)
-                except Exception:
-                    return None
             return None
 
+    def _mode(self, index: PackageIndex) -> str:
+        """How responses of `index` are read: `simple`, or `stream` / `json` for JSON API bases."""
+        return "simple" if index.api == "simple" else ("json" if self.api == "json" else "stream")
+
+    def _request(self, index: PackageIndex, name: str, etag: str | None) -> tuple[str, dict[str, str]]:
+        headers = self._conditional_headers(etag)
+        if index.api == "simple":
+            # pypi.org always speaks PEP 691; mirrors may only have PEP 503 HTML
+            headers["Accept"] = SIMPLE_ACCEPT if index.namespace is None else SIMPLE_OR_HTML_ACCEPT
+        return index.project_url(name), headers
+
+    @staticmethod
+    def _not_found(cache: PyPICache, name: str, batch: list[str] | None = None) -> None:
+        """Remember a 404 (appended to `batch` for a later `save_missing` when given)."""
+        if batch is not None:
+            batch.append(name)
+        else:
+            cache.save_missing([name])
+        return None
+
+    @staticmethod
+    def _not_modified(r: httpx.Response, cached_ver: str | None) -> bool:
+        """True for a 304 we can answer from cache; raises for other error statuses."""
+        if r.status_code == 304 and cached_ver:
+            return True
+        r.raise_for_status()
+        return False
+
+    @staticmethod
+    def _from_document(r: httpx.Response, body: bytes, index: PackageIndex) -> str | None:
+        if index.api != "simple":
+            return json.loads(body)["info"]["version"]
+        if "html" in r.headers.get("Content-Type", ""):
+            return latest_from_simple_html(body.decode(r.encoding or "utf-8", "replace"))
+        return latest_from_simple(json.loads(body))
+
+    def _worth_draining(self, r: httpx.Response) -> bool:
+        length = r.headers.get("Content-Length", "")
+        return length.isdigit() and int(length) - r.num_bytes_downloaded <= self.DRAIN_LIMIT
+
+    def _read_latest(self, r: httpx.Response, index: PackageIndex) -> str | None:
+        """Latest version from a streamed response, reading as little of the body as the API mode allows."""
+        if self._mode(index) != "stream":
+            return self._from_document(r, r.read(), index)
+        chunks = r.iter_bytes()
+        scanner = InfoVersionScanner()
+        version = None
+        for chunk in chunks:
+            version = scanner.feed(chunk)
+            if version is not None or scanner.done:
+                break
+        if self._worth_draining(r):
+            for _ in chunks:
+                pass
+        return version
+
+    async def _aread_latest(self, r: httpx.Response, index: PackageIndex) -> str | None:
+        """Async `_read_latest`."""
+        if self._mode(index) != "stream":
+            return self._from_document(r, await r.aread(), index)
+        chunks = r.aiter_bytes()
+        scanner = InfoVersionScanner()
+        version = None
+        async for chunk in chunks:
+            version = scanner.feed(chunk)
+            if version is not None or scanner.done:
+                break
+        if self._worth_draining(r):
+            async for _ in chunks:
+                pass
+        return version
+
+    @staticmethod
+    def _store(
+        cache: PyPICache,
+        name: str,
+        v_str: str | None,
+        r: httpx.Response,
+        batch: list[tuple[str, str, str | None]] | None = None,
+        etag: str | None = None,
+    ) -> Version:
+        """
+        Parse and cache a fetched (or revalidated, 304) version, restarting its TTL; appended to
+        `batch` for a later `save_many` when given. `etag` is kept if the response has none.
+        """
+        if not v_str:
+            raise ValueError(f"no version for {name!r} in the index response")
+        version = parse_version(v_str)
+        entry = (name, v_str, r.headers.get("ETag") or etag)
+        if batch is not None:
+            batch.append(entry)
+        else:
+            cache.save(*entry)
+        return version
+
     # -------- declared --------
     def check_declared(
         self, requirements: Iterable[Requirement] | None = None
@@ -146,10 +678,9 @@ class VersionChecker:
                 with suppress(Exception):
                     pins[req.name] = parse_version(equals[-1].version)
 
-        use_monkeypatched = type(self).get_latest_version is not VersionChecker.get_latest_version
-
+        latest_map = self.latest_by_policy(pins)
         for name, cur in pins.items():
-            latest = self.get_latest_version(name) if use_monkeypatched else self.get_latest_version(name)
+            latest = latest_map.get(name)
             if latest is not None and cur < latest:
                 outdated.append(Outdated(name=name, current=str(cur), latest=str(latest)))
 
@@ -157,16 +688,48 @@ class VersionChecker:
 
     # -------- installed --------
     def check_installed(self, installed: dict[str, str]) -> tuple[list[Outdated], list[Unpinned]]:
-        outdated: list[Outdated] = []
+        current = self._parse_installed(installed)
+        return self._outdated(current, self.latest_by_policy(current)), []
+
+    def check_installed_many(self, environments: Mapping[str, Mapping[str, str]]) -> dict[str, list[Outdated]]:
+        """
+        Outdated packages per environment, resolving the union of all their names in one batch.
+
+        A package installed in every environment is looked up once, so N environments cost about
+        as many PyPI requests as the largest one.
+        """
+        current = {env: self._parse_installed(installed) for env, installed in environments.items()}
+        names = {canonicalize_name(n): n for per_env in current.values() for n in per_env}
+        if self.policy != "latest":  # one history per project, the policy applied per environment
+            histories = self.get_release_histories(names.values())
+            by_key = {key: histories[name] for key, name in names.items()}
+            return {
+                env: self._outdated(per_env, self._select(per_env, {n: by_key[canonicalize_name(n)] for n in per_env}))
+                for env, per_env in current.items()
+            }
+        latest = self.get_latest_versions(names.values())
+        by_key = {key: latest[name] for key, name in names.items()}
+        return {
+            env: self._outdated(per_env, {n: by_key[canonicalize_name(n)] for n in per_env})
+            for env, per_env in current.items()
+        }
+
+    @staticmethod
+    def _parse_installed(installed: Mapping[str, str]) -> dict[str, Version]:
+        current: dict[str, Version] = {}
         for name, cur_str in installed.items():
-            try:
-                cur = parse_version(cur_str)
-            except Exception:
-                continue
-            latest = self.get_latest_version(name)
+            with suppress(Exception):
+                current[name] = parse_version(cur_str)
+        return current
+
+    @staticmethod
+    def _outdated(current: Mapping[str, Version], latest_map: Mapping[str, Version | None]) -> list[Outdated]:
+        outdated: list[Outdated] = []
+        for name, cur in current.items():
+            latest = latest_map.get(name)
             if latest is not None and cur < latest:
                 outdated.append(Outdated(name=name, current=str(cur), latest=str(latest)))
-        return outdated, []
+        return outdated
 
     # -------- backward-compat shims --------
     def check(self):
@@ -182,3 +745,7 @@ class VersionChecker:
         Delegates to `check_declared()`.
         """
         return self.check_declared()
+
+
+# original implementation, to detect monkeypatched lookups in get_latest_versions()
+_DEFAULT_GET_LATEST = VersionChecker.get_latest_version
@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import os
+import re
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from fnmatch import fnmatchcase
+from pathlib import Path
+
+# Directories that never contain first-party sources worth scanning.
+DEFAULT_PRUNE_DIRS = frozenset(
+    {
+        ".git",
+        ".hg",
+        ".svn",
+        ".venv",
+        "venv",
+        ".tox",
+        ".nox",
+        ".eggs",
+        "__pycache__",
+        ".mypy_cache",
+        ".pytest_cache",
+        ".ruff_cache",
+        "node_modules",
+        "site-packages",
+    }
+)
+
+# Build outputs (`setup.py build`, wheels): pruned unless the directory is a package of its own
+# (`myproj/build/__init__.py`), i.e. first-party source that happens to have the same name.
+BUILD_OUTPUT_DIRS = frozenset({"build", "dist"})
+
+# Generated/vendored blobs above this size are skipped (bytes).
+DEFAULT_MAX_FILE_SIZE = 1_000_000
+
+
+@dataclass(frozen=True)
+class WalkOptions:
+    """What the source walker skips."""
+
+    exclude: tuple[str, ...] = ()  # extra globs, matched against root-relative paths and basenames
+    max_file_size: int = DEFAULT_MAX_FILE_SIZE  # 0 -> no limit
+    gitignore: bool = True  # honor .gitignore files (root, nested and repo ancestors)
+    prune_dirs: frozenset[str] = DEFAULT_PRUNE_DIRS
+    output_dirs: frozenset[str] = BUILD_OUTPUT_DIRS  # see `is_build_output`
+
+
+def is_build_output(path: str, options: WalkOptions) -> bool:
+    """Whether the directory `path` is build output to prune: named like one, and not a package."""
+    return os.path.basename(path) in options.output_dirs and not os.path.isfile(os.path.join(path, "__init__.py"))
+
+
+# ---------- .gitignore ----------
+
+
+def _glob_to_regex(pat: str) -> str:
+    out: list[str] = []
+    i, n = 0, len(pat)
+    while i < n:
+        c = pat[i]
+        if pat.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+            continue
+        if pat.startswith("**", i):
+            out.append(".*")
+            i += 2
+            continue
+        if c == "*":
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            j = pat.find("]", i + 1)
+            if j == -1:
+                out.append(re.escape(c))
+            else:
+                body = pat[i + 1 : j].replace("\\", "\\\\")
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                out.append(f"[{body}]")
+                i = j
+        elif c == "\\" and i + 1 < n:
+            i += 1
+            out.append(re.escape(pat[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return "".join(out)
+
+
+@dataclass(frozen=True)
+class _IgnoreRule:
+    base: str  # absolute directory holding the .gitignore (with trailing separator); patterns are relative to it
+    regex: re.Pattern[str]
+    negate: bool
+    dir_only: bool
+
+
+def _parse_gitignore(path: str, base: str) -> list[_IgnoreRule]:
+    try:
+        with open(path, encoding="utf-8", errors="replace") as fh:
+            lines = fh.read().splitlines()
+    except OSError:
+        return []
+    rules: list[_IgnoreRule] = []
+    for raw in lines:
+        line = raw.rstrip()
+        if not line or line.startswith("#"):
+            continue
+        negate = line.startswith("!")
+        if negate or line.startswith("\\"):
+            line = line[1:]
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        if not line:
+            continue
+        # a slash anywhere but the end anchors the pattern to the .gitignore's directory
+        anchored = "/" in line
+        regex = re.compile(("" if anchored else "(?:.*/)?") + _glob_to_regex(line.lstrip("/")) + "$")
+        rules.append(_IgnoreRule(base=os.path.join(base, ""), regex=regex, negate=negate, dir_only=dir_only))
+    return rules
+
+
+def _ignored(rules: list[_IgnoreRule], abs_path: str, is_dir: bool) -> bool:
+    """Last matching rule wins, as in git."""
+    verdict = False
+    for r in rules:
+        if r.dir_only and not is_dir:
+            continue
+        if not abs_path.startswith(r.base):
+            continue
+        sub = abs_path[len(r.base) :]
+        if os.sep != "/":
+            sub = sub.replace(os.sep, "/")
+        if r.regex.match(sub):
+            verdict = not r.negate
+    return verdict
+
+
+def _ancestor_rules(root: str) -> list[_IgnoreRule]:
+    """Rules from .gitignore files above `root`, up to the enclosing git worktree (if any)."""
+    if os.path.exists(os.path.join(root, ".git")):
+        return []  # root is the worktree top; its own .gitignore is read by the walk
+    chain: list[str] = []
+    cur = os.path.dirname(root)
+    while True:
+        chain.append(cur)
+        if os.path.exists(os.path.join(cur, ".git")):
+            break
+        parent = os.path.dirname(cur)
+        if parent == cur:
+            return []  # not inside a git worktree
+        cur = parent
+    rules: list[_IgnoreRule] = []
+    for d in reversed(chain):
+        rules.extend(_parse_gitignore(os.path.join(d, ".gitignore"), d))
+    return rules
+
+
+# ---------- walker ----------
+
+
+def _excluded(globs: Iterable[str], rel: str, name: str) -> bool:
+    return any(fnmatchcase(rel, g) or fnmatchcase(name, g) for g in globs)
+
+
+def iter_python_files(root: Path | str, options: WalkOptions | None = None) -> Iterator[Path]:
+    """
+    Yield absolute paths of `*.py` files under `root`, pruning what `options` rules out.
+
+    Uses `os.scandir` and never descends into `DEFAULT_PRUNE_DIRS`, build outputs (`is_build_output`),
+    `*.egg-info`, virtualenvs (any dir with `pyvenv.cfg`), git-ignored or `exclude`-matched paths.
+    Directory symlinks are followed, but each real directory is visited once, so symlink loops terminate.
+    A file `root` is yielded as-is when it is a `.py` file.
+    """
+    opts = options or WalkOptions()
+    root_abs = os.path.abspath(root)
+    if os.path.isfile(root_abs):
+        if root_abs.endswith(".py"):
+            yield Path(root_abs)
+        return
+
+    globs = tuple(g.rstrip("/") for g in opts.exclude)
+    prefix_len = len(os.path.join(root_abs, ""))
+    visited: set[tuple[int, int]] = set()
+    stack: list[tuple[str, list[_IgnoreRule]]] = [(root_abs, _ancestor_rules(root_abs) if opts.gitignore else [])]
+    while stack:
+        d, rules = stack.pop()
+        try:
+            st = os.stat(d)
+        except OSError:
+            continue
+        if (st.st_dev, st.st_ino) in visited:
+            continue
+        visited.add((st.st_dev, st.st_ino))
+
+        if opts.gitignore:
+            own = _parse_gitignore(os.path.join(d, ".gitignore"), d)
+            if own:
+                rules = rules + own
+        try:
+            with os.scandir(d) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            continue
+
+        subdirs: list[str] = []
+        for e in entries:
+            try:
+                is_dir = e.is_dir()
+            except OSError:
+                continue
+            rel = e.path[prefix_len:].replace(os.sep, "/") if globs else ""
+            if is_dir:
+                if e.name in opts.prune_dirs or e.name.endswith(".egg-info") or is_build_output(e.path, opts):
+                    continue
+                if (globs and _excluded(globs, rel, e.name)) or (rules and _ignored(rules, e.path, True)):
+                    continue
+                if os.path.exists(os.path.join(e.path, "pyvenv.cfg")):
+                    continue
+                subdirs.append(e.path)
+            elif e.name.endswith(".py"):
+                if (globs and _excluded(globs, rel, e.name)) or (rules and _ignored(rules, e.path, False)):
+                    continue
+                if opts.max_file_size:
+                    try:
+                        if e.stat().st_size > opts.max_file_size:
+                            continue
+                    except OSError:
+                        continue
+                yield Path(e.path)
+        stack.extend((sd, rules) for sd in reversed(subdirs))
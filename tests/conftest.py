@@ -76,3 +76,14 @@ def freeze_latest(monkeypatch):
         monkeypatch.setattr(VersionChecker, "get_latest_version", _get_latest, raising=True)
 
     return _apply
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path_factory, monkeypatch):
+    """Keep on-disk caches (PyPI, import index, import map) out of the real user cache."""
+    from animadao.import_map import default_import_map
+
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path_factory.mktemp("xdg-cache")))
+    default_import_map.cache_clear()
+    yield
+    default_import_map.cache_clear()
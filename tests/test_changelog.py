@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import json
+import time
+import xmlrpc.client
+from pathlib import Path
+
+import httpx
+import pytest
+from animadao.changelog import ChangeEvent, read_events, sync_cache
+from animadao.cli import cli
+from animadao.http_session import HttpSession
+from animadao.pypi_cache import PyPICache
+from animadao.version_checker import VersionChecker
+from click.testing import CliRunner
+from packaging.version import Version
+
+
+class _Feed:
+    """Stand-in for PyPI's XML-RPC changelog methods."""
+
+    def __init__(self, serial: int, batch: int | None = None) -> None:
+        self.serial = serial
+        self.batch = batch  # rows per changelog_since_serial answer (None: all)
+        self.events: list[list] = []
+        self.calls: list[tuple] = []
+
+    def publish(self, name: str, version: str, action: str = "new release") -> None:
+        self.serial += 1
+        self.events.append([name, version, int(time.time()), action, self.serial])
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        params, method = xmlrpc.client.loads(request.content)
+        self.calls.append((method, *params))
+        fresh = [e for e in self.events if method == "changelog_since_serial" and e[4] > params[0]][: self.batch]
+        result = self.serial if method == "changelog_last_serial" else fresh
+        return httpx.Response(200, content=xmlrpc.client.dumps((result,), methodresponse=True).encode())
+
+
+def test_read_events_formats(tmp_path: Path) -> None:
+    rows = [["requests", "2.32.0", 1, "new release", 7], ["six", None, 2, "remove project", 8]]
+    expected = [
+        ChangeEvent("requests", "2.32.0", 1, "new release", 7),
+        ChangeEvent("six", None, 2, "remove project", 8),
+    ]
+    array, lines, objects = tmp_path / "a.json", tmp_path / "b.jsonl", tmp_path / "c.jsonl"
+    array.write_text(json.dumps(rows), encoding="utf-8")
+    lines.write_text("\n".join(json.dumps(r) for r in rows) + "\n", encoding="utf-8")
+    keys = ("name", "version", "timestamp", "action", "serial")
+    objects.write_text("\n".join(json.dumps(dict(zip(keys, r, strict=True))) for r in rows), encoding="utf-8")
+    for path in (array, lines, objects):
+        assert list(read_events(path)) == expected
+
+
+def test_sync_invalidates_only_changed_entries(monkeypatch: pytest.MonkeyPatch) -> None:
+    feed = _Feed(serial=100)
+    session = HttpSession(transport=httpx.MockTransport(feed.handler))
+    cache = PyPICache()
+    first = sync_cache(cache, session=session)
+    assert (first.serial, first.baseline, first.events) == (100, True, 0)
+
+    cache.save_many([("requests", "2.31.0", None), ("six", "1.16.0", None), ("numpy", "2.0.0", None)])
+    feed.publish("requests", "2.32.0")
+    feed.publish("Some-Other", "1.0")
+    feed.publish("requests", "2.32.1")
+
+    later = time.time() + 7200  # both entries are past a 1h TTL by now...
+    monkeypatch.setattr(time, "time", lambda: later)
+    second = sync_cache(cache, session=session)
+    assert (second.serial, second.events, second.invalidated, second.baseline) == (103, 3, ["requests"], False)
+    assert feed.calls[1:] == [("changelog_since_serial", 100), ("changelog_since_serial", 103)]
+    assert cache.load("requests")[0] is None
+
+    seen: list[str] = []
+
+    def index(request: httpx.Request) -> httpx.Response:
+        seen.append(request.url.path.split("/")[2])
+        return httpx.Response(200, json={"info": {"version": "2.32.1"}})
+
+    # ...but the sync just confirmed six and numpy, so only requests goes to the index
+    checker = VersionChecker(ttl_seconds=3600, session=HttpSession(transport=httpx.MockTransport(index)))
+    assert checker.get_latest_versions(["requests", "six", "numpy"]) == {
+        "requests": Version("2.32.1"),
+        "six": Version("1.16.0"),
+        "numpy": Version("2.0.0"),
+    }
+    assert seen == ["requests"]
+    assert PyPICache().changelog_serial == 103
+
+
+def test_truncated_feed_confirms_nothing(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr("animadao.changelog.MAX_ROUNDS", 2)
+    feed = _Feed(serial=100, batch=10)
+    session = HttpSession(transport=httpx.MockTransport(feed.handler))
+    cache = PyPICache()
+    sync_cache(cache, session=session)
+    synced = cache.checked_at(time.time())
+    cache.save_many([("p105", "1.0", None), ("p150", "1.0", None)])
+    for i in range(101, 151):
+        feed.publish(f"p{i}", "2.0")
+
+    later = time.time() + 7200
+    monkeypatch.setattr(time, "time", lambda: later)
+    partial = sync_cache(cache, session=session)
+    assert (partial.serial, partial.events, partial.complete) == (120, 20, False)
+    assert partial.invalidated == ["p105"]
+    _version, _etag, ts = cache.load("p150")
+    assert cache.checked_at(ts) < later - 3600  # p150's change (serial 150) was never read: not confirmed
+    assert cache.checked_at(ts) == max(ts, synced)
+
+    rest = sync_cache(cache, session=session)  # resumes from serial 120
+    assert (rest.serial, rest.complete, rest.invalidated) == (140, False, [])
+    done = sync_cache(cache, session=session)
+    assert (done.serial, done.complete, done.invalidated) == (150, True, ["p150"])
+
+
+def test_stale_dump_confirms_only_up_to_its_newest_event(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    dump = tmp_path / "changelog.jsonl"
+    week_ago = int(time.time()) - 7 * 86400
+    dump.write_text(json.dumps(["requests", "2.32.0", week_ago, "new release", 41]) + "\n", encoding="utf-8")
+    cache = PyPICache()
+    sync_cache(cache, dump=dump)  # baseline
+    cache.save("six", "1.16.0", None)
+    saved = cache.load("six")[2]
+
+    later = time.time() + 7200
+    monkeypatch.setattr(time, "time", lambda: later)
+    stale = sync_cache(cache, dump=dump)  # nothing past serial 41
+    assert (stale.serial, stale.events) == (41, 0)
+    assert cache.checked_at(saved) == saved  # the dump says nothing about the last week
+
+    dump.write_text(dump.read_text() + json.dumps(["numpy", "2.1", int(later) - 60, "new release", 42]) + "\n")
+    sync_cache(cache, dump=dump)
+    assert cache.checked_at(saved) == int(later) - 60
+
+
+def test_entries_older_than_the_baseline_still_expire(monkeypatch: pytest.MonkeyPatch) -> None:
+    cache = PyPICache()
+    cache.save("six", "1.16.0", None)
+    before = cache.load("six")[2]
+    now = time.time() + 10
+    monkeypatch.setattr(time, "time", lambda: now)
+    cache.apply_changelog(5, [])
+    cache.save("numpy", "2.0.0", None)
+    now += 3600
+    cache.apply_changelog(6, [])
+    assert cache.checked_at(before) == before  # cached before the feed was tracked
+    assert cache.checked_at(cache.load("numpy")[2]) == now
+
+
+def test_cache_sync_command_from_dump(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    PyPICache().save_many([("requests", "2.31.0", None), ("six", "1.16.0", None)])
+    dump = tmp_path / "changelog.jsonl"
+    dump.write_text('["requests", "2.32.0", 1, "new release", 41]\n', encoding="utf-8")
+    refreshed: list[list[str]] = []
+
+    def fake_refresh(self: VersionChecker, names):
+        refreshed.append(list(names))
+        return {n: Version("2.32.0") for n in names}
+
+    monkeypatch.setattr(VersionChecker, "refresh", fake_refresh)
+    runner = CliRunner()
+    baseline = runner.invoke(cli, ["cache", "sync", "--from-file", str(dump), "--project", str(tmp_path)])
+    assert baseline.exit_code == 0, baseline.output
+    assert json.loads(baseline.output)["serial"] == 41 and json.loads(baseline.output)["baseline"] is True
+
+    dump.write_text(dump.read_text() + '["requests", "2.32.1", 2, "new release", 42]\n["x", "1", 3, "create", 43]\n')
+    result = runner.invoke(cli, ["cache", "sync", "--from-file", str(dump), "--project", str(tmp_path)])
+    out = json.loads(result.output)
+    assert (out["serial"], out["events"], out["invalidated"], out["refreshed"]) == (43, 2, ["requests"], ["requests"])
+    assert refreshed == [[], ["requests"]]
@@ -15,6 +15,10 @@ def test_config_defaults(tmp_path: Path) -> None:
     assert cfg.ignore_imports is None
     assert cfg.pypi_ttl_seconds == 86400
     assert cfg.pypi_concurrency == 8
+    assert cfg.scan_workers == 0
+    assert cfg.exclude is None
+    assert cfg.respect_gitignore is True
+    assert cfg.engine == "auto"
 
 
 def test_config_file_loading(tmp_path: Path) -> None:
@@ -25,6 +29,10 @@ def test_config_file_loading(tmp_path: Path) -> None:
         src = ["src", "app"]
         pypi_ttl_seconds = 1234
         pypi_concurrency = 5
+        scan_workers = 4
+        exclude = ["tests/fixtures", "*_pb2.py"]
+        max_file_size = 2048
+        engine = "ast"
 
         [ignore]
         distributions = ["pip", "Setuptools"]
@@ -38,6 +46,10 @@ def test_config_file_loading(tmp_path: Path) -> None:
     assert cfg.src == ["src", "app"]
     assert cfg.pypi_ttl_seconds == 1234
     assert cfg.pypi_concurrency == 5
+    assert cfg.scan_workers == 4
+    assert cfg.walk_options().exclude == ("tests/fixtures", "*_pb2.py")
+    assert cfg.walk_options().max_file_size == 2048
+    assert cfg.engine == "ast"
     assert cfg.ignore_distributions == {"pip", "setuptools"}  # lower-cased
     assert cfg.ignore_imports == {"__future__"}
 
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+from animadao.dependency_checker import guess_unused
+from animadao.dist_index import DistIndex, InstalledVersions, environment_site_dirs, site_dirs_for, target_site_dirs
+from packaging.requirements import Requirement
+
+
+def _dist(site: Path, dirname: str, **files: str) -> None:
+    d = site / dirname
+    d.mkdir(parents=True)
+    for name, content in files.items():
+        (d / name).write_text(content, encoding="utf-8")
+
+
+def _site(tmp_path: Path) -> Path:
+    site = tmp_path / "site-packages"
+    _dist(site, "PyYAML-6.0.1.dist-info", **{"top_level.txt": "_yaml\nyaml\n", "METADATA": "Name: PyYAML\n"})
+    _dist(
+        site,
+        "pillow-10.2.0.dist-info",
+        RECORD="PIL/__init__.py,sha256=x,10\nPIL/Image.py,,\npillow-10.2.0.dist-info/METADATA,,\n",
+    )
+    _dist(
+        site,
+        "scikit_learn-1.4.0.dist-info",
+        RECORD="sklearn/__init__.py,,\nsklearn/_c.cpython-311-x86_64-linux-gnu.so,,\n../../bin/tool,,\n",
+    )
+    _dist(site, "google_cloud_storage-2.0.dist-info", RECORD="google/cloud/storage/__init__.py,,\n")
+    _dist(site, "mypkg-0.1.dist-info", RECORD="__editable__.mypkg-0.1.pth,,\n__editable___mypkg_finder.py,,\n")
+    _dist(site, "six-1.16.0.dist-info", RECORD="six.py,,\n__pycache__/six.cpython-311.pyc,,\n")
+    _dist(site, "acme_tools-1.0.dist-info", **{"top_level.txt": "acme\n"})
+    return site
+
+
+def test_dist_index_reads_top_level_and_record(tmp_path: Path) -> None:
+    idx = DistIndex([_site(tmp_path)], cache_path=tmp_path / "dists.json")
+    assert idx.imports_for("pyyaml") == {"yaml", "_yaml"}
+    assert idx.imports_for("Pillow") == {"PIL"}
+    assert idx.imports_for("scikit-learn") == {"sklearn"}
+    assert idx.imports_for("google-cloud-storage") == {"google"}
+    assert idx.imports_for("six") == {"six"}
+    assert idx.imports_for("mypkg") == frozenset()  # editable hooks are not import names
+    assert idx.imports_for("not-installed") == frozenset()
+
+
+def test_dist_index_is_cached_per_site_dir_mtime(tmp_path: Path) -> None:
+    site = _site(tmp_path)
+    cache = tmp_path / "dists.json"
+    assert DistIndex([site], cache_path=cache).rebuilt == [str(site)]
+    warm = DistIndex([site], cache_path=cache)
+    assert warm.rebuilt == []
+    assert warm.imports_for("pillow") == {"PIL"}
+
+    _dist(site, "attrs-23.1.0.dist-info", **{"top_level.txt": "attr\nattrs\n"})
+    st = os.stat(site)
+    os.utime(site, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    after = DistIndex([site], cache_path=cache)
+    assert after.rebuilt == [str(site)]
+    assert after.imports_for("attrs") == {"attr", "attrs"}
+
+
+def test_guess_unused_uses_installed_metadata(tmp_path: Path) -> None:
+    idx = DistIndex([_site(tmp_path)], cache_path=tmp_path / "dists.json")
+    reqs = [Requirement(r) for r in ("acme-tools", "PyYAML", "Pillow", "scikit-learn", "google-cloud-storage", "six")]
+    imports = {"acme", "yaml", "PIL", "sklearn", "google"}
+    assert "acme-tools" in guess_unused(reqs, imports)  # unknown to the name heuristic and the offline map
+    assert guess_unused(reqs, imports, idx) == ["six"]
+
+
+def test_installed_versions_reads_headers_and_dir_names(tmp_path: Path) -> None:
+    site = tmp_path / "venv" / "lib" / "python3.11" / "site-packages"
+    _dist(site, "PyYAML-6.0.1.dist-info", METADATA="Metadata-Version: 2.1\nName: PyYAML\nVersion: 6.0.1\n\nName: x\n")
+    _dist(site, "scikit_learn-1.4.0.dist-info", RECORD="sklearn/__init__.py,,\n")  # no METADATA: dir name
+    _dist(site, "legacy-0.9-py3.11.egg-info", **{"PKG-INFO": "Metadata-Version: 1.0\nName: Legacy\nVersion: 0.9\n"})
+    (site / "single-2.0-py3.11.egg-info").write_text("Name: single\nVersion: 2.0\n", encoding="utf-8")
+    other = tmp_path / "other-site"
+    _dist(other, "pyyaml-5.0.dist-info", METADATA="Name: pyyaml\nVersion: 5.0\n")
+
+    cache = tmp_path / "installed.json"
+    inst = InstalledVersions(site_dirs_for(tmp_path / "venv") + [other], cache_path=cache)
+    assert inst.versions == {"PyYAML": "6.0.1", "scikit_learn": "1.4.0", "Legacy": "0.9", "single": "2.0"}
+    assert len(inst.rebuilt) == 2
+    assert InstalledVersions([site, other], cache_path=cache).rebuilt == []
+
+
+def test_target_site_dirs(tmp_path: Path) -> None:
+    site = tmp_path / "venv" / "lib" / "python3.12" / "site-packages"
+    site.mkdir(parents=True)
+    (tmp_path / "venv" / "bin").mkdir()
+    (tmp_path / "venv" / "bin" / "python").write_text("", encoding="utf-8")
+    assert target_site_dirs(tmp_path / "venv") == [site.resolve()]
+    assert target_site_dirs(tmp_path / "venv" / "bin" / "python") == [site.resolve()]
+    assert target_site_dirs(site_packages=[site, site]) == [site.resolve()]
+    assert target_site_dirs(tmp_path / "empty-prefix-that-is-missing") == []
+
+
+def test_environment_site_dirs_include_any_path_entry_with_dists(tmp_path: Path, monkeypatch) -> None:
+    site = _site(tmp_path)
+    target = tmp_path / "vendor"  # `pip install --target vendor` + PYTHONPATH
+    _dist(target, "attrs-23.2.0.dist-info", **{"top_level.txt": "attr\nattrs\n"})
+    plain = tmp_path / "src"
+    plain.mkdir()
+    monkeypatch.setattr("sys.path", [str(plain), str(site), str(target), str(tmp_path / "gone"), str(site)])
+    assert environment_site_dirs() == [Path(os.path.realpath(site)), Path(os.path.realpath(target))]
+    assert DistIndex.for_environment().imports_for("attrs") == {"attr", "attrs"}
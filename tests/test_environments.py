@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from animadao.cli import cli
+from animadao.dist_index import InstalledVersions
+from animadao.version_checker import VersionChecker
+from click.testing import CliRunner
+from packaging.version import Version
+
+LATEST = {"requests": "2.32.0", "numpy": "2.0.0", "pyyaml": "6.0.1"}
+
+
+def _venv(root: Path, name: str, dists: dict[str, str]) -> Path:
+    site = root / name / "lib" / "python3.11" / "site-packages"
+    for dist, version in dists.items():
+        d = site / f"{dist}-{version}.dist-info"
+        d.mkdir(parents=True)
+        (d / "METADATA").write_text(f"Name: {dist}\nVersion: {version}\n", encoding="utf-8")
+    return root / name
+
+
+def _envs(tmp_path: Path) -> list[Path]:
+    return [
+        _venv(tmp_path, "a", {"requests": "2.31.0", "numpy": "2.0.0"}),
+        _venv(tmp_path, "b", {"requests": "2.32.0", "PyYAML": "5.4"}),
+        _venv(tmp_path, "c", {"requests": "2.30.0", "pyyaml": "6.0.1", "numpy": "1.26.0"}),
+    ]
+
+
+def _count_batches(monkeypatch) -> list[list[str]]:
+    batches: list[list[str]] = []
+
+    def fake_latest(_self, names):
+        names = list(names)
+        batches.append(names)
+        return {n: Version(LATEST[n.lower()]) for n in names}
+
+    monkeypatch.setattr(VersionChecker, "get_latest_versions", fake_latest)
+    return batches
+
+
+def test_for_environments_scans_each_target(tmp_path: Path) -> None:
+    a, b, c = _envs(tmp_path)
+    versions = InstalledVersions.for_environments([a, b, c], cache_path=tmp_path / "installed.json")
+    assert versions == {
+        str(a): {"numpy": "2.0.0", "requests": "2.31.0"},
+        str(b): {"PyYAML": "5.4", "requests": "2.32.0"},
+        str(c): {"numpy": "1.26.0", "pyyaml": "6.0.1", "requests": "2.30.0"},
+    }
+
+
+def test_check_several_environments_shares_one_lookup_set(tmp_path: Path, monkeypatch) -> None:
+    envs = _envs(tmp_path)
+    batches = _count_batches(monkeypatch)
+    args = ["check", "--project", str(tmp_path), "--mode", "installed"]
+    for env in envs:
+        args += ["--python", str(env)]
+
+    res = CliRunner().invoke(cli, args)
+    assert res.exit_code == 0, res.output
+    data = json.loads(res.output)
+
+    assert len(batches) == 1 and sorted(n.lower() for n in batches[0]) == ["numpy", "pyyaml", "requests"]
+    assert data["lookups"] == 3
+    a, b, c = (str(e) for e in envs)
+    assert data["environments"] == {
+        a: {"installed": 2, "outdated": 1},
+        b: {"installed": 2, "outdated": 1},
+        c: {"installed": 3, "outdated": 2},
+    }
+    assert data["matrix"] == {
+        "numpy": {"latest": "2.0.0", "current": {c: "1.26.0"}},
+        "pyyaml": {"latest": "6.0.1", "current": {b: "5.4"}},
+        "requests": {"latest": "2.32.0", "current": {a: "2.31.0", c: "2.30.0"}},
+    }
+    assert {"name": "numpy", "current": "1.26.0", "latest": "2.0.0", "env": c} in data["outdated"]
+
+
+def test_report_several_environments(tmp_path: Path, monkeypatch) -> None:
+    envs = _envs(tmp_path)
+    _count_batches(monkeypatch)
+    (tmp_path / "requirements.txt").write_text("requests\n", encoding="utf-8")
+    out = tmp_path / "report.md"
+    args = ["report", "--project", str(tmp_path), "--mode", "installed", "--format", "md", "--out", str(out)]
+    for env in envs:
+        args += ["--python", str(env)]
+
+    res = CliRunner().invoke(cli, args)
+    assert res.exit_code == 0, res.output
+    text = out.read_text(encoding="utf-8")
+    assert "| environment | package | current | latest |" in text
+    assert f"| {envs[2]} | numpy | 1.26.0 | 2.0.0 |" in text
+    assert "**outdated:** 4" in text
+
+
+def test_several_environments_reject_site_packages(tmp_path: Path) -> None:
+    a, b, _c = _envs(tmp_path)
+    res = CliRunner().invoke(
+        cli,
+        ["check", "--project", str(tmp_path), "--mode", "installed", "--python", str(a), "--python", str(b)]
+        + ["--site-packages", str(tmp_path)],
+    )
+    assert res.exit_code == 2
+    assert "--site-packages" in res.output
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import os
+import shutil
+import subprocess
+import time
+from pathlib import Path
+
+import pytest
+from animadao.git_index import parse_index, read_index, tracked_python_files
+from animadao.import_index import ImportIndex
+from animadao.native import collect_files, scan_imports
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="git not installed")
+
+
+def _git(root: Path, *args: str) -> None:
+    subprocess.run(["git", *args], cwd=root, check=True, capture_output=True)
+
+
+@pytest.fixture
+def repo(tmp_path: Path) -> Path:
+    _git(tmp_path, "init", "-q")
+    for rel, body in {
+        "pkg/__init__.py": "",
+        "pkg/app.py": "import requests\n",
+        "tests/test_app.py": "import pytest\n",
+        "README.md": "# demo\n",
+    }.items():
+        p = tmp_path / rel
+        p.parent.mkdir(parents=True, exist_ok=True)
+        p.write_text(body, encoding="utf-8")
+    _git(tmp_path, "add", ".")
+    (tmp_path / "pkg" / "scratch.py").write_text("import untracked_junk\n", encoding="utf-8")
+    return tmp_path
+
+
+@pytest.mark.parametrize("version", ["2", "3", "4"])
+def test_read_index_versions(repo: Path, version: str) -> None:
+    _git(repo, "update-index", "--index-version", version)
+    entries = read_index(repo)
+    assert [e.path for e in entries] == ["README.md", "pkg/__init__.py", "pkg/app.py", "tests/test_app.py"]
+    app = next(e for e in entries if e.path == "pkg/app.py")
+    assert app.size == len("import requests\n")
+
+
+def test_tracked_python_files_skips_untracked_and_filters_root(repo: Path) -> None:
+    tracked = tracked_python_files(repo / "pkg")
+    assert set(tracked) == {repo / "pkg" / "__init__.py", repo / "pkg" / "app.py"}
+
+    assert set(scan_imports([repo], source="git")) == {"pytest", "requests"}
+    assert "untracked_junk" in scan_imports([repo], source="walk")
+
+
+def test_git_source_prunes_build_output_but_not_packages(repo: Path) -> None:
+    for rel in ("build/lib/pkg/app.py", "tools/build/__init__.py", "tools/build/steps.py"):
+        (repo / rel).parent.mkdir(parents=True, exist_ok=True)
+        (repo / rel).write_text("import jinja2\n" if rel.endswith("steps.py") else "", encoding="utf-8")
+    _git(repo, "add", "-f", "build", "tools")
+    names = {p.relative_to(repo).as_posix() for p in tracked_python_files(repo)}
+    assert "tools/build/steps.py" in names and "build/lib/pkg/app.py" not in names
+
+
+def test_git_source_falls_back_to_walk_outside_repo(tmp_path: Path) -> None:
+    (tmp_path / "m.py").write_text("import yaml\n", encoding="utf-8")
+    assert collect_files([tmp_path], source="git") == [tmp_path / "m.py"]
+
+
+def test_unstaged_edits_are_reparsed(repo: Path, tmp_path_factory) -> None:
+    app = repo / "pkg" / "app.py"
+    old = time.time_ns() - 3600 * 10**9  # well outside the racy window
+    for f in repo.rglob("*.py"):
+        os.utime(f, ns=(old, old))
+    _git(repo, "add", "-u")  # the index now records the old stat
+    index_path = tmp_path_factory.mktemp("idx") / "idx.json"
+    assert scan_imports([repo], source="git", index=ImportIndex(index_path)) == ["pytest", "requests"]
+
+    app.write_text("import pydantic\n", encoding="utf-8")  # same size, not staged
+    os.utime(app, ns=(old, old + 10**9))
+    index = ImportIndex(index_path)  # next run: trusts entries older than its last write
+    assert scan_imports([repo], source="git", index=index) == ["pydantic", "pytest"]
+    assert (index.stats.reused, index.stats.parsed) == (2, 1)
+
+
+def test_parse_index_rejects_garbage() -> None:
+    with pytest.raises(ValueError):
+        parse_index(b"not an index at all, definitely too short?")
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import asyncio
+import json
+
+import httpx
+import pytest
+from animadao.cli import cli
+from animadao.config import load_config
+from animadao.http_session import HttpSession
+from animadao.version_checker import VersionChecker
+from click.testing import CliRunner
+from packaging.version import Version
+
+PRIMARY, SECONDARY = "https://primary.test/pypi", "https://secondary.test/pypi"
+
+
+def _checker(delays: dict[str, float], log: list[tuple[str, str]], missing=(), **kwargs) -> VersionChecker:
+    """Indexes answering `name -> <host's version>` after `delays[host]` seconds; `log` gets (host, event)."""
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        log.append((host, "sent"))
+        try:
+            await asyncio.sleep(delays.get(host, 0))
+        except asyncio.CancelledError:
+            log.append((host, "cancelled"))
+            raise
+        if (host, request.url.path.split("/")[2]) in missing:
+            return httpx.Response(404)
+        return httpx.Response(200, json={"info": {"version": "2.0" if host.startswith("secondary") else "1.0"}})
+
+    session = HttpSession(transport=httpx.MockTransport(handler))
+    return VersionChecker(index_urls=[PRIMARY, SECONDARY], session=session, **kwargs)
+
+
+def test_slow_primary_is_hedged_and_the_loser_cancelled() -> None:
+    log: list[tuple[str, str]] = []
+    checker = _checker({"primary.test": 5.0}, log, hedge_delay=0.05)
+    assert checker.get_latest_versions(["a", "b"]) == {"a": Version("2.0"), "b": Version("2.0")}
+    assert sorted(log) == sorted(
+        [("primary.test", "sent"), ("primary.test", "cancelled"), ("secondary.test", "sent")] * 2
+    )
+    assert checker.run_stats()["hedged"] == 2
+    assert checker.run_stats()["hedge_win_rate"] == 1.0
+    # the winner's answer is cached under its own index only
+    assert checker.caches[1].load("a")[0] == "2.0" and checker.caches[0].load("a")[0] is None
+
+
+def test_fast_primary_is_not_hedged() -> None:
+    log: list[tuple[str, str]] = []
+    checker = _checker({"secondary.test": 5.0}, log, hedge_delay=0.5)
+    assert checker.get_latest_version("a") == Version("1.0")  # sync calls go through the same engine
+    assert log == [("primary.test", "sent")]
+    assert checker.run_stats()["hedged"] == 0 and checker.run_stats()["hedge_win_rate"] is None
+
+
+def test_hedge_loses_when_primary_answers_first() -> None:
+    log: list[tuple[str, str]] = []
+    checker = _checker({"primary.test": 0.15, "secondary.test": 5.0}, log, hedge_delay=0.05)
+    assert checker.get_latest_versions(["a"]) == {"a": Version("1.0")}
+    assert ("secondary.test", "cancelled") in log
+    assert (checker.session.stats.hedged, checker.session.stats.hedge_wins) == (1, 0)
+    assert checker.run_stats()["hedge_win_rate"] == 0.0
+
+
+def test_hedged_not_found_on_both_indexes_ends_the_lookup() -> None:
+    log: list[tuple[str, str]] = []
+    missing = {("primary.test", "gone"), ("secondary.test", "gone")}
+    checker = _checker({"primary.test": 0.15}, log, missing, hedge_delay=0.05)
+    assert checker.get_latest_versions(["gone"]) == {"gone": None}
+    assert sorted(log) == [("primary.test", "sent"), ("secondary.test", "sent")]  # secondary not asked twice
+
+
+@pytest.mark.parametrize("delay", [0.0, 0.05])
+def test_primary_404_falls_through(delay: float) -> None:
+    log: list[tuple[str, str]] = []
+    checker = _checker({}, log, {("primary.test", "a")}, hedge_delay=delay)
+    assert checker.get_latest_versions(["a"]) == {"a": Version("2.0")}
+    assert checker.session.stats.hedged == 0
+
+
+def test_hedge_delay_config_and_check_stats(mk_project, freeze_latest) -> None:
+    proj = mk_project(deps=["requests==2.0.0"])
+    (proj["root"] / ".animadao.toml").write_text(
+        f'[index]\nurls = ["{PRIMARY}", "{SECONDARY}"]\nhedge_delay = 0.2\n', encoding="utf-8"
+    )
+    cfg = load_config(proj["root"])
+    assert cfg.pypi_hedge_delay == 0.2
+    assert VersionChecker.from_config(cfg).hedge_delay == 0.2
+
+    freeze_latest({"requests": "2.1.0"})
+    result = CliRunner().invoke(cli, ["check", "--project", str(proj["root"]), "--stats"])
+    assert result.exit_code == 0, result.output
+    stats = json.loads(result.output)["stats"]
+    assert {"requests", "retries", "hedged", "hedge_wins", "hedge_win_rate"} <= set(stats)
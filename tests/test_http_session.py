@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import httpx
+import pytest
+from animadao.config import Config
+from animadao.http_session import CircuitBreaker, CircuitOpenError, HttpSession, RetryPolicy, TokenBucket
+from animadao.version_checker import VersionChecker
+from packaging.version import Version
+
+NO_WAIT = RetryPolicy(retries=3, backoff=0.0)
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _flaky(failures: int, calls: list[str]):
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        if len(calls) <= failures:
+            return httpx.Response(503)
+        return httpx.Response(200, json={"info": {"version": "2.0.0"}})
+
+    return handler
+
+
+def test_retries_transient_errors_then_succeeds() -> None:
+    calls: list[str] = []
+    session = HttpSession(retry=NO_WAIT, transport=httpx.MockTransport(_flaky(2, calls)))
+    checker = VersionChecker(session=session)
+    assert checker.get_latest_version("pkg") == Version("2.0.0")
+    assert len(calls) == 3
+    assert session.stats.retries == 2
+
+
+def test_sync_client_is_reused_across_lookups() -> None:
+    calls: list[str] = []
+    session = HttpSession(retry=NO_WAIT, transport=httpx.MockTransport(_flaky(0, calls)))
+    checker = VersionChecker(session=session, ttl_seconds=0)
+    checker.get_latest_version("a")
+    client = session.client
+    checker.get_latest_version("b")
+    assert session.client is client
+    checker.close()
+    assert session._client is None
+
+
+def test_breaker_switches_to_cache_only(tmp_path) -> None:
+    calls: list[str] = []
+    clock = Clock()
+    session = HttpSession(
+        retry=RetryPolicy(retries=0),
+        breaker=CircuitBreaker(threshold=2, reset_after=30.0, clock=clock),
+        transport=httpx.MockTransport(_flaky(10**6, calls)),
+    )
+    checker = VersionChecker(session=session, ttl_seconds=0)
+    checker.cache.save("cached", "1.5.0", None)
+    breaker = session.breaker_for(checker.indexes[0].url)
+
+    assert checker.get_latest_versions(["a", "b"]) == {"a": None, "b": None}
+    assert breaker.state == "open"
+    sent = len(calls)
+    # open: no requests, stale cache entries still answer
+    assert checker.get_latest_version("cached") == Version("1.5.0")
+    assert checker.get_latest_versions(["c", "d"]) == {"c": None, "d": None}
+    assert len(calls) == sent
+    assert session.stats.refused == 3
+
+    with pytest.raises(CircuitOpenError):
+        session.get("https://pypi.invalid/x", index=checker.indexes[0].url)
+    assert session.breaker.state == "closed"  # untagged requests have a breaker of their own
+
+    # half-open after the cool-down: one probe, and a failure re-opens immediately
+    clock.now += 31
+    assert breaker.state == "half-open"
+    checker.get_latest_version("e")
+    assert len(calls) == sent + 1 and breaker.state == "open"
+
+
+def test_dead_first_index_does_not_trip_the_next_one() -> None:
+    hosts: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        hosts.append(request.url.host)
+        if request.url.host == "dead.test":
+            raise httpx.ConnectError("connection refused", request=request)
+        return httpx.Response(200, json={"info": {"version": "2.0.0"}})
+
+    session = HttpSession(retry=RetryPolicy(retries=0), transport=httpx.MockTransport(handler))
+    checker = VersionChecker(
+        index_urls=["https://dead.test/pypi", "https://live.test/pypi"], session=session, concurrency=1
+    )
+    names = [f"pkg{i}" for i in range(12)]
+    assert checker.get_latest_versions(names) == dict.fromkeys(names, Version("2.0.0"))
+    assert session.breaker_for("https://dead.test/pypi").state == "open"
+    assert session.breaker_for("https://live.test/pypi").state == "closed"
+    assert hosts.count("dead.test") == 5 and hosts.count("live.test") == 12
+    assert session.stats.refused == 7  # only the dead index is short-circuited
+
+
+def test_token_bucket_paces_after_burst() -> None:
+    clock = Clock()
+    bucket = TokenBucket(rate=2.0, burst=2, clock=clock)
+    assert [bucket.reserve() for _ in range(4)] == [0.0, 0.0, 0.5, 1.0]
+    clock.now += 2.0
+    assert bucket.reserve() == 0.0
+    assert TokenBucket(rate=0).reserve() == 0.0
+
+
+def test_retry_delay_is_jittered_and_capped() -> None:
+    policy = RetryPolicy(retries=5, backoff=1.0, max_backoff=4.0)
+    delays = [policy.delay(attempt) for attempt in range(6) for _ in range(20)]
+    assert all(0.0 <= d <= 4.0 for d in delays)
+    assert len(set(delays)) > 1
+    assert policy.delay(0, retry_after="2") == 2.0
+    assert policy.delay(0, retry_after="600") == 4.0
+
+
+def test_from_config_threads_session_settings() -> None:
+    cfg = Config(pypi_concurrency=4, pypi_retries=1, pypi_rate_limit=5.0, pypi_http2=True)
+    checker = VersionChecker.from_config(cfg)
+    assert checker.session.retry.retries == 1
+    assert checker.session.bucket.rate == 5.0
+    assert checker.session.concurrency == 4
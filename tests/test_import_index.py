@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+from animadao.import_index import ImportIndex
+
+
+def _files(root: Path) -> list[Path]:
+    return sorted(root.rglob("*.py"))
+
+
+def test_index_reuses_unchanged_and_reparses_changed(tmp_path: Path) -> None:
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "a.py").write_text("import requests\n", encoding="utf-8")
+    (src / "b.py").write_text("import rich\n", encoding="utf-8")
+    (src / "c.py").write_text("import yaml\n", encoding="utf-8")
+    index_path = tmp_path / "cache" / "idx.json"
+
+    cold = ImportIndex(index_path)
+    assert cold.scan(_files(src)) == {"requests", "rich", "yaml"}
+    assert (cold.stats.reused, cold.stats.parsed) == (0, 3)
+
+    warm = ImportIndex(index_path)
+    assert warm.scan(_files(src)) == {"requests", "rich", "yaml"}
+    assert (warm.stats.reused, warm.stats.parsed, warm.stats.purged) == (3, 0, 0)
+
+    # change one file, delete another
+    (src / "a.py").write_text("import httpx\n", encoding="utf-8")
+    (src / "c.py").unlink()
+    inc = ImportIndex(index_path)
+    assert inc.scan(_files(src)) == {"httpx", "rich"}
+    assert (inc.stats.reused, inc.stats.parsed, inc.stats.purged) == (1, 1, 1)
+
+
+def test_index_hash_tiebreaker_on_touched_file(tmp_path: Path) -> None:
+    f = tmp_path / "m.py"
+    f.write_text("import numpy\n", encoding="utf-8")
+    index_path = tmp_path / "idx.json"
+    ImportIndex(index_path).scan([f])
+
+    # same content, new mtime -> hash says unchanged
+    st = f.stat()
+    os.utime(f, ns=(st.st_atime_ns, st.st_mtime_ns + 5_000_000_000))
+    idx = ImportIndex(index_path)
+    assert idx.scan([f]) == {"numpy"}
+    assert (idx.stats.reused, idx.stats.parsed) == (1, 0)
+
+    # same size, different content -> re-parsed
+    f.write_text("import scipy\n", encoding="utf-8")
+    idx = ImportIndex(index_path)
+    assert idx.scan([f]) == {"scipy"}
+    assert idx.stats.parsed == 1
+
+
+def test_index_streams_records_for_reused_files(tmp_path: Path) -> None:
+    from animadao.import_scanner import ImportRecord
+
+    f = tmp_path / "m.py"
+    f.write_text("import a\nfrom b.c import d\n", encoding="utf-8")
+    idx_path = tmp_path / "idx.json"
+    cold = list(ImportIndex(idx_path).iter_records([f]))
+    warm_index = ImportIndex(idx_path)
+    warm = list(warm_index.iter_records([f]))
+    assert cold == warm == [ImportRecord(0, "a", 1, "import"), ImportRecord(0, "b.c", 2, "from")]
+    assert warm_index.stats.reused == 1
+
+
+def test_index_per_root_set(tmp_path: Path) -> None:
+    a = ImportIndex.for_roots([tmp_path / "a", tmp_path / "b"], cache_dir=tmp_path)
+    b = ImportIndex.for_roots([tmp_path / "b", tmp_path / "a"], cache_dir=tmp_path)
+    c = ImportIndex.for_roots([tmp_path / "a"], cache_dir=tmp_path)
+    assert a.path == b.path != c.path
+
+
+def test_cli_scan_reports_index_stats(tmp_path: Path) -> None:
+    import json
+
+    from animadao.cli import cli
+    from click.testing import CliRunner
+
+    (tmp_path / "pyproject.toml").write_text('[project]\nname="demo"\nversion="0"\ndependencies=[]\n', encoding="utf-8")
+    (tmp_path / "app.py").write_text("import requests\n", encoding="utf-8")
+
+    runner = CliRunner()
+    first = json.loads(runner.invoke(cli, ["scan", "--project", str(tmp_path), "--stats"]).output)
+    second = json.loads(runner.invoke(cli, ["scan", "--project", str(tmp_path), "--stats"]).output)
+    assert first["imports"] == second["imports"] == ["requests"]
+    assert first["stats"]["parsed"] == 1
+    assert second["stats"] == {"reused": 1, "parsed": 0, "purged": 0}
+
+
+def test_index_reparses_files_indexed_by_another_engine(tmp_path: Path) -> None:
+    f = tmp_path / "m.py"
+    f.write_text("import a\n", encoding="utf-8")
+    idx_path = tmp_path / "idx.json"
+    ImportIndex(idx_path).scan([f], engine="tokenize")
+    other = ImportIndex(idx_path)
+    assert other.scan([f], engine="ast") == {"a"}
+    assert (other.stats.reused, other.stats.parsed) == (0, 1)
+    same = ImportIndex(idx_path)
+    same.scan([f], engine="ast")
+    assert (same.stats.reused, same.stats.parsed) == (1, 0)
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from animadao.cli import cli
+from animadao.dependency_checker import guess_unused, import_candidates
+from animadao.import_map import BUNDLED_PATH, ImportMap, is_stdlib, write_import_map
+from click.testing import CliRunner
+from packaging.requirements import Requirement
+
+
+def test_write_and_lookup(tmp_path: Path) -> None:
+    path = tmp_path / "map.bin"
+    entries = {f"dist-{i:04d}": [f"mod{i}"] for i in range(500)}
+    entries["PyYAML"] = ["yaml", "_yaml"]
+    entries["requests"] = ["requests"]  # obvious -> not stored
+    entries["peewee"] = ["peewee", "peewee-stubs", "playhouse"]
+    entries["django-hosts"] = ["django_hosts", "tests", "docs"]  # only the junk differs -> not stored
+    assert write_import_map(entries, path) == 502
+
+    m = ImportMap(path)
+    assert m.imports_for("pyyaml") == ("yaml",)
+    assert m.imports_for("Dist_0042") == ("mod42",)
+    assert m.imports_for("dist-0000") == ("mod0",)
+    assert m.imports_for("dist-0499") == ("mod499",)
+    assert m.imports_for("requests") == ()
+    assert m.imports_for("peewee") == ("peewee", "playhouse")
+    assert m.imports_for("django-hosts") == ()
+    assert m.imports_for("zzz") == ()
+    assert len(list(m.items())) == len(m) and ("pyyaml", ("yaml",)) in m.items()
+
+
+def test_missing_or_foreign_file_is_empty(tmp_path: Path) -> None:
+    assert ImportMap(tmp_path / "nope.bin").imports_for("pyyaml") == ()
+    bad = tmp_path / "bad.bin"
+    bad.write_bytes(b"not a map at all")
+    assert len(ImportMap(bad)) == 0
+    empty = tmp_path / "empty.bin"
+    empty.write_bytes(b"")
+    assert ImportMap(empty).imports_for("x") == ()
+
+
+def test_bundled_map_covers_common_mismatches() -> None:
+    m = ImportMap(BUNDLED_PATH)
+    assert "yaml" in m.imports_for("PyYAML")
+    assert m.imports_for("Pillow") == ("PIL",)
+    assert m.imports_for("scikit-learn") == ("sklearn",)
+    assert m.imports_for("beautifulsoup4") == ("bs4",)
+    assert len(m) > 4000  # generated from the top PyPI projects' wheel metadata
+
+
+def test_bundled_map_claims_no_generic_names() -> None:
+    claimed = {name for _dist, imports in ImportMap(BUNDLED_PATH).items() for name in imports}
+    assert claimed.isdisjoint({"tests", "test", "docs", "examples", "scripts", "build", "dist", "benchmarks"})
+    assert not any(name.startswith("_") for name in claimed)
+
+
+def test_guess_unused_without_installed_metadata() -> None:
+    reqs = [Requirement(r) for r in ("PyYAML", "Pillow", "python-dateutil", "beautifulsoup4", "rich")]
+    assert guess_unused(reqs, {"yaml", "PIL", "dateutil", "bs4"}) == ["rich"]
+
+
+def test_mapping_build_from_dump_overrides_bundled(tmp_path: Path) -> None:
+    dump = tmp_path / "dump.jsonl"
+    dump.write_text(
+        json.dumps({"name": "acme-tools", "imports": ["acme"]}) + "\n" + json.dumps({"name": "x", "top_level": ["y"]}),
+        encoding="utf-8",
+    )
+    assert "acme" not in import_candidates("acme-tools")
+
+    res = CliRunner().invoke(cli, ["mapping", "build", "--from", str(dump)])
+    assert res.exit_code == 0, res.output
+    assert json.loads(res.output)["entries"] == 2
+    assert "acme" in import_candidates("acme-tools")
+    assert "y" in import_candidates("x")
+
+
+def test_mapping_build_from_site_packages_dir(tmp_path: Path) -> None:
+    site = tmp_path / "site"
+    (site / "PyYAML-6.0.dist-info").mkdir(parents=True)
+    (site / "PyYAML-6.0.dist-info" / "top_level.txt").write_text("yaml\n", encoding="utf-8")
+    out = tmp_path / "out.bin"
+    res = CliRunner().invoke(cli, ["mapping", "build", "--from", str(site), "--out", str(out)])
+    assert res.exit_code == 0, res.output
+    assert ImportMap(out).imports_for("pyyaml") == ("yaml",)
+
+
+def test_is_stdlib() -> None:
+    assert is_stdlib("os.path")
+    assert is_stdlib("json")
+    assert not is_stdlib("requests")
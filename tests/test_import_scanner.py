@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from animadao import import_scanner
+from animadao.import_scanner import find_top_level_imports, resolve_workers, scan_files
+
+
+def _make_tree(root: Path, n: int) -> None:
+    for i in range(n):
+        d = root / f"pkg{i % 7}"
+        d.mkdir(parents=True, exist_ok=True)
+        (d / f"m{i}.py").write_text(f"import mod{i}.sub\nfrom common{i % 3} import x\n", encoding="utf-8")
+    (root / "broken.py").write_text("def (:\n", encoding="utf-8")
+
+
+def test_parallel_scan_matches_serial(tmp_path: Path, monkeypatch) -> None:
+    _make_tree(tmp_path, 40)
+    serial = find_top_level_imports(tmp_path, workers=1)
+
+    # force the pool even for a tiny tree
+    monkeypatch.setattr(import_scanner, "SERIAL_CUTOFF", 0)
+    parallel = find_top_level_imports(tmp_path, workers=3)
+
+    assert parallel == serial
+    assert {"mod0", "mod39", "common0", "common1", "common2"} <= parallel
+
+
+def test_small_tree_stays_serial(tmp_path: Path, monkeypatch) -> None:
+    _make_tree(tmp_path, 5)
+
+    def _no_pool(*_a, **_kw):
+        raise AssertionError("process pool must not start below the cutoff")
+
+    monkeypatch.setattr(import_scanner, "ProcessPoolExecutor", _no_pool)
+    assert "mod4" in scan_files(sorted(tmp_path.rglob("*.py")), workers=8)
+
+
+def test_resolve_workers() -> None:
+    assert resolve_workers(0) >= 1
+    assert resolve_workers(None) >= 1
+    assert resolve_workers(-3) == 1
+    assert resolve_workers(4) == 4
+
+
+def test_iter_imports_yields_per_site_records(tmp_path: Path) -> None:
+    from animadao.import_scanner import ImportRecord, iter_imports
+
+    (tmp_path / "a.py").write_text(
+        "import os.path, json as j\nfrom .local import x\nfrom . import y\n\ndef f():\n    from requests import get\n",
+        encoding="utf-8",
+    )
+    (tmp_path / "b.py").write_text("import yaml\n", encoding="utf-8")
+
+    files: dict[int, str] = {}
+    records = list(iter_imports(tmp_path, on_file=lambda fid, p: files.setdefault(fid, p.name)))
+
+    assert files == {0: "a.py", 1: "b.py"}
+    assert records == [
+        ImportRecord(0, "os.path", 1, "import"),
+        ImportRecord(0, "json", 1, "import"),
+        ImportRecord(0, ".local", 2, "from"),
+        ImportRecord(0, ".", 3, "from"),
+        ImportRecord(0, "requests", 6, "from"),
+        ImportRecord(1, "yaml", 1, "import"),
+    ]
+    # the set API keeps its historical top-level semantics
+    assert find_top_level_imports(tmp_path) == {"os", "json", "local", "requests", "yaml"}
+
+
+def test_parallel_records_match_serial(tmp_path: Path, monkeypatch) -> None:
+    from animadao.import_scanner import iter_file_records
+
+    _make_tree(tmp_path, 20)
+    files = sorted(tmp_path.rglob("*.py"))
+    serial = sorted(iter_file_records(files, workers=1))
+    monkeypatch.setattr(import_scanner, "SERIAL_CUTOFF", 0)
+    assert sorted(iter_file_records(files, workers=2)) == serial
+
+
+def test_cli_scan_ndjson_streams_records(tmp_path: Path) -> None:
+    import json
+
+    from animadao.cli import cli
+    from click.testing import CliRunner
+
+    (tmp_path / "app.py").write_text("import requests\nfrom rich.console import Console\n", encoding="utf-8")
+    res = CliRunner().invoke(cli, ["scan", "--project", str(tmp_path), "--format", "ndjson"])
+    assert res.exit_code == 0, res.output
+    lines = [json.loads(line) for line in res.output.splitlines()]
+    assert lines[0] == {"type": "file", "id": 0, "path": str((tmp_path / "app.py").resolve())}
+    assert lines[1:] == [
+        {"type": "import", "file": 0, "module": "requests", "line": 1, "kind": "import"},
+        {"type": "import", "file": 0, "module": "rich.console", "line": 2, "kind": "from"},
+    ]
+
+
+_TRICKY = '''\
+"""Docstring mentioning
+import not_a_module
+"""
+from __future__ import annotations
+import os, sys as system
+import xml.etree.ElementTree as ET
+from . import sibling
+from ..pkg.mod import (
+    a,
+    b,  # comment
+)
+from ... import up
+import json \\
+    , re
+x = """
+from fake import thing
+"""
+
+def f():
+    import lazy.inner
+    return (yield
+            from gen())
+
+raise ValueError("x") \\
+    from None
+'''
+
+
+def test_tokenize_engine_matches_ast() -> None:
+    fast = import_scanner.token_records(_TRICKY)
+    assert fast is not None  # no fallback needed
+    assert fast == import_scanner.ast_records(_TRICKY)
+    assert [m for m, _line, _kind in fast] == [
+        "__future__",
+        "os",
+        "sys",
+        "xml.etree.ElementTree",
+        ".",
+        "..pkg.mod",
+        "...",
+        "json",
+        "re",
+        "lazy.inner",
+    ]
+
+
+def test_tokenize_engine_falls_back_to_ast_on_ambiguous_sources() -> None:
+    for text in ("x = 1; import os\n", "if True: import os\n"):
+        assert import_scanner.token_records(text) is None
+        assert import_scanner.source_records(text, engine="tokenize") == [("os", 1, "import")]
+    assert import_scanner.token_records("import (os)\n") is None  # unexpected token: let the AST decide
+    assert import_scanner.token_records("print(1)\n") == []
+
+
+def test_resolve_engine(monkeypatch) -> None:
+    from animadao import native
+
+    monkeypatch.setattr(native, "_scan_imports_rust", None)
+    assert native.resolve_engine("auto") == "tokenize"
+    assert native.resolve_engine("native") == "tokenize"
+    assert native.resolve_engine("ast") == "ast"
+
+    monkeypatch.setattr(native, "_scan_imports_rust", lambda paths: ["fake"])
+    assert native.resolve_engine("auto") == "native"
+    assert native.resolve_engine("auto", per_file=True) == "tokenize"
+    assert native.resolve_engine("tokenize") == "tokenize"
+
+
+def test_native_engine_under_config(tmp_path: Path, monkeypatch) -> None:
+    from dataclasses import replace
+
+    from animadao import native
+    from animadao.config import load_config
+    from animadao.scan_session import ScanSession
+
+    seen: list[list[str]] = []
+    monkeypatch.setattr(native, "_scan_imports_rust", lambda paths: seen.append(sorted(paths)) or ["fake"])
+    (tmp_path / "app.py").write_text("import requests\n", encoding="utf-8")
+    (tmp_path / "gen").mkdir()
+    (tmp_path / "gen" / "out.py").write_text("import junk\n", encoding="utf-8")
+
+    cfg = replace(load_config(tmp_path), exclude=["gen"])
+    default = ScanSession.from_config(tmp_path, cfg)  # import index + provenance: per-file records needed
+    assert default.engine_used == "tokenize"
+    assert default.imports == {"requests"} and seen == []
+
+    lean = ScanSession.from_config(tmp_path, replace(cfg, import_index=False, provenance=False))
+    assert lean.engine_used == "native"
+    assert lean.imports == {"fake"}
+    assert [[Path(p).name for p in paths] for paths in seen] == [["app.py"]]  # same walk rules as Python
+
+
+def test_cli_scan_reports_engine(tmp_path: Path) -> None:
+    import json
+
+    from animadao.cli import cli
+    from click.testing import CliRunner
+
+    (tmp_path / "requirements.txt").write_text("requests\n", encoding="utf-8")
+    (tmp_path / "app.py").write_text("import requests\nif True: import rich\n", encoding="utf-8")
+    results = {}
+    for engine in ("ast", "tokenize"):
+        res = CliRunner().invoke(cli, ["scan", "--project", str(tmp_path), "--engine", engine])
+        assert res.exit_code == 0, res.output
+        results[engine] = json.loads(res.output)
+        assert results[engine]["engine"] == engine
+    assert results["ast"]["imports"] == results["tokenize"]["imports"] == ["requests", "rich"]
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import json
+
+import httpx
+import pytest
+from animadao.http_session import HttpSession
+from animadao.index_api import SIMPLE_ACCEPT, InfoVersionScanner, latest_from_simple
+from animadao.version_checker import VersionChecker
+from packaging.version import Version
+
+DOC = {
+    "info": {
+        "description": 'braces { [ and "quotes" and \\u00e9 and "version": "0.0.0"',
+        "nested": {"version": "9.9.9", "list": [{"version": "8.8.8"}]},
+        "requires_dist": None,
+        "yanked": False,
+        "version": "1.2.3",
+    },
+    "releases": {"1.2.3": [{"filename": "x.whl"}] * 200},
+}
+
+
+def _feed_all(data: bytes, size: int) -> tuple[str | None, int]:
+    scanner = InfoVersionScanner()
+    for i in range(0, len(data), size):
+        if (v := scanner.feed(data[i : i + size])) is not None:
+            return v, i + size
+    return None, len(data)
+
+
+@pytest.mark.parametrize("size", [1, 3, 64, 1 << 20])
+def test_scanner_finds_info_version_across_chunk_boundaries(size: int) -> None:
+    data = json.dumps(DOC, indent=1).encode()
+    version, consumed = _feed_all(data, size)
+    assert version == "1.2.3"
+    assert consumed < len(data) or size >= len(data)
+
+
+def test_scanner_stops_when_info_has_no_version() -> None:
+    scanner = InfoVersionScanner()
+    assert scanner.feed(b'{"info": {"name": "x", "n": 12}, "releases": {"version": "1"}}') is None
+    assert scanner.done
+
+
+def test_latest_from_simple() -> None:
+    files = [
+        {"filename": "pkg-1.0.tar.gz", "yanked": False},
+        {"filename": "pkg-2.0-py3-none-any.whl", "yanked": "broken"},
+        {"filename": "pkg-2.1rc1.tar.gz", "yanked": False},
+    ]
+    assert latest_from_simple({"files": files}) == "1.0"
+    assert latest_from_simple({"files": files, "versions": ["1.0", "2.0", "2.1rc1", "1.5"]}) == "1.5"
+    assert latest_from_simple({"files": [], "versions": ["3.0a1"]}) == "3.0a1"
+    assert latest_from_simple({"files": [], "versions": ["1.0", "1.10", "1.9"]}) == "1.10"
+    assert latest_from_simple({"files": []}) is None
+
+
+class _Chunks(httpx.SyncByteStream, httpx.AsyncByteStream):
+    def __init__(self, data: bytes, size: int = 4096) -> None:
+        self.parts = [data[i : i + size] for i in range(0, len(data), size)]
+        self.served = 0
+
+    def __iter__(self):
+        for part in self.parts:
+            self.served += 1
+            yield part
+
+    async def __aiter__(self):
+        for part in self.parts:
+            self.served += 1
+            yield part
+
+
+def _checker(api: str, handler) -> VersionChecker:
+    return VersionChecker(api=api, ttl_seconds=0, session=HttpSession(transport=httpx.MockTransport(handler)))
+
+
+def test_stream_mode_stops_reading_after_info_version() -> None:
+    big = json.dumps({**DOC, "releases": {f"1.{i}": [{"filename": "f" * 200}] * 3 for i in range(3000)}}).encode()
+    streams: list[_Chunks] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        streams.append(_Chunks(big))
+        return httpx.Response(200, stream=streams[-1], headers={"Content-Length": str(len(big))})
+
+    checker = _checker("stream", handler)
+    assert checker.get_latest_version("boto3") == Version("1.2.3")
+    assert checker.get_latest_versions(["botocore"]) == {"botocore": Version("1.2.3")}
+    assert [s.served for s in streams] == [1, 1]
+    assert checker.session.stats.bytes_received == 2 * 4096
+
+    full = _checker("json", handler)
+    assert full.get_latest_version("boto3") == Version("1.2.3")
+    assert streams[-1].served == len(streams[-1].parts)
+
+
+def test_stream_mode_drains_small_documents() -> None:
+    small = json.dumps(DOC).encode() + b" " * 20000
+    streams: list[_Chunks] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        streams.append(_Chunks(small))
+        return httpx.Response(200, stream=streams[-1], headers={"Content-Length": str(len(small))})
+
+    assert _checker("stream", handler).get_latest_version("six") == Version("1.2.3")
+    assert streams[0].served == len(streams[0].parts)  # read to the end so the connection can be reused
+
+
+def test_simple_mode_uses_pep691() -> None:
+    seen: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request)
+        return httpx.Response(200, json={"meta": {"api-version": "1.1"}, "files": [], "versions": ["1.0", "2.0"]})
+
+    checker = _checker("simple", handler)
+    assert checker.get_latest_version("Zope.Interface") == Version("2.0")
+    assert seen[0].url.path == "/simple/zope-interface/"
+    assert seen[0].headers["Accept"] == SIMPLE_ACCEPT
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import json
+import subprocess
+import threading
+from collections.abc import Iterator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+from animadao.cli import cli
+from animadao.config import load_config
+from animadao.index_api import PYPI, PackageIndex, latest_from_simple_html
+from animadao.pypi_cache import PyPICache
+from animadao.version_checker import VersionChecker
+from click.testing import CliRunner
+from packaging.utils import canonicalize_name
+from packaging.version import Version
+
+RELEASES = {
+    "mirror": {"requests": ["2.31.0", "2.32.0"], "pyyaml": ["6.0.1", "6.0.2"]},
+    "upstream": {"requests": ["2.33.0"], "six": ["1.16.0", "1.17.0"]},
+}
+YANKED = {"6.0.2"}
+
+
+class _Index(BaseHTTPRequestHandler):
+    """
+    Stand-in index: `/<repo>/pypi/<name>/json` (JSON API), `/<repo>/simple/<name>/` (PEP 691)
+    and `/<repo>/+simple/<name>/` (PEP 503 HTML only, like a static mirror).
+    """
+
+    hits: list[str] = []
+
+    def log_message(self, *args: object) -> None:
+        pass
+
+    def _send(self, status: int, body: str = "", ctype: str = "text/plain") -> None:
+        data = body.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self) -> None:
+        self.hits.append(self.path)
+        repo, api, name = self.path.strip("/").split("/")[:3]
+        versions = RELEASES.get(repo, {}).get(canonicalize_name(name))
+        if versions is None:
+            return self._send(404)
+        files = [{"filename": f"{name}-{v}.tar.gz", "yanked": v in YANKED} for v in versions]
+        if api == "pypi":
+            self._send(200, json.dumps({"info": {"name": name, "version": versions[-1]}}), "application/json")
+        elif api == "simple":
+            assert "application/vnd.pypi.simple.v1+json" in self.headers["Accept"]
+            doc = {"meta": {"api-version": "1.1"}, "name": name, "files": files, "versions": versions}
+            self._send(200, json.dumps(doc), "application/vnd.pypi.simple.v1+json")
+        else:
+            anchors = "".join(
+                f'<a href="/f/{f["filename"]}"{" data-yanked" if f["yanked"] else ""}>{f["filename"]}</a>\n'
+                for f in files
+            )
+            self._send(200, f"<!DOCTYPE html><html><body>\n{anchors}</body></html>", "text/html; charset=utf-8")
+
+
+@pytest.fixture
+def index_server() -> Iterator[str]:
+    _Index.hits = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Index)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_package_index_parse() -> None:
+    assert PackageIndex.parse("https://pypi.org/pypi/") == PYPI
+    assert PackageIndex.parse("https://pypi.org/simple").namespace is None
+    devpi = PackageIndex.parse("http://localhost:3141/root/pypi/+simple/")
+    assert devpi.api == "simple"
+    assert devpi.project_url("Zope.Interface") == "http://localhost:3141/root/pypi/+simple/zope-interface/"
+    assert PackageIndex.parse("http://mirror/pypi").project_url("PyYAML") == "http://mirror/pypi/PyYAML/json"
+    assert devpi.namespace and devpi.namespace != PackageIndex.parse("http://mirror/pypi").namespace
+
+
+def test_latest_from_simple_html_skips_yanked() -> None:
+    page = '<a href="x">pkg-1.0.tar.gz</a><a data-yanked="" href="y">pkg-2.0-py3-none-any.whl</a>'
+    assert latest_from_simple_html(page) == "1.0"
+
+
+@pytest.mark.parametrize(("api", "pyyaml"), [("pypi", "6.0.2"), ("simple", "6.0.1"), ("+simple", "6.0.1")])
+def test_each_endpoint_kind_against_local_index(index_server: str, api: str, pyyaml: str) -> None:
+    checker = VersionChecker(index_urls=[f"{index_server}/mirror/{api}"])
+    assert checker.get_latest_version("PyYAML") == Version(pyyaml)  # the Simple API skips yanked files
+    assert checker.get_latest_versions(["requests"]) == {"requests": Version("2.32.0")}
+    assert len(_Index.hits) == 2
+
+
+def test_indexes_fall_through_in_order_with_separate_caches(index_server: str) -> None:
+    mirror, upstream = f"{index_server}/mirror/simple", f"{index_server}/upstream/pypi"
+    checker = VersionChecker(index_urls=[mirror, upstream])
+    assert checker.get_latest_versions(["requests", "six", "nope"]) == {
+        "requests": Version("2.32.0"),  # the mirror answers first
+        "six": Version("1.17.0"),  # 404 on the mirror -> upstream
+        "nope": None,
+    }
+    assert checker.get_latest_version("six") == Version("1.17.0")  # cached: 404 on mirror, hit on upstream
+    assert len(_Index.hits) == 5
+
+    on_mirror, on_upstream = (PyPICache(index_url=u) for u in (mirror, upstream))
+    assert on_mirror.load("requests")[0] == "2.32.0" and on_mirror.load("six")[0] is None
+    assert on_upstream.load("six")[0] == "1.17.0" and on_upstream.load("requests")[0] is None
+    assert len(PyPICache()) == 0  # pypi.org's cache is untouched
+
+    upstream_only = VersionChecker(index_urls=[upstream])
+    assert upstream_only.get_latest_version("requests") == Version("2.33.0")  # not poisoned by the mirror
+
+
+def test_index_urls_from_config_and_cli(index_server: str, mk_project, tmp_path: Path) -> None:
+    proj = mk_project(deps=["requests==2.31.0", "six==1.16.0"])
+    (proj["root"] / ".animadao.toml").write_text(
+        f'[index]\nurls = ["{index_server}/mirror/pypi", "{index_server}/upstream/pypi"]\n', encoding="utf-8"
+    )
+    cfg = load_config(proj["root"])
+    assert cfg.index_urls == [f"{index_server}/mirror/pypi", f"{index_server}/upstream/pypi"]
+
+    result = CliRunner().invoke(cli, ["check", "--project", str(proj["root"])])
+    assert result.exit_code == 0, result.output
+    latest = {o["name"]: o["latest"] for o in json.loads(result.output)["outdated"]}
+    assert latest == {"requests": "2.32.0", "six": "1.17.0"}
+
+    args = ["check", "--project", str(proj["root"]), "--index-url", f"{index_server}/upstream/pypi"]
+    result = CliRunner().invoke(cli, args)
+    latest = {o["name"]: o["latest"] for o in json.loads(result.output)["outdated"]}
+    assert latest == {"requests": "2.33.0", "six": "1.17.0"}
+
+    artifact = tmp_path / "mirror.json.gz"
+    CliRunner().invoke(cli, ["cache", "export", str(artifact), "--index-url", f"{index_server}/mirror/pypi"])
+    with pytest.raises(ValueError):
+        PyPICache(cache_dir=tmp_path / "other").import_file(artifact)  # a mirror export isn't pypi.org data
+    assert PyPICache(cache_dir=tmp_path / "other", index_url=f"{index_server}/mirror/pypi").import_file(artifact) == 1
+
+
+def test_background_refresh_keeps_the_indexes(monkeypatch: pytest.MonkeyPatch) -> None:
+    spawned: list[list[str]] = []
+    monkeypatch.setattr(subprocess, "Popen", lambda cmd, **kw: spawned.append(cmd))
+    checker = VersionChecker(index_urls=["http://mirror/simple/", "https://pypi.org/pypi"])
+    checker.stale.add("six")
+    checker.revalidate(background=True)
+    assert spawned[0][-5:] == ["six", "--index-url", "http://mirror/simple", "--index-url", "https://pypi.org/pypi"]
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from textwrap import dedent
+
+from animadao.cli import cli
+from animadao.lockfile import find_lockfile, read_lockfile
+from animadao.version_checker import VersionChecker
+from click.testing import CliRunner
+
+UV_LOCK = dedent("""
+    version = 1
+    requires-python = ">=3.10"
+
+    [[package]]
+    name = "demo"
+    version = "0.1.0"
+    source = { editable = "." }
+
+    [[package]]
+    name = "numpy"
+    version = "1.26.4"
+    source = { registry = "https://pypi.org/simple" }
+    resolution-markers = ["python_full_version < '3.12'"]
+
+    [[package]]
+    name = "numpy"
+    version = "2.1.0"
+    source = { registry = "https://pypi.org/simple" }
+    resolution-markers = ["python_full_version >= '3.12'"]
+
+    [[package]]
+    name = "Typing_Extensions"
+    version = "4.12.2"
+    source = { registry = "https://pypi.org/simple" }
+
+    [[package]]
+    name = "tool"
+    version = "0.3.0"
+    source = { git = "https://github.com/org/tool?rev=abc#abc" }
+""").strip()
+
+
+def test_read_uv_lock_dedups_and_skips_non_index(tmp_path: Path) -> None:
+    (tmp_path / "uv.lock").write_text(UV_LOCK, encoding="utf-8")
+    assert read_lockfile(tmp_path / "uv.lock") == {"numpy": "1.26.4", "typing-extensions": "4.12.2"}
+
+
+def test_read_poetry_lock_and_pylock(tmp_path: Path) -> None:
+    (tmp_path / "poetry.lock").write_text(
+        dedent("""
+        [[package]]
+        name = "requests"
+        version = "2.31.0"
+
+        [[package]]
+        name = "internal"
+        version = "1.0"
+        [package.source]
+        type = "legacy"
+        url = "https://pypi.example/simple"
+
+        [[package]]
+        name = "vendored"
+        version = "0.1"
+        [package.source]
+        type = "directory"
+        url = "../vendored"
+    """).strip(),
+        encoding="utf-8",
+    )
+    assert read_lockfile(tmp_path / "poetry.lock") == {"requests": "2.31.0", "internal": "1.0"}
+
+    (tmp_path / "pylock.toml").write_text(
+        dedent("""
+        lock-version = "1.0"
+        created-by = "pip"
+
+        [[packages]]
+        name = "attrs"
+        version = "23.1.0"
+
+        [[packages]]
+        name = "local"
+        directory = { path = "./local" }
+
+        [[packages]]
+        name = "fromgit"
+        version = "1.0"
+        vcs = { type = "git", url = "https://example/x.git", commit-id = "abc" }
+    """).strip(),
+        encoding="utf-8",
+    )
+    assert read_lockfile(tmp_path / "pylock.toml") == {"attrs": "23.1.0"}
+    assert find_lockfile(tmp_path) == tmp_path / "poetry.lock"  # detection order
+
+
+def test_repo_uv_lock_is_readable() -> None:
+    locked = read_lockfile(Path(__file__).resolve().parents[1] / "uv.lock")
+    assert "httpx" in locked and "click" in locked
+    assert "anima-dao" not in locked  # the project itself
+
+
+def test_check_locked_mode_batches_once(tmp_path: Path, monkeypatch) -> None:
+    (tmp_path / "uv.lock").write_text(UV_LOCK, encoding="utf-8")
+    (tmp_path / "pyproject.toml").write_text('[project]\nname = "demo"\nversion = "0.1.0"\n', encoding="utf-8")
+
+    batches: list[list[str]] = []
+
+    def fake_latest(_self, names):
+        from packaging.version import Version
+
+        names = list(names)
+        batches.append(names)
+        return {n: Version({"numpy": "2.1.0"}.get(n, "4.12.2")) for n in names}
+
+    monkeypatch.setattr(VersionChecker, "get_latest_versions", fake_latest)
+    res = CliRunner().invoke(cli, ["check", "--project", str(tmp_path), "--mode", "locked"])
+    assert res.exit_code == 0, res.output
+    data = json.loads(res.output)
+    assert data["mode"] == "locked"
+    assert data["outdated"] == [{"name": "numpy", "current": "1.26.4", "latest": "2.1.0"}]
+    assert batches == [["numpy", "typing-extensions"]]
+
+
+def test_check_locked_mode_without_lockfile(tmp_path: Path) -> None:
+    (tmp_path / "pyproject.toml").write_text('[project]\nname = "demo"\nversion = "0.1.0"\n', encoding="utf-8")
+    res = CliRunner().invoke(cli, ["check", "--project", str(tmp_path), "--mode", "locked"])
+    assert res.exit_code != 0
+    assert isinstance(res.exception, FileNotFoundError)
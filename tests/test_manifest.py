@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import os
+import time
+from pathlib import Path
+
+import pytest
+from animadao import config
+from animadao.config import load_config
+from animadao.manifest import ProjectManifest
+
+
+def _age(*paths: Path, seconds: int = 60) -> None:
+    # make files look settled (older than the racy window)
+    past = time.time_ns() - seconds * 1_000_000_000
+    for p in paths:
+        os.utime(p, ns=(past, past))
+
+
+@pytest.fixture
+def count_toml_parses(monkeypatch) -> list[int]:
+    calls = [0]
+    real = config.tomli.loads
+
+    def counting(text: str):
+        calls[0] += 1
+        return real(text)
+
+    monkeypatch.setattr(config.tomli, "loads", counting)
+    monkeypatch.setattr(config, "_TOML_MEMO", {})
+    return calls
+
+
+def test_manifest_exposes_all_sources(tmp_path: Path) -> None:
+    (tmp_path / "pyproject.toml").write_text(
+        '[project]\nname = "x"\ndependencies = ["requests==2.31.0"]\n\n'
+        '[tool.poetry.dependencies]\npython = "^3.11"\nrich = "^13.0"\n',
+        encoding="utf-8",
+    )
+    (tmp_path / "requirements.txt").write_text("numpy>=1.26\n-r extra.txt\n", encoding="utf-8")
+    (tmp_path / "extra.txt").write_text("httpx\n", encoding="utf-8")
+
+    m = ProjectManifest.load(tmp_path)
+    assert m.source == "pep621"
+    assert [r.name for r in m.declared.requirements] == ["requests"]
+    assert [str(r) for r in m.poetry or []] == ["rich<14.0.0,>=13.0.0"]
+    assert [r.name for r in m.requirements_txt or []] == ["numpy", "httpx"]
+    assert m.has_sources
+
+
+def test_manifest_without_sources(tmp_path: Path) -> None:
+    m = ProjectManifest.load(tmp_path)
+    assert not m.has_sources and m.source is None
+    with pytest.raises(FileNotFoundError):
+        _ = m.declared
+
+
+def test_manifest_is_parsed_once_and_invalidated_on_change(tmp_path: Path, count_toml_parses) -> None:
+    pyproject = tmp_path / "pyproject.toml"
+    pyproject.write_text('[project]\nname = "x"\ndependencies = ["requests"]\n', encoding="utf-8")
+    _age(pyproject)
+
+    first = ProjectManifest.load(tmp_path)
+    assert ProjectManifest.load(tmp_path) is first
+    assert ProjectManifest.load(str(tmp_path)) is first
+    assert count_toml_parses[0] == 1
+
+    pyproject.write_text('[project]\nname = "x"\ndependencies = ["requests", "rich"]\n', encoding="utf-8")
+    _age(pyproject, seconds=30)
+    second = ProjectManifest.load(tmp_path)
+    assert second is not first
+    assert [r.name for r in second.declared.requirements] == ["requests", "rich"]
+    assert count_toml_parses[0] == 2
+
+
+def test_recently_written_files_are_not_memoized(tmp_path: Path, count_toml_parses) -> None:
+    (tmp_path / "pyproject.toml").write_text('[project]\nname = "x"\n', encoding="utf-8")
+    assert ProjectManifest.load(tmp_path) is not ProjectManifest.load(tmp_path)
+    assert count_toml_parses[0] == 2
+
+
+def test_included_requirements_file_invalidates(tmp_path: Path) -> None:
+    req, extra = tmp_path / "requirements.txt", tmp_path / "extra.txt"
+    req.write_text("-r extra.txt\n", encoding="utf-8")
+    extra.write_text("httpx\n", encoding="utf-8")
+    _age(req, extra)
+    m = ProjectManifest.load(tmp_path)
+    assert [r.name for r in m.declared.requirements] == ["httpx"]
+    assert ProjectManifest.load(tmp_path) is m
+
+    extra.write_text("httpx\nrich\n", encoding="utf-8")
+    _age(extra, seconds=30)
+    assert [r.name for r in ProjectManifest.load(tmp_path).declared.requirements] == ["httpx", "rich"]
+
+
+def test_load_config_memoizes_toml(tmp_path: Path, count_toml_parses) -> None:
+    cfg_file = tmp_path / ".animadao.toml"
+    cfg_file.write_text('[core]\nmode = "installed"\n', encoding="utf-8")
+    _age(cfg_file)
+    assert load_config(tmp_path).mode == "installed"
+    assert load_config(tmp_path).mode == "installed"
+    assert count_toml_parses[0] == 1
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import gzip
+import json
+from pathlib import Path
+
+import httpx
+import pytest
+from animadao.cli import cli
+from animadao.http_session import HttpSession
+from animadao.pypi_cache import PyPICache
+from animadao.version_checker import VersionChecker
+from click.testing import CliRunner
+from packaging.version import Version
+
+
+def _unreachable(request: httpx.Request) -> httpx.Response:
+    raise AssertionError(f"network used in offline mode: {request.url}")
+
+
+def test_offline_answers_from_cache_of_any_age() -> None:
+    PyPICache().save("requests", "2.31.0", None)
+    checker = VersionChecker(
+        ttl_seconds=0, offline=True, session=HttpSession(transport=httpx.MockTransport(_unreachable))
+    )
+    assert checker.get_latest_version("requests") == Version("2.31.0")
+    assert checker.get_latest_versions(["Requests", "unknown"]) == {"Requests": Version("2.31.0"), "unknown": None}
+    assert checker.refresh(["requests"]) == {"requests": Version("2.31.0")}
+    assert checker.revalidate() == []
+    assert checker.session.stats.requests == 0
+
+
+def test_export_import_round_trip_keeps_newer_entries(tmp_path: Path) -> None:
+    source = PyPICache(cache_dir=tmp_path / "ci")
+    source.save_many([("requests", "2.32.0", '"r"'), ("six", "1.16.0", None)])
+    source.save_missing(["internal-only"])
+    artifact = tmp_path / "out" / "pypi-cache.json.gz"
+    assert source.export(artifact) == 2
+    assert json.loads(gzip.decompress(artifact.read_bytes()))["format"] == 1
+
+    runner = PyPICache(cache_dir=tmp_path / "runner")
+    runner.save("six", "1.17.0", None)  # fetched after the export: stays
+    assert runner.import_file(artifact) == 2
+    assert runner.load("requests")[:2] == ("2.32.0", '"r"')
+    assert runner.load("requests")[2] == source.load("requests")[2]  # original timestamp kept
+    assert runner.load("six")[0] == "1.17.0"
+    assert runner.load_missing(["internal-only"]) == {"internal-only"}
+
+    (tmp_path / "bogus.json").write_text('{"format": 99}', encoding="utf-8")
+    with pytest.raises(ValueError):
+        runner.import_file(tmp_path / "bogus.json")
+
+
+def test_check_offline_flag_and_env(mk_project, monkeypatch: pytest.MonkeyPatch) -> None:
+    proj = mk_project(deps=["requests==2.30.0", "six==1.16.0"])
+    PyPICache().save("requests", "2.32.0", None)
+    monkeypatch.setattr(VersionChecker, "_async_client", lambda self: pytest.fail("network used"))
+
+    result = CliRunner().invoke(cli, ["check", "--project", str(proj["root"]), "--offline"])
+    assert result.exit_code == 0, result.output
+    assert json.loads(result.output)["outdated"] == [{"name": "requests", "current": "2.30.0", "latest": "2.32.0"}]
+
+    result = CliRunner().invoke(cli, ["check", "--project", str(proj["root"])], env={"ANIMADAO_OFFLINE": "1"})
+    assert result.exit_code == 0, result.output
+
+
+def test_cache_warm_export_import_commands(mk_project, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    proj = mk_project(deps=["requests==2.30.0", "numpy>=1.26", "private-pkg"])
+    batches: list[list[str]] = []
+
+    def fake_latest(self: VersionChecker, names):
+        names = list(names)
+        batches.append(names)
+        assert self.stale_seconds == 0
+        found = {n: Version("2.32.0") if n == "requests" else Version("2.0.0") for n in names if n != "private-pkg"}
+        self.cache.save_many([(n, str(v), None) for n, v in found.items()])
+        return {n: found.get(n) for n in names}
+
+    monkeypatch.setattr(VersionChecker, "get_latest_versions", fake_latest)
+    result = CliRunner().invoke(cli, ["cache", "warm", "--project", str(proj["root"])])
+    assert result.exit_code == 0, result.output
+    out = json.loads(result.output)
+    assert (out["mode"], out["packages"], out["cached"], out["not_found"]) == ("declared", 3, 2, ["private-pkg"])
+    assert batches == [["requests", "numpy", "private-pkg"]]
+
+    artifact = tmp_path / "cache.json.gz"
+    result = CliRunner().invoke(cli, ["cache", "export", str(artifact)])
+    assert json.loads(result.output)["entries"] == 2
+
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "fresh-runner"))
+    result = CliRunner().invoke(cli, ["cache", "import", str(artifact)])
+    assert result.exit_code == 0, result.output
+    assert PyPICache().load("numpy")[0] == "2.0.0"
+
+    (proj["root"] / ".animadao.toml").write_text("[core]\npypi_offline = true\n", encoding="utf-8")
+    offline = CliRunner().invoke(cli, ["cache", "warm", "--project", str(proj["root"])])
+    assert offline.exit_code == 2 and "needs the network" in offline.output
+
+
+def test_cache_import_rejects_broken_artifacts(tmp_path: Path) -> None:
+    good = gzip.compress(json.dumps({"format": 1, "index": None, "latest": [["six", "1.16.0", None, 1.0]]}).encode())
+    broken = {
+        "truncated.json.gz": good[: len(good) // 2],
+        "corrupt.json.gz": good[:10] + b"\0" * 20 + good[30:],
+        "rows.json": json.dumps({"format": 1, "index": None, "latest": [["six"]], "missing": [None]}).encode(),
+    }
+    for name, data in broken.items():
+        (tmp_path / name).write_bytes(data)
+        result = CliRunner().invoke(cli, ["cache", "import", str(tmp_path / name)])
+        assert isinstance(result.exception, SystemExit), (name, result.exception)  # a message, not a traceback
+        assert result.exit_code == 1 and "Error: " in result.output
+    assert len(PyPICache()) == 0
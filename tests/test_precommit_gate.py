@@ -139,20 +139,13 @@ def test_gate_ignore_suppresses_failure(tmp_path: Path, monkeypatch) -> None:
 
 
 def test_gate_installed_mode_outdated_fails(tmp_path: Path, monkeypatch) -> None:
-    # Fake importlib.metadata.distributions()
-    class FakeDist:
-        def __init__(self, name: str, version: str) -> None:
-            self.metadata = {"Name": name}
-            self.version = version
-
-    import importlib.metadata as im
-
-    monkeypatch.setattr(
-        im,
-        "distributions",
-        lambda: [FakeDist("requests", "2.31.0"), FakeDist("numpy", "1.26.0")],
-        raising=True,
-    )
+    # Fake environment: a site-packages dir with two installed distributions
+    site = tmp_path / "venv" / "lib" / "python3.11" / "site-packages"
+    for name, version in (("requests", "2.31.0"), ("numpy", "1.26.0")):
+        (site / f"{name}-{version}.dist-info").mkdir(parents=True)
+        (site / f"{name}-{version}.dist-info" / "METADATA").write_text(
+            f"Metadata-Version: 2.1\nName: {name}\nVersion: {version}\n\nbody\n", encoding="utf-8"
+        )
     # Only requests is outdated
     monkeypatch.setattr(
         VersionChecker,
@@ -162,7 +155,10 @@ def test_gate_installed_mode_outdated_fails(tmp_path: Path, monkeypatch) -> None
     )
 
     runner = CliRunner()
-    res = runner.invoke(gate.main, ["--project", str(tmp_path), "--mode", "installed", "--fail-if-outdated"])
+    res = runner.invoke(
+        gate.main,
+        ["--project", str(tmp_path), "--mode", "installed", "--fail-if-outdated", "--python", str(tmp_path / "venv")],
+    )
     assert res.exit_code == 2, res.output
     assert '"outdated": 1' in res.output
     assert '"mode": "installed"' in res.output
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+from animadao.cli import cli
+from animadao.import_scanner import ImportRecord
+from animadao.provenance import ProvenanceBuilder, ProvenanceIndex
+from animadao.scan_session import ScanSession
+from click.testing import CliRunner
+
+
+def _index() -> ProvenanceIndex:
+    b = ProvenanceBuilder()
+    b.add_file(7, Path("/p/z.py"))
+    b.add_file(3, Path("/p/a.py"))
+    b.add(ImportRecord(7, "requests.adapters", 4, "from"))
+    b.add(ImportRecord(3, "requests", 1, "import"))
+    b.add(ImportRecord(3, "os", 2, "import"))
+    b.add(ImportRecord(3, ".", 3, "from"))  # `from . import x`: no top-level name
+    return b.build()
+
+
+def test_provenance_lookup_and_roundtrip(tmp_path: Path) -> None:
+    prov = _index()
+    assert prov.modules == ["os", "requests"]
+    assert [(s.path, s.lineno, s.module) for s in prov.sites("requests")] == [
+        ("/p/a.py", 1, "requests"),
+        ("/p/z.py", 4, "requests.adapters"),
+    ]
+    assert prov.sites("missing") == []
+
+    path = tmp_path / "prov.bin"
+    prov.save(path)
+    loaded = ProvenanceIndex.load(path)
+    assert loaded.modules == prov.modules
+    assert loaded.sites("requests") == prov.sites("requests")
+    assert loaded.sites("os") == prov.sites("os")
+
+
+def test_provenance_load_rejects_garbage(tmp_path: Path) -> None:
+    path = tmp_path / "prov.bin"
+    _index().save(path)
+    path.write_bytes(path.read_bytes()[:-3])
+    with pytest.raises(ValueError):
+        ProvenanceIndex.load(path)
+    path.write_bytes(b"nope")
+    with pytest.raises(ValueError):
+        ProvenanceIndex.load(path)
+    for header in (b'{"modules": []}', b"[1, 2]"):  # fields missing, not an object
+        path.write_bytes(b"ADPROV1\n" + len(header).to_bytes(4, "little") + header)
+        with pytest.raises(ValueError):
+            ProvenanceIndex.load(path)
+
+
+def test_why_rescans_over_a_corrupt_index(tmp_path: Path) -> None:
+    (tmp_path / "m.py").write_text("import yaml\n", encoding="utf-8")
+    session = ScanSession([tmp_path], provenance=True)
+    assert session.imports == {"yaml"}
+    header = b'{"modules": []}'
+    session.provenance_path.write_bytes(b"ADPROV1\n" + len(header).to_bytes(4, "little") + header)
+    result = CliRunner().invoke(cli, ["why", "yaml", "--project", str(tmp_path)])
+    assert result.exit_code == 0, result.output  # unreadable index: rescan instead of crashing
+    assert [s["line"] for s in json.loads(result.output)["sites"]] == [1]
+
+
+def test_session_writes_provenance(tmp_path: Path) -> None:
+    (tmp_path / "m.py").write_text("import yaml\n", encoding="utf-8")
+    session = ScanSession([tmp_path], provenance=True)
+    assert session.imports == {"yaml"}
+    prov = ProvenanceIndex.load(session.provenance_path)
+    assert [(Path(s.path).name, s.lineno) for s in prov.sites("yaml")] == [("m.py", 1)]
+
+
+def test_cli_why_by_module_and_distribution(tmp_path: Path) -> None:
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "a.py").write_text("import os\nfrom bs4 import BeautifulSoup\n", encoding="utf-8")
+    (src / "b.py").write_text("import bs4.element\n", encoding="utf-8")
+    runner = CliRunner()
+
+    res = runner.invoke(cli, ["why", "bs4", "--project", str(tmp_path), "--src", str(src)])
+    assert res.exit_code == 0, res.output
+    data = json.loads(res.output)
+    assert data["modules"] == ["bs4"]
+    assert [(Path(s["path"]).name, s["line"], s["module"]) for s in data["sites"]] == [
+        ("a.py", 2, "bs4"),
+        ("b.py", 1, "bs4.element"),
+    ]
+
+    # answered from the stored index: a new import is invisible until --rescan
+    (src / "c.py").write_text("import bs4\n", encoding="utf-8")
+    res = runner.invoke(cli, ["why", "beautifulsoup4", "--project", str(tmp_path), "--src", str(src)])
+    assert res.exit_code == 0, res.output
+    assert len(json.loads(res.output)["sites"]) == 2
+
+    res = runner.invoke(cli, ["why", "beautifulsoup4", "--project", str(tmp_path), "--src", str(src), "--rescan"])
+    assert len(json.loads(res.output)["sites"]) == 3
+
+    res = runner.invoke(cli, ["why", "numpy", "--project", str(tmp_path), "--src", str(src)])
+    assert json.loads(res.output) == {"name": "numpy", "stdlib": False, "modules": [], "sites": []}
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import json
+import multiprocessing
+from pathlib import Path
+
+from animadao.pypi_cache import PyPICache
+
+
+def test_load_many_and_save_many_by_canonical_name(tmp_path: Path) -> None:
+    cache = PyPICache(cache_dir=tmp_path)
+    cache.save_many([("PyYAML", "6.0.1", '"e1"'), ("requests", "2.32.0", None)])
+    got = cache.load_many(["pyyaml", "Requests", "missing"])
+    assert got["pyyaml"][:2] == ("6.0.1", '"e1"')
+    assert got["Requests"][:2] == ("2.32.0", None)
+    assert got["missing"] == (None, None, 0.0)
+    assert cache.load("py-yaml") == (None, None, 0.0)
+    assert cache.load("PYYAML")[0] == "6.0.1"
+
+    cache.save("pyyaml", "6.0.2", None)
+    reopened = PyPICache(cache_dir=tmp_path)
+    assert reopened.load("pyyaml")[0] == "6.0.2"
+    assert len(reopened) == 2
+
+
+def test_migrates_legacy_json_directory_once(tmp_path: Path) -> None:
+    legacy = tmp_path / "pypi"
+    legacy.mkdir()
+    (legacy / "requests.json").write_text(json.dumps({"version": "2.31.0", "etag": '"x"', "ts": 123.0}), "utf-8")
+    (legacy / "broken.json").write_text("{not json", "utf-8")
+
+    cache = PyPICache(cache_dir=tmp_path)
+    assert cache.load("requests") == ("2.31.0", '"x"', 123.0)
+    assert cache.load("broken") == (None, None, 0.0)
+
+    # files added after the migration are not re-imported; rows written since then win
+    cache.save("requests", "2.32.0", None)
+    (legacy / "six.json").write_text(json.dumps({"version": "1.16.0", "ts": 1.0}), "utf-8")
+    again = PyPICache(cache_dir=tmp_path)
+    assert again.load("requests")[0] == "2.32.0"
+    assert again.load("six")[0] is None
+
+
+def _writer(root: str, worker: int) -> None:
+    cache = PyPICache(cache_dir=Path(root))
+    for batch in range(10):
+        cache.save_many([(f"pkg-{worker}-{batch}-{i}", "1.0", None) for i in range(20)])
+        cache.load_many([f"pkg-{(worker + 1) % 4}-{batch}-{i}" for i in range(20)])
+
+
+def test_parallel_processes_share_one_store(tmp_path: Path) -> None:
+    ctx = multiprocessing.get_context("spawn")
+    procs = [ctx.Process(target=_writer, args=(str(tmp_path), w)) for w in range(4)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(60)
+    assert [p.exitcode for p in procs] == [0, 0, 0, 0]
+    assert len(PyPICache(cache_dir=tmp_path)) == 4 * 10 * 20
+
+
+def test_unwritable_location_falls_back_to_memory(tmp_path: Path) -> None:
+    blocker = tmp_path / "file"
+    blocker.write_text("", "utf-8")
+    cache = PyPICache(cache_dir=blocker / "sub")
+    cache.save("x", "1.0", None)
+    assert cache.load("x")[0] == "1.0"
+
+
+def test_missing_names_expire_after_negative_ttl(tmp_path: Path) -> None:
+    cache = PyPICache(cache_dir=tmp_path, negative_ttl=3600)
+    cache.save_missing(["No-Such-Pkg"])
+    assert cache.load_missing(["no_such_pkg", "requests"]) == {"no_such_pkg"}
+    assert PyPICache(cache_dir=tmp_path, negative_ttl=0).load_missing(["no-such-pkg"]) == set()
+
+    cache.save("no-such-pkg", "1.0", None)  # published since: the 404 is forgotten
+    assert cache.load_missing(["no-such-pkg"]) == set()
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import httpx
+import pytest
+from animadao.cli import cli
+from animadao.config import load_config
+from animadao.http_session import HttpSession
+from animadao.release_history import ReleaseHistory, lowest_python
+from animadao.version_checker import VersionChecker
+from click.testing import CliRunner
+from packaging.requirements import Requirement
+from packaging.version import Version
+
+# JSON API `releases` of a project with 1.x and 2.x lines, a pre-release, a yanked release,
+# a release without files and a Python floor raised in 2.1
+RELEASES = {
+    "1.9.0": [{"yanked": False, "requires_python": ">=3.7"}],
+    "1.10.0": [{"yanked": False, "requires_python": ">=3.7"}],
+    "1.10.1": [{"yanked": True, "requires_python": ">=3.7"}],
+    "2.0.0": [{"yanked": False, "requires_python": ">=3.8"}],
+    "2.1.0": [{"yanked": False, "requires_python": ">=3.10"}, {"yanked": True, "requires_python": ">=3.10"}],
+    "2.2.0rc1": [{"yanked": False, "requires_python": ">=3.10"}],
+    "2.3.0": [],
+    "not-a-version": [{"yanked": False}],
+}
+
+
+def _history() -> ReleaseHistory:
+    return ReleaseHistory.from_json_api({"info": {"version": "2.1.0"}, "releases": RELEASES})
+
+
+def test_history_is_sorted_and_answers_policies() -> None:
+    h = _history()
+    assert h.versions == ["1.9.0", "1.10.0", "1.10.1", "2.0.0", "2.1.0", "2.2.0rc1"]
+    assert h.latest() == Version("2.1.0")
+    assert h.latest(prereleases=True) == Version("2.2.0rc1")
+    assert h.latest_within_major(Version("1.9.0")) == Version("1.10.0")  # 1.10.1 is yanked
+    assert h.latest(python=Version("3.9.1")) == Version("2.0.0")
+    assert h.latest(python=Version("3.6")) is None
+    assert h.is_yanked(Version("1.10.1")) and not h.is_yanked(Version("2.1.0"))  # one live file is enough
+    assert not h.is_yanked(Version("9.9"))
+    assert h.requires_python(Version("2.0")) == ">=3.8"
+    assert h.select("major", Version("2.0"), Version("3.12")) == Version("2.1.0")
+    assert h.select("python", Version("1.9"), Version("3.8")) == Version("2.0.0")
+
+
+def test_blob_round_trip_is_compact() -> None:
+    h = ReleaseHistory.build((f"1.{i}", i == 3, ">=3.8" if i < 50 else ">=3.9") for i in range(200))
+    blob = h.to_blob()
+    again = ReleaseHistory.from_blob(blob)
+    assert again.versions == h.versions and again.yanked == {3}
+    assert again.requires_python(Version("1.49")) == ">=3.8" and again.requires_python(Version("1.50")) == ">=3.9"
+    assert len(blob) < 600  # runs of requires-python instead of one per release
+
+
+def test_simple_pages_give_the_same_history() -> None:
+    files = [
+        {"filename": "demo-1.0.tar.gz", "yanked": False, "requires-python": ">=3.8"},
+        {"filename": "demo-1.1-py3-none-any.whl", "yanked": "broken", "requires-python": ">=3.8"},
+        {"filename": "demo-2.0-py3-none-any.whl", "yanked": False, "requires-python": ">=3.10"},
+    ]
+    h = ReleaseHistory.from_simple({"files": files})
+    assert h.versions == ["1.0", "1.1", "2.0"] and h.yanked == {1}
+    html = (
+        '<a href="demo-1.0.tar.gz" data-requires-python="&gt;=3.8">demo-1.0.tar.gz</a>'
+        '<a href="demo-1.1.tar.gz" data-yanked="">demo-1.1.tar.gz</a>'
+    )
+    h = ReleaseHistory.from_simple_html(html)
+    assert h.is_yanked(Version("1.1")) and h.requires_python(Version("1.0")) == ">=3.8"
+
+
+@pytest.mark.parametrize(
+    ("spec", "lowest"), [(">=3.9", "3.9.0"), (">=3.8.2,<4", "3.8.2"), ("~=3.10", "3.10.0"), ("bogus", None)]
+)
+def test_lowest_python(spec: str, lowest: str | None) -> None:
+    assert lowest_python(spec) == (Version(lowest) if lowest else None)
+
+
+def _checker(requests: list[str], **kwargs) -> VersionChecker:
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request.url.path)
+        return httpx.Response(200, json={"info": {"version": "2.1.0"}, "releases": RELEASES}, headers={"ETag": '"v1"'})
+
+    return VersionChecker(session=HttpSession(transport=httpx.MockTransport(handler)), **kwargs)
+
+
+def test_policies_share_one_fetch_and_the_cache() -> None:
+    requests: list[str] = []
+    pins = {"demo": Version("1.9.0")}
+    assert _checker(requests, policy="final").latest_by_policy(pins) == {"demo": Version("2.1.0")}
+    assert requests == ["/pypi/demo/json"]
+    major = _checker(requests, policy="major")
+    assert major.latest_by_policy(pins) == {"demo": Version("1.10.0")}
+    assert _checker(requests, policy="python", python_version="3.9").latest_by_policy(pins) == {
+        "demo": Version("2.0.0")
+    }
+    assert requests == ["/pypi/demo/json"]  # answered from the cached history
+    assert major.cache.load("demo")[0] == "2.1.0"  # the same document refreshed the latest version
+
+
+def test_history_policy_flags_yanked_pins() -> None:
+    checker = _checker([], policy="major")
+    outdated, _ = checker.check_declared([Requirement("demo==1.10.1"), Requirement("other==1.0")])
+    assert [(o.name, o.latest) for o in outdated] == [("other", "1.10.0")]  # demo's 1.10.0 is older than the pin
+    assert checker.yanked == {"demo": "1.10.1"}
+    with pytest.raises(ValueError, match="unknown version policy"):
+        VersionChecker(policy="newest")
+
+
+def test_offline_uses_any_cached_history() -> None:
+    _checker([], policy="final").get_release_histories(["demo"])
+    offline = VersionChecker(offline=True, policy="final", ttl_seconds=0)
+    assert offline.latest_by_policy({"demo": Version("1.0")}) == {"demo": Version("2.1.0")}
+    assert offline.get_release_histories(["unknown"]) == {"unknown": None}
+
+
+def test_check_policy_from_config_and_requires_python(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    (tmp_path / "pyproject.toml").write_text(
+        '[project]\nname = "x"\nversion = "0"\nrequires-python = ">=3.9"\ndependencies = ["demo==1.10.1"]\n',
+        encoding="utf-8",
+    )
+    (tmp_path / ".animadao.toml").write_text('[core]\nversion_policy = "python"\n', encoding="utf-8")
+    cfg = load_config(tmp_path)
+    assert cfg.version_policy == "python" and cfg.target_python is None
+    assert VersionChecker.from_config(cfg, tmp_path).python == Version("3.9")
+
+    monkeypatch.setattr(VersionChecker, "get_release_histories", lambda self, names: dict.fromkeys(names, _history()))
+    result = CliRunner().invoke(cli, ["check", "--project", str(tmp_path)])
+    assert result.exit_code == 0, result.output
+    out = json.loads(result.output)
+    assert out["policy"] == "python"
+    assert out["outdated"] == [{"name": "demo", "current": "1.10.1", "latest": "2.0.0"}]
+    assert out["yanked"] == [{"name": "demo", "version": "1.10.1"}]
+
+    result = CliRunner().invoke(cli, ["check", "--project", str(tmp_path), "--policy", "major"])
+    assert json.loads(result.output)["outdated"] == []
@@ -44,3 +44,19 @@ def test_report(tmp_path: Path, monkeypatch) -> None:
     assert data["summary"]["declared"] == 2
     assert data["summary"]["unused"] == 1
     assert any(o["name"] == "requests" for o in data["outdated"])
+
+
+def test_report_closes_only_its_own_checker(tmp_path: Path, monkeypatch) -> None:
+    from animadao.version_checker import VersionChecker
+
+    (tmp_path / "requirements.txt").write_text("requests\n", encoding="utf-8")
+    closed: list[VersionChecker] = []
+    monkeypatch.setattr(VersionChecker, "close", lambda self: closed.append(self))
+    monkeypatch.setattr(VersionChecker, "check_declared", lambda self, reqs: ([], []))
+
+    generate_report(project_root=tmp_path)
+    assert len(closed) == 1  # built here, closed here
+
+    mine = VersionChecker()
+    generate_report(project_root=tmp_path, checker=mine)
+    assert mine not in closed  # the caller's checker stays open
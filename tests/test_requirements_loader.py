@@ -51,3 +51,69 @@ def test_requirements_txt_basic(tmp_path: Path, monkeypatch) -> None:
     data = json.loads(out.read_text(encoding="utf-8"))
     assert data["summary"]["declared"] == 2
     assert data["summary"]["unused"] == 1
+
+
+def test_requirements_txt_hashes_includes_and_options(tmp_path: Path) -> None:
+    from animadao.requirements_file import iter_requirement_lines
+
+    (tmp_path / "requirements.txt").write_text(
+        dedent("""
+        --index-url https://pypi.example/simple
+        --require-hashes
+        -c constraints.txt
+        requests==2.31.0 \\
+            --hash=sha256:aaaa \\
+            --hash=sha256:bbbb
+            # via app
+        rich>=13 ; python_version >= "3.8"  # inline comment
+        -e git+https://github.com/org/tool.git@v1#egg=tool
+        -e ./local/pkg
+        https://files.example/pkgs/lib-1.0.tar.gz#egg=lib&subdirectory=x
+        attrs @ https://files.example/attrs-23.1.0-py3-none-any.whl
+        ./vendored/thing
+        --requirement=more/dev.txt
+    """).strip(),
+        encoding="utf-8",
+    )
+    (tmp_path / "constraints.txt").write_text("urllib3<3\n", encoding="utf-8")
+    (tmp_path / "more").mkdir()
+    (tmp_path / "more" / "dev.txt").write_text("-r ../requirements.txt\npytest\n", encoding="utf-8")
+
+    lines = list(iter_requirement_lines(tmp_path / "requirements.txt"))
+    assert [(ln.spec, ln.kind) for ln in lines] == [
+        ("urllib3<3", "constraint"),
+        ("requests==2.31.0", "requirement"),
+        ('rich>=13 ; python_version >= "3.8"', "requirement"),
+        ("tool @ git+https://github.com/org/tool.git@v1", "editable"),
+        ("lib @ https://files.example/pkgs/lib-1.0.tar.gz", "url"),
+        ("attrs @ https://files.example/attrs-23.1.0-py3-none-any.whl", "requirement"),
+        ("pytest", "requirement"),
+    ]
+    assert lines[1].lineno == 4
+    assert Path(lines[-1].path).name == "dev.txt"
+
+    declared = load_declared_deps_any(tmp_path).requirements
+    assert [r.name for r in declared] == ["requests", "rich", "tool", "lib", "attrs", "pytest"]
+
+
+def test_requirements_txt_deep_includes_and_cycles(tmp_path: Path) -> None:
+    depth = 12
+    for i in range(depth):
+        nxt = f"-r req{i + 1}.txt\n" if i + 1 < depth else "-r req0.txt\n"  # last one closes a cycle
+        (tmp_path / f"req{i}.txt").write_text(f"pkg{i}\n{nxt}", encoding="utf-8")
+    (tmp_path / "requirements.txt").write_text("-r req0.txt\n", encoding="utf-8")
+
+    declared = load_declared_deps_any(tmp_path).requirements
+    assert [r.name for r in declared] == [f"pkg{i}" for i in range(depth)]
+
+
+def test_requirement_parsing_is_interned(tmp_path: Path) -> None:
+    from animadao.requirements_file import parse_requirement
+
+    for name in ("a", "b"):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "requirements.txt").write_text("requests==2.31.0\nnot a valid spec!!\n", encoding="utf-8")
+    first = load_declared_deps_any(tmp_path / "a").requirements
+    second = load_declared_deps_any(tmp_path / "b").requirements
+    assert len(first) == len(second) == 1
+    assert first[0] is second[0] is parse_requirement("requests==2.31.0")
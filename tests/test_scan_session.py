@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from animadao import import_scanner
+from animadao.report_generator import generate_report
+from animadao.scan_session import ScanSession, canonical_roots
+from animadao.version_checker import VersionChecker
+from packaging.version import Version
+
+
+def _mk(root: Path, rel: str, content: str) -> None:
+    p = root / rel
+    p.parent.mkdir(parents=True, exist_ok=True)
+    p.write_text(content, encoding="utf-8")
+
+
+def test_canonical_roots_drops_duplicates_only(tmp_path: Path) -> None:
+    (tmp_path / "tests").mkdir()
+    (tmp_path / "pkg").mkdir()
+    roots = canonical_roots([tmp_path / "tests", tmp_path, tmp_path / "tests" / ".." / "tests", tmp_path / "pkg"])
+    assert roots == [(tmp_path / "tests").resolve(), tmp_path.resolve(), (tmp_path / "pkg").resolve()]
+
+    assert canonical_roots([tmp_path / "pkg", tmp_path / "tests"]) == [
+        (tmp_path / "pkg").resolve(),
+        (tmp_path / "tests").resolve(),
+    ]
+
+
+def test_session_parses_each_file_once(tmp_path: Path, monkeypatch) -> None:
+    _mk(tmp_path, "pkg/a.py", "import requests\n")
+    _mk(tmp_path, "tests/test_a.py", "import rich\n")
+
+    parsed: list[str] = []
+    real = import_scanner.source_records
+
+    def counting(text: str, filename: str = "<unknown>", **kw) -> list[tuple[str, int, str]]:
+        parsed.append(filename)
+        return real(text, filename, **kw)
+
+    monkeypatch.setattr(import_scanner, "source_records", counting)
+
+    session = ScanSession([tmp_path, tmp_path / "tests", tmp_path / "pkg"])
+    assert session.imports == {"requests", "rich"}
+    assert session.imports == {"requests", "rich"}  # memoized
+    assert sorted(Path(p).name for p in parsed) == ["a.py", "test_a.py"]
+
+
+def test_explicit_root_inside_a_pruned_directory_is_scanned(tmp_path: Path) -> None:
+    _mk(tmp_path, "app.py", "import requests\n")
+    _mk(tmp_path, "build/gen/stub.py", "import grpc\n")
+    _mk(tmp_path, "gen/out/x.py", "import yaml\n")
+    _mk(tmp_path, ".gitignore", "gen/\n")
+    for index in (False, True):
+        session = ScanSession([tmp_path, tmp_path / "build" / "gen", tmp_path / "gen" / "out"], index=index)
+        assert session.imports == {"requests", "grpc", "yaml"}
+    assert ScanSession([tmp_path]).imports == {"requests"}
+
+
+def test_generate_report_keeps_src_roots_in_declared_mode(tmp_path: Path, monkeypatch) -> None:
+    _mk(tmp_path, "pyproject.toml", '[project]\nname="demo"\nversion="0"\ndependencies=["requests==1.0"]\n')
+    _mk(tmp_path, "pkg/a.py", "import requests\n")
+    _mk(tmp_path, "scripts/tool.py", "import stray\n")  # outside the requested roots
+    monkeypatch.setattr(VersionChecker, "get_latest_version", lambda self, n: Version("1.0"), raising=True)
+
+    out = generate_report(project_root=tmp_path, src_roots=[tmp_path / "pkg"], out_path=tmp_path / "r.json")
+    data = json.loads(out.read_text(encoding="utf-8"))
+    assert data["imports"] == ["requests"]
+    assert data["unused"] == []
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import json
+import subprocess
+from pathlib import Path
+
+import httpx
+import pytest
+from animadao.cli import cli
+from animadao.config import load_config
+from animadao.http_session import HttpSession
+from animadao.version_checker import VersionChecker
+from click.testing import CliRunner
+from packaging.version import Version
+
+
+def _checker(handler, **kwargs) -> VersionChecker:
+    return VersionChecker(session=HttpSession(transport=httpx.MockTransport(handler)), **kwargs)
+
+
+def _index(versions: dict[str, str], seen: list[str]):
+    def handler(request: httpx.Request) -> httpx.Response:
+        name = request.url.path.split("/")[2]
+        seen.append(name)
+        if name not in versions:
+            return httpx.Response(404)
+        if request.headers.get("If-None-Match") == f'"{versions[name]}"':
+            return httpx.Response(304)
+        return httpx.Response(200, json={"info": {"version": versions[name]}}, headers={"ETag": f'"{versions[name]}"'})
+
+    return handler
+
+
+def test_expired_entries_are_served_then_revalidated() -> None:
+    versions, seen = {"requests": "2.31.0", "six": "1.16.0"}, []
+    _checker(_index(versions, seen)).get_latest_versions(["requests", "six"])
+    versions["requests"] = "2.32.0"
+    seen.clear()
+
+    # ttl 0: every entry is expired, but inside the stale window
+    checker = _checker(_index(versions, seen), ttl_seconds=0, stale_seconds=3600)
+    assert checker.get_latest_versions(["requests", "six"]) == {
+        "requests": Version("2.31.0"),
+        "six": Version("1.16.0"),
+    }
+    assert checker.get_latest_version("six") == Version("1.16.0")
+    assert seen == []
+    assert checker.stale == {"requests", "six"}
+
+    assert checker.revalidate(background=False) == ["requests", "six"]
+    assert sorted(seen) == ["requests", "six"]
+    assert checker.stale == set()
+    # the 304 for six kept its entry (and ETag); requests picked up the new release
+    assert checker.cache.load("requests")[:2] == ("2.32.0", '"2.32.0"')
+    assert checker.cache.load("six")[:2] == ("1.16.0", '"1.16.0"')
+
+    blocking = _checker(_index(versions, seen), ttl_seconds=0)  # no stale window: wait for the index
+    seen.clear()
+    assert blocking.get_latest_version("requests") == Version("2.32.0")
+    assert seen == ["requests"] and blocking.stale == set()
+
+
+def test_background_revalidation_spawns_a_detached_refresh(monkeypatch: pytest.MonkeyPatch) -> None:
+    versions, seen = {"requests": "2.31.0"}, []
+    _checker(_index(versions, seen)).get_latest_version("requests")
+    spawned: list[tuple[list[str], dict]] = []
+    monkeypatch.setattr(subprocess, "Popen", lambda cmd, **kw: spawned.append((cmd, kw)))
+
+    checker = _checker(_index(versions, seen), ttl_seconds=0, stale_seconds=3600, revalidate="background")
+    assert checker.get_latest_version("requests") == Version("2.31.0")
+    assert checker.revalidate() == ["requests"]
+    assert len(seen) == 1  # nothing fetched in this process
+    ((cmd, kw),) = spawned
+    assert cmd[1:] == ["-m", "animadao", "cache", "refresh", "requests"]
+    assert kw["stdout"] is subprocess.DEVNULL
+    assert checker.revalidate() == [] and len(spawned) == 1
+
+
+def test_not_found_is_cached_negatively() -> None:
+    seen: list[str] = []
+    checker = _checker(_index({}, seen))
+    assert checker.get_latest_version("internal-only") is None
+    assert checker.get_latest_versions(["internal-only", "Internal_Only"]) == {
+        "internal-only": None,
+        "Internal_Only": None,
+    }
+    assert seen == ["internal-only"]
+
+    forgetful = _checker(_index({}, seen), negative_ttl=0)
+    assert forgetful.get_latest_versions(["internal-only"]) == {"internal-only": None}
+    assert seen == ["internal-only", "internal-only"]
+
+
+def test_refresh_bypasses_fresh_entries_and_negative_cache() -> None:
+    versions, seen = {"six": "1.16.0"}, []
+    checker = _checker(_index(versions, seen))
+    checker.get_latest_versions(["six", "late"])
+    versions["late"] = "0.1"
+    assert checker.get_latest_versions(["late"]) == {"late": None}
+    assert checker.refresh(["six", "late"]) == {"six": Version("1.16.0"), "late": Version("0.1")}
+    assert sorted(seen) == ["late", "late", "six", "six"]
+    assert checker.cache.load_missing(["late"]) == set()
+
+
+def test_settings_come_from_config(tmp_path: Path) -> None:
+    (tmp_path / ".animadao.toml").write_text(
+        '[core]\npypi_stale_seconds = 60\npypi_revalidate = "end"\npypi_negative_ttl = 5\n', encoding="utf-8"
+    )
+    cfg = load_config(tmp_path)
+    assert (cfg.pypi_stale_seconds, cfg.pypi_revalidate, cfg.pypi_negative_ttl) == (60, "end", 5)
+    with VersionChecker.from_config(cfg) as checker:
+        assert (checker.stale_seconds, checker.revalidate_mode, checker.cache.negative_ttl) == (60, "end", 5)
+    assert load_config(tmp_path / "none").pypi_revalidate == "background"
+    assert load_config(tmp_path / "none").pypi_stale_seconds == 0  # opt-in: by default expired entries wait
+
+
+def test_background_refresh_loads_the_checked_projects_config(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    spawned: list[list[str]] = []
+    monkeypatch.setattr(subprocess, "Popen", lambda cmd, **kw: spawned.append(cmd))
+    (tmp_path / ".animadao.toml").write_text("[core]\npypi_stale_seconds = 60\n", encoding="utf-8")
+    with VersionChecker.from_config(load_config(tmp_path), tmp_path) as checker:
+        checker.stale.add("six")
+        checker.revalidate()
+    assert spawned[0][-3:] == ["six", "--project", str(tmp_path)]
+
+
+def test_cache_refresh_command(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    asked: list[tuple[str, ...]] = []
+
+    def fake_refresh(self: VersionChecker, names):
+        asked.append(tuple(names))
+        return {n: Version("1.0") if n == "six" else None for n in names}
+
+    monkeypatch.setattr(VersionChecker, "refresh", fake_refresh)
+    result = CliRunner().invoke(cli, ["cache", "refresh", "six", "gone", "--project", str(tmp_path)])
+    assert result.exit_code == 0, result.output
+    assert json.loads(result.output) == {"six": "1.0", "gone": None}
+    assert asked == [("six", "gone")]
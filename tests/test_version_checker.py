@@ -5,6 +5,7 @@ from textwrap import dedent
 
 from animadao.version_checker import VersionChecker
 from packaging.requirements import Requirement
+from packaging.version import Version
 
 
 def test_check_versions_monkeypatched(tmp_path: Path, monkeypatch) -> None:
@@ -53,3 +54,45 @@ def test_check_versions_monkeypatched(tmp_path: Path, monkeypatch) -> None:
     outdated, unpinned = checker.check()
     assert any(o.name == "requests" and o.current == "2.31.0" and o.latest == "2.32.0" for o in outdated)
     assert any(u.name == "numpy" for u in unpinned)
+
+
+def test_bulk_engine_honors_concurrency_and_single_flights(tmp_path: Path, monkeypatch) -> None:
+    import asyncio
+
+    import httpx
+
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    calls: list[str] = []
+    active = 0
+    peak = 0
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal active, peak
+        name = request.url.path.split("/")[2]
+        calls.append(name)
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return httpx.Response(200, json={"info": {"version": "2.0.0"}}, headers={"ETag": f'"{name}"'})
+
+    class MockedChecker(VersionChecker):
+        def _async_client(self) -> httpx.AsyncClient:
+            return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    checker = MockedChecker(concurrency=3)
+    installed = {f"pkg{i}": "1.0.0" for i in range(10)}
+    installed["PyYAML"] = "1.0.0"
+    installed["pyyaml"] = "2.0.0"
+
+    outdated, unpinned = checker.check_installed(installed)
+
+    assert peak <= 3
+    assert sorted(calls) == sorted([f"pkg{i}" for i in range(10)] + ["PyYAML"])  # pyyaml single-flighted
+    assert {o.name for o in outdated} == {f"pkg{i}" for i in range(10)} | {"PyYAML"}
+    assert unpinned == []
+
+    # warm cache: second run doesn't hit the network
+    calls.clear()
+    assert checker.get_latest_versions(["pkg0", "pkg1"]) == {"pkg0": Version("2.0.0"), "pkg1": Version("2.0.0")}
+    assert calls == []
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+import pytest
+from animadao.import_scanner import find_top_level_imports
+from animadao.walker import WalkOptions, iter_python_files
+
+
+def _mk(root: Path, rel: str, content: str = "") -> None:
+    p = root / rel
+    p.parent.mkdir(parents=True, exist_ok=True)
+    p.write_text(content, encoding="utf-8")
+
+
+def _rel(root: Path, files) -> set[str]:
+    return {Path(f).relative_to(root).as_posix() for f in files}
+
+
+def test_walker_prunes_heavy_dirs_and_venvs(tmp_path: Path) -> None:
+    _mk(tmp_path, "pkg/app.py", "import requests\n")
+    _mk(tmp_path, ".venv/lib/site-packages/six.py", "import six\n")
+    _mk(tmp_path, "node_modules/x/y.py")
+    _mk(tmp_path, "build/lib/pkg/app.py")
+    _mk(tmp_path, "dist/tmp/setup.py")
+    _mk(tmp_path, "tools/build/__init__.py")  # a first-party package that happens to be called `build`
+    _mk(tmp_path, "tools/build/steps.py", "import jinja2\n")
+    _mk(tmp_path, "pkg/__pycache__/junk.py")
+    _mk(tmp_path, "myenv/pyvenv.cfg", "home = /usr/bin\n")
+    _mk(tmp_path, "myenv/lib/mod.py", "import vendored\n")
+
+    assert _rel(tmp_path, iter_python_files(tmp_path)) == {
+        "pkg/app.py",
+        "tools/build/__init__.py",
+        "tools/build/steps.py",
+    }
+    assert find_top_level_imports(tmp_path) == {"requests", "jinja2"}
+
+
+def test_walker_honors_gitignore_and_excludes(tmp_path: Path) -> None:
+    (tmp_path / ".git").mkdir()
+    _mk(tmp_path, ".gitignore", "generated/\n*_pb2.py\n/scratch.py\n!keep_pb2.py\n")
+    _mk(tmp_path, "pkg/.gitignore", "local_*.py\n")
+    _mk(tmp_path, "pkg/app.py")
+    _mk(tmp_path, "pkg/api_pb2.py")
+    _mk(tmp_path, "pkg/keep_pb2.py")
+    _mk(tmp_path, "pkg/local_settings.py")
+    _mk(tmp_path, "pkg/scratch.py")  # '/scratch.py' is anchored to the root only
+    _mk(tmp_path, "scratch.py")
+    _mk(tmp_path, "generated/models.py")
+    _mk(tmp_path, "tests/fixtures/data.py")
+    _mk(tmp_path, "tests/test_app.py")
+
+    files = _rel(tmp_path, iter_python_files(tmp_path, WalkOptions(exclude=("tests/fixtures",))))
+    assert files == {"pkg/app.py", "pkg/keep_pb2.py", "pkg/scratch.py", "tests/test_app.py"}
+
+    # scanning a subdirectory still applies the worktree's .gitignore
+    assert _rel(tmp_path, iter_python_files(tmp_path / "pkg")) == {"pkg/app.py", "pkg/keep_pb2.py", "pkg/scratch.py"}
+
+    unfiltered = _rel(tmp_path, iter_python_files(tmp_path, WalkOptions(gitignore=False)))
+    assert "generated/models.py" in unfiltered
+
+
+def test_walker_size_cap(tmp_path: Path) -> None:
+    _mk(tmp_path, "small.py", "import a\n")
+    _mk(tmp_path, "huge.py", "import b\n" + "#" * 5000)
+    assert _rel(tmp_path, iter_python_files(tmp_path, WalkOptions(max_file_size=1000))) == {"small.py"}
+    assert len(list(iter_python_files(tmp_path, WalkOptions(max_file_size=0)))) == 2
+
+
+@pytest.mark.skipif(not hasattr(os, "symlink"), reason="symlinks unsupported")
+def test_walker_survives_symlink_loops(tmp_path: Path) -> None:
+    _mk(tmp_path, "pkg/a.py", "import a\n")
+    try:
+        (tmp_path / "pkg" / "loop").symlink_to(tmp_path, target_is_directory=True)
+    except OSError:
+        pytest.skip("cannot create symlinks here")
+    assert _rel(tmp_path, iter_python_files(tmp_path)) == {"pkg/a.py"}